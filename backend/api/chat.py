@@ -1,20 +1,87 @@
+import asyncio
+import json
+from typing import Dict, Optional
 from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import StreamingResponse
 from backend.models.request_models import ChatRequest
 from backend.models.response_models import ChatResponse
 from backend.services.vector_rag_service import VectorRAGService
 from backend.services.hybrid_rag_service import HybridRAGService
+from backend.services.answer_cache import (
+    ANSWER_CACHE_ENABLED,
+    CachedRAGService,
+    answer_cache,
+)
+from backend.services.admission import (
+    AdmissionRejected,
+    client_id,
+    llm_admission,
+    rate_limiter,
+)
+from backend.services.single_flight import (
+    SINGLE_FLIGHT_ENABLED,
+    CoalescedRAGService,
+    single_flight,
+)
+from backend.services.tracing import (
+    record_chat_error,
+    record_chat_rejected,
+    record_chat_result,
+)
+from common.resilience import UpstreamError, UpstreamTimeout, request_deadline
 
 # Create a FastAPI router
 router = APIRouter()
 
-# Instantiate the RAG service
-rag_service = VectorRAGService()
-hybrid_service = HybridRAGService()
+
+# RAG services, built on first use (or by the startup warm-up) so importing
+# the API does not load indexes or open connections
+_rag_services_build: Optional[asyncio.Future] = None
+
+
+async def get_rag_services() -> Dict[str, object]:
+    """
+    Returns the "vector" and "hybrid" services (sharing one vector retriever),
+    each behind the answer cache and request coalescing when enabled.
+    They are built once, in a thread: the warm-up and the first requests all
+    await the same build. A failed build is retried by the next caller.
+    """
+    global _rag_services_build
+    if _rag_services_build is None:
+        _rag_services_build = asyncio.ensure_future(
+            asyncio.to_thread(_build_rag_services)
+        )
+    build = _rag_services_build
+    try:
+        # Shielded, a cancelled caller does not cancel the build for the others
+        return await asyncio.shield(build)
+    except Exception:
+        if _rag_services_build is build:
+            _rag_services_build = None
+        raise
+
+
+def _build_rag_services() -> Dict[str, object]:
+    vector_service = VectorRAGService()
+    services = {
+        "vector": vector_service,
+        "hybrid": HybridRAGService(vector_rag=vector_service),
+    }
+    for namespace, service in services.items():
+        # Put the answer cache in front of both services
+        if ANSWER_CACHE_ENABLED:
+            service = CachedRAGService(service, answer_cache, namespace=namespace)
+        # Let concurrent identical questions share one pipeline run (outermost,
+        # so waiting requests skip the cache lookup too)
+        if SINGLE_FLIGHT_ENABLED:
+            service = CoalescedRAGService(service, single_flight, namespace=namespace)
+        services[namespace] = service
+    return services
 
 
 # Endpoint for hybrid RAG chat
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """
     Chat endpoint that receives a user question, calls the RAG service to get an answer,
     and returns the answer along with the referenced sources.
@@ -25,49 +92,185 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Question cannot be empty"
         )
+    _admit(http_request, "/chat")
 
     try:
-        result = hybrid_service.answer_question(question)
+        with request_deadline():
+            services = await get_rag_services()
+            result = await services["hybrid"].answer_question_async(question)
         # print(f"RAG result: {result}")
-
-        answer = result.get("answer", "").strip()
-        if not answer:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="No answer generated for the given question.",
-            )
-
-        return result
-
+        record_chat_result("/chat", result)
+    except AdmissionRejected as e:
+        record_chat_rejected("/chat")
+        raise _rejection(e)
+    except UpstreamError as e:
+        record_chat_error("/chat")
+        raise _upstream_failure(e)
     except Exception as e:
+        record_chat_error("/chat")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"RAG failed: {str(e)}",
         )
 
+    # Raised outside the try so it is not wrapped into a 500
+    _require_answer(result)
+    return result
+
 
 # Endpoint for vector-based chat
 # Can be used for comparison with hybrid RAG service
 @router.post("/vector-chat", response_model=ChatResponse)
-def vector_chat_endpoint(request: ChatRequest):
+async def vector_chat_endpoint(request: ChatRequest, http_request: Request):
     question = request.question.strip()
     if not question:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Question cannot be empty"
         )
-    try:
-        result = rag_service.answer_question(question)
-
-        answer = result.get("answer", "").strip()
-        if not answer:
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="No answer generated for the given question.",
-            )
+    _admit(http_request, "/vector-chat")
 
-        return result
+    try:
+        with request_deadline():
+            services = await get_rag_services()
+            result = await services["vector"].answer_question_async(question)
+        record_chat_result("/vector-chat", result)
+    except AdmissionRejected as e:
+        record_chat_rejected("/vector-chat")
+        raise _rejection(e)
+    except UpstreamError as e:
+        record_chat_error("/vector-chat")
+        raise _upstream_failure(e)
     except Exception as e:
+        record_chat_error("/vector-chat")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"RAG failed: {str(e)}",
         )
+
+    # Raised outside the try so it is not wrapped into a 500
+    _require_answer(result)
+    return result
+
+
+# Answer cache statistics (hits, misses, evictions, size)
+@router.get("/cache/stats")
+def cache_stats_endpoint():
+    return answer_cache.stats()
+
+
+# Request coalescing statistics (pipeline runs, coalesced requests, in flight)
+@router.get("/coalescing/stats")
+def coalescing_stats_endpoint():
+    return single_flight.stats()
+
+
+# LLM admission statistics (concurrency limit, queue size and depth)
+@router.get("/admission/stats")
+def admission_stats_endpoint():
+    return llm_admission.stats()
+
+
+# Streaming endpoint for hybrid RAG chat (Server-Sent Events)
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """
+    Streams the hybrid RAG answer as Server-Sent Events:
+    a `sources` event once retrieval finishes, one `token` event per answer chunk,
+    and a final `done` event (or `error` if the pipeline fails).
+    """
+    question = _validate_question(request)
+    _admit(http_request, "/chat/stream", streaming=True)
+    services = await get_rag_services()
+    return _sse_response(services["hybrid"], question, "/chat/stream")
+
+
+# Streaming endpoint for vector-based chat (Server-Sent Events)
+@router.post("/vector-chat/stream")
+async def vector_chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    question = _validate_question(request)
+    _admit(http_request, "/vector-chat/stream", streaming=True)
+    services = await get_rag_services()
+    return _sse_response(services["vector"], question, "/vector-chat/stream")
+
+
+# Validate the question and return it stripped
+def _validate_question(request: ChatRequest) -> str:
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Question cannot be empty"
+        )
+    return question
+
+
+# Apply the per-client rate limit. Streams also fail fast when the LLM queue
+# is full, since once the SSE response has started the status is already 200.
+def _admit(http_request: Request, endpoint: str, streaming: bool = False):
+    try:
+        rate_limiter.acquire(client_id(http_request))
+        if streaming:
+            llm_admission.check()
+    except AdmissionRejected as e:
+        record_chat_rejected(endpoint)
+        raise _rejection(e)
+
+
+# 429 / 503 response with a Retry-After header
+def _rejection(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers)
+
+
+# 422 if the pipeline ran but produced no answer
+def _require_answer(result: dict):
+    if not result.get("answer", "").strip():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No answer generated for the given question.",
+        )
+
+
+# 504 if an Azure dependency timed out, 502 if it failed
+def _upstream_failure(e: UpstreamError) -> HTTPException:
+    if isinstance(e, UpstreamTimeout):
+        code = status.HTTP_504_GATEWAY_TIMEOUT
+    else:
+        code = status.HTTP_502_BAD_GATEWAY
+    return HTTPException(status_code=code, detail=f"Upstream failed: {str(e)}")
+
+
+# Wrap a RAG service answer stream into an SSE response
+def _sse_response(service, question: str, endpoint: str) -> StreamingResponse:
+    async def event_stream():
+        sources = []
+        try:
+            with request_deadline():
+                async for event in service.stream_answer_async(question):
+                    if event["event"] == "sources":
+                        sources = event["data"]
+                    elif event["event"] == "done":
+                        data = {**event["data"], "sources": sources}
+                        record_chat_result(endpoint, data)
+                    yield _format_sse(event["event"], event["data"])
+        except AdmissionRejected as e:
+            record_chat_rejected(endpoint)
+            data = {"detail": e.detail, "status": e.status_code}
+            yield _format_sse("error", {**data, "retry_after": e.retry_after})
+        except UpstreamError as e:
+            record_chat_error(endpoint)
+            failure = _upstream_failure(e)
+            data = {"detail": failure.detail, "status": failure.status_code}
+            yield _format_sse("error", data)
+        except Exception as e:
+            record_chat_error(endpoint)
+            yield _format_sse("error", {"detail": f"RAG failed: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Format a single Server-Sent Event
+def _format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
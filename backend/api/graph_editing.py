@@ -1,10 +1,50 @@
-from fastapi import APIRouter, HTTPException, status
-from backend.models.graph_models import BrandNode, ProductNode, HasProductEdge
+import json
+import os
+from typing import Dict, List, Tuple
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from backend.models.graph_models import (
+    BrandNode,
+    ProductNode,
+    HasProductEdge,
+    GraphBulkRequest,
+)
 from common.neo4j_client import get_neo4j_driver
-from backend.models.response_models import GraphStats, GraphAddResponse
+from backend.models.response_models import (
+    GraphStats,
+    GraphAddResponse,
+    GraphBulkError,
+    GraphBulkResponse,
+)
+from backend.services.answer_cache import answer_cache
+from backend.services.graph_snapshot import graph_snapshot
+from backend.services.graph_bulk import (
+    BRANDS_QUERY,
+    PRODUCTS_QUERY,
+    EDGES_REPORT_MISSING_QUERY,
+    BRAND_FIELDS,
+    PRODUCT_FIELDS,
+    EDGE_FIELDS,
+    chunk,
+    sum_counters,
+    to_rows,
+    write_batch,
+)
 
 router = APIRouter()
-graph_driver = get_neo4j_driver()
+# Rows per transaction for /graph/bulk
+GRAPH_BULK_BATCH_SIZE = int(os.environ.get("GRAPH_BULK_BATCH_SIZE", 500))
+
+# Bulk item kinds in the order they are applied: model, query, query fields
+BULK_KINDS = {
+    "brand": (BrandNode, BRANDS_QUERY, BRAND_FIELDS),
+    "product": (ProductNode, PRODUCTS_QUERY, PRODUCT_FIELDS),
+    "edge": (HasProductEdge, EDGES_REPORT_MISSING_QUERY, EDGE_FIELDS),
+}
+
+# Items parsed from a bulk request: kind -> [(index, item)]
+BulkItems = Dict[str, List[Tuple[int, BaseModel]]]
 
 
 @router.post("/add-brand", response_model=GraphAddResponse)
@@ -22,10 +62,13 @@ def add_brand_node(data: BrandNode):
         MERGE (b:Brand {name: $name})
         SET b.url = $url, b.image = $image
         """
-        with graph_driver.session() as session:
+        with get_neo4j_driver().session() as session:
             result = session.run(query, name=data.name, url=data.url, image=data.image)
             summary = result.consume()
 
+        graph_snapshot.apply_write("brand", data.model_dump())
+        answer_cache.invalidate([data.name])
+
         return _build_node_response(summary)
     except Exception as e:
         raise HTTPException(
@@ -53,10 +96,13 @@ def add_product_node(data: ProductNode):
             p.product_line = $product_line,
             p.label = $label
         """
-        with graph_driver.session() as session:
+        with get_neo4j_driver().session() as session:
             result = session.run(query, **data.dict())
             summary = result.consume()
 
+        graph_snapshot.apply_write("product", data.model_dump())
+        answer_cache.invalidate([data.name, data.brand])
+
         return _build_node_response(summary)
     except Exception as e:
         raise HTTPException(
@@ -83,12 +129,15 @@ def add_product_edge(data: HasProductEdge):
         MERGE (b)-[r:HAS_PRODUCT]->(p)
         RETURN r
         """
-        with graph_driver.session() as session:
+        with get_neo4j_driver().session() as session:
             result = session.run(
                 query, from_brand=data.from_brand, to_product=data.to_product
             )
             summary = result.consume()
 
+        graph_snapshot.apply_write("edge", data.model_dump())
+        answer_cache.invalidate([data.from_brand, data.to_product])
+
         return _build_edge_response(summary)
 
     except Exception as e:
@@ -98,6 +147,234 @@ def add_product_edge(data: HasProductEdge):
         )
 
 
+@router.post(
+    "/bulk",
+    response_model=GraphBulkResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": GraphBulkRequest.model_json_schema()},
+                "application/x-ndjson": {
+                    "schema": {
+                        "type": "string",
+                        "description": "One item per line, each with a `kind` of brand, product or edge",
+                    }
+                },
+            },
+            "required": True,
+        }
+    },
+)
+async def bulk_graph_edit(request: Request):
+    """
+    Apply many brand, product and edge edits in one call.
+    Accepts a JSON body ({"brands": [...], "products": [...], "edges": [...]})
+    or an NDJSON stream (Content-Type: application/x-ndjson) with one item per
+    line and a `kind` field. Items are written in batched transactions
+    (brands, then products, then edges); invalid or failed items are reported
+    individually and do not stop the rest.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        items, errors = await _parse_ndjson(request)
+    else:
+        items, errors = await _parse_json(request)
+
+    total = sum(len(v) for v in items.values()) + len(errors)
+    if not total:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No items to apply"
+        )
+
+    counters, applied_names, apply_errors = await run_in_threadpool(_apply_bulk, items)
+    errors.extend(apply_errors)
+    answer_cache.invalidate(applied_names)
+
+    applied = total - len(errors)
+    return GraphBulkResponse(
+        status=f"Applied {applied} of {total} items.",
+        applied=applied,
+        failed=len(errors),
+        stats=GraphStats(**counters),
+        errors=sorted(
+            errors,
+            key=lambda e: (
+                list(BULK_KINDS).index(e.kind) if e.kind in BULK_KINDS else -1,
+                e.index,
+            ),
+        ),
+    )
+
+
+@router.get("/snapshot")
+def graph_snapshot_stats():
+    """
+    State of the in-memory graph snapshot serving the chatbot's graph lookups.
+    """
+    return graph_snapshot.stats()
+
+
+# Parse a JSON bulk body, validating each item separately
+async def _parse_json(request: Request) -> Tuple[BulkItems, List[GraphBulkError]]:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body"
+        )
+    if not isinstance(body, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be an object with brands, products and/or edges arrays",
+        )
+
+    items: BulkItems = {kind: [] for kind in BULK_KINDS}
+    errors = []
+    for kind in BULK_KINDS:
+        raw_items = body.get(f"{kind}s") or []
+        if not isinstance(raw_items, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"'{kind}s' must be an array",
+            )
+        for index, raw in enumerate(raw_items):
+            _add_item(items, errors, kind, index, raw)
+    return items, errors
+
+
+# Parse an NDJSON bulk stream line by line
+async def _parse_ndjson(request: Request) -> Tuple[BulkItems, List[GraphBulkError]]:
+    items: BulkItems = {kind: [] for kind in BULK_KINDS}
+    errors = []
+    buffer = b""
+    index = 0
+
+    async def handle(line: bytes):
+        if not line.strip():
+            return
+        try:
+            raw = json.loads(line)
+        except ValueError:
+            errors.append(
+                GraphBulkError(kind="unknown", index=index, detail="Invalid JSON line")
+            )
+            return
+        kind = raw.pop("kind", None) if isinstance(raw, dict) else None
+        if kind not in BULK_KINDS:
+            errors.append(
+                GraphBulkError(
+                    kind=str(kind or "unknown"),
+                    index=index,
+                    detail="Each line needs a kind of brand, product or edge",
+                )
+            )
+            return
+        _add_item(items, errors, kind, index, raw)
+
+    async for chunk_bytes in request.stream():
+        buffer += chunk_bytes
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            await handle(line)
+            index += 1
+    await handle(buffer)
+
+    return items, errors
+
+
+# Validate one raw item and add it to the items or to the errors
+def _add_item(
+    items: BulkItems, errors: List[GraphBulkError], kind: str, index: int, raw
+):
+    model = BULK_KINDS[kind][0]
+    try:
+        item = model.model_validate(raw)
+    except ValidationError as e:
+        errors.append(
+            GraphBulkError(kind=kind, index=index, detail=_validation_detail(e))
+        )
+        return
+
+    missing = _missing_required(kind, item)
+    if missing:
+        errors.append(GraphBulkError(kind=kind, index=index, detail=missing))
+        return
+    items[kind].append((index, item))
+
+
+# Same required-field checks as the single-item endpoints
+def _missing_required(kind: str, item: BaseModel) -> str:
+    if kind == "brand" and not item.name.strip():
+        return "Brand name is required"
+    if kind == "product" and not item.name.strip():
+        return "Product name is required"
+    if kind == "edge" and (not item.from_brand.strip() or not item.to_product.strip()):
+        return "Both brand and product names are required"
+    return ""
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'item'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+# Write the parsed items in batched transactions (runs in the threadpool)
+def _apply_bulk(
+    items: BulkItems,
+) -> Tuple[Dict[str, int], List[str], List[GraphBulkError]]:
+    results, names, errors = [], [], []
+
+    with get_neo4j_driver().session() as session:
+        for kind, (_, query, fields) in BULK_KINDS.items():
+            for batch in chunk(items[kind], GRAPH_BULK_BATCH_SIZE):
+                rows = to_rows([item.model_dump() for _, item in batch], fields)
+                for row, (index, _) in zip(rows, batch):
+                    row["index"] = index
+                try:
+                    counters, records = write_batch(session, query, rows)
+                except Exception as e:
+                    errors.extend(
+                        GraphBulkError(
+                            kind=kind,
+                            index=index,
+                            detail=f"Transaction failed: {str(e)}",
+                        )
+                        for index, _ in batch
+                    )
+                    continue
+
+                results.append(counters)
+                failed = set()
+                for record in records:
+                    failed.add(record["index"])
+                    missing = [
+                        label
+                        for label, flag in (
+                            ("Brand", record["missing_brand"]),
+                            ("Product", record["missing_product"]),
+                        )
+                        if flag
+                    ]
+                    errors.append(
+                        GraphBulkError(
+                            kind=kind,
+                            index=record["index"],
+                            detail=f"{' and '.join(missing)} not found",
+                        )
+                    )
+                for row in rows:
+                    if row["index"] not in failed:
+                        graph_snapshot.apply_write(kind, row)
+                        names.extend(
+                            row[f]
+                            for f in ("name", "brand", "from_brand", "to_product")
+                            if row.get(f)
+                        )
+
+    return sum_counters(results), names, errors
+
+
 # Build API response for node-related operations
 def _build_node_response(summary) -> GraphAddResponse:
     if summary.counters.nodes_created == 1:
@@ -1,10 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from backend.api.chat import router as chat_router
+from backend.api.chat import get_rag_services, router as chat_router
 from backend.api.graph_editing import router as graph_editing_router
+from backend.services.graph_snapshot import (
+    GRAPH_SNAPSHOT_ENABLED,
+    GRAPH_SNAPSHOT_RECONCILE_SECONDS,
+    GRAPH_SNAPSHOT_SOURCE,
+    graph_snapshot,
+)
+from backend.services.shared_state import shared_state
+from backend.services.tracing import metrics_response, server_timing_middleware
+from backend.services.warmup import WARMUP_MODE, warm_up
+from common.azure_clients import close_async_clients
+from common.neo4j_client import close_async_driver
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the in-memory graph snapshot and, unless disabled, build services and
+    # open connections before serving requests (both run concurrently)
+    startup = []
+    if GRAPH_SNAPSHOT_ENABLED:
+        startup.append(graph_snapshot.load())
+    if WARMUP_MODE == "blocking":
+        startup.append(warm_up(get_rag_services))
+    await asyncio.gather(*startup)
+
+    # Keep the snapshot reconciled with Neo4j
+    reconcile_task = None
+    if (
+        GRAPH_SNAPSHOT_ENABLED
+        and GRAPH_SNAPSHOT_SOURCE == "neo4j"
+        and GRAPH_SNAPSHOT_RECONCILE_SECONDS > 0
+    ):
+        reconcile_task = asyncio.create_task(graph_snapshot.reconcile_forever())
+
+    # Background warm-up: serve at once, warm up alongside the first requests
+    warmup_task = None
+    if WARMUP_MODE == "background":
+        warmup_task = asyncio.create_task(warm_up(get_rag_services))
+
+    # With several workers, apply the graph writes and cache invalidations
+    # made by the other workers
+    follow_task = None
+    if shared_state:
+        follow_task = asyncio.create_task(shared_state.follow_forever())
 
-app = FastAPI()
+    yield
+
+    for task in (reconcile_task, warmup_task, follow_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    # Release the async Azure / Neo4j connections on shutdown
+    await close_async_clients()
+    await close_async_driver()
+
+
+app = FastAPI(lifespan=lifespan)
+# Per-stage timings in a Server-Timing header and request duration metrics
+app.middleware("http")(server_timing_middleware)
 app.include_router(chat_router, tags=["Chat"])
 app.include_router(graph_editing_router, prefix="/graph", tags=["Graph Editing"])
 
@@ -17,4 +76,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# Prometheus metrics (stage latencies, request durations, chat outcomes)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
+
+
 app.mount("/", StaticFiles(directory="frontend/build", html=True), name="static")
@@ -23,3 +23,13 @@ class HasProductEdge(BaseModel):
     from_brand: str  # Brand.name
     to_product: str  # Product.name
     type: str = "HAS_PRODUCT"
+
+
+class GraphBulkRequest(BaseModel):
+    """
+    Bulk graph edit. Items are applied in order: brands, products, then edges.
+    """
+
+    brands: List[BrandNode] = []
+    products: List[ProductNode] = []
+    edges: List[HasProductEdge] = []
@@ -20,6 +20,8 @@ class ChatResponse(BaseModel):
 
     answer: str
     sources: List[Source]
+    # Prompt tokens sent to the chat model (0 when served from the answer cache)
+    prompt_tokens: Optional[int] = None
 
 
 class GraphStats(BaseModel):
@@ -39,3 +41,26 @@ class GraphAddResponse(BaseModel):
 
     status: str
     stats: Optional[GraphStats] = None
+
+
+class GraphBulkError(BaseModel):
+    """
+    Error for a single item of a bulk graph edit.
+    `index` is the position in its array (JSON) or the line number (NDJSON).
+    """
+
+    kind: str
+    index: int
+    detail: str
+
+
+class GraphBulkResponse(BaseModel):
+    """
+    Response model for bulk graph editing
+    """
+
+    status: str
+    applied: int
+    failed: int
+    stats: GraphStats
+    errors: List[GraphBulkError] = []
@@ -0,0 +1,207 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+from backend.services.shared_state import SharedState, shared_state
+from backend.services.tracing import record_span
+from common.resilience import UpstreamThrottled
+
+# Max concurrent chat completions per worker (with WEB_CONCURRENCY workers the
+# deployment sees up to WEB_CONCURRENCY times this)
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+# Max requests waiting for a completion slot, beyond that they are rejected (503)
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", 32))
+# Max seconds a request waits for a completion slot before it is rejected (503)
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", 10))
+# Chat requests per minute per client (0 disables rate limiting)
+RATE_LIMIT_PER_MINUTE = float(os.environ.get("RATE_LIMIT_PER_MINUTE", 30))
+# Requests a client can send at once before the per-minute rate applies
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", 10))
+# Proxies in front of the app that append the caller's address to
+# X-Forwarded-For (1 for Cloud Run, 0 when clients connect directly)
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 1))
+
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth",
+    "Requests waiting for a completion slot",
+    multiprocess_mode="livesum",
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight", "Chat completions in progress", multiprocess_mode="livesum"
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for a completion slot",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total", "Rejected chat requests", ["reason"]
+)
+
+
+class AdmissionRejected(Exception):
+    """
+    A request refused because of overload: 429 (client over its rate limit)
+    or 503 (LLM capacity exhausted), with a Retry-After in seconds.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class LLMAdmission:
+    """
+    Concurrency limiter with a bounded wait queue in front of the chat model.
+    Requests beyond the queue size, or waiting longer than the timeout, are
+    rejected right away instead of piling up behind the deployment's quota.
+    Azure throttling (429) is surfaced as a rejection too.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        # Moving average of how long a completion holds its slot
+        self._avg_hold_seconds = 2.0
+
+    @asynccontextmanager
+    async def slot(self):
+        self.check()
+        self._waiting += 1
+        LLM_QUEUE_DEPTH.inc()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTIONS.labels(reason="queue_timeout").inc()
+            raise AdmissionRejected(
+                503, "Chat model is overloaded, please retry", self.retry_after()
+            )
+        finally:
+            self._waiting -= 1
+            LLM_QUEUE_DEPTH.dec()
+        waited = time.perf_counter() - start
+        LLM_QUEUE_WAIT.observe(waited)
+        record_span("llm_queue", waited)
+
+        LLM_IN_FLIGHT.inc()
+        held = time.perf_counter()
+        try:
+            yield
+        except UpstreamThrottled as e:
+            ADMISSION_REJECTIONS.labels(reason="upstream_throttled").inc()
+            raise AdmissionRejected(
+                503, "Chat model quota exceeded, please retry", e.retry_after
+            ) from e
+        finally:
+            self._avg_hold_seconds = 0.9 * self._avg_hold_seconds + 0.1 * (
+                time.perf_counter() - held
+            )
+            LLM_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    def check(self):
+        """Raises AdmissionRejected right away if the wait queue is full."""
+        if self._waiting >= self.max_queue:
+            ADMISSION_REJECTIONS.labels(reason="queue_full").inc()
+            raise AdmissionRejected(
+                503, "Chat model is overloaded, please retry", self.retry_after()
+            )
+
+    def retry_after(self) -> float:
+        """Estimated seconds until the current queue has drained."""
+        return self._avg_hold_seconds * (self._waiting + 1) / self.max_concurrency
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "waiting": self._waiting,
+            "avg_hold_seconds": round(self._avg_hold_seconds, 3),
+        }
+
+
+class TokenBucketLimiter:
+    """
+    Per-client token buckets: `burst` requests at once, refilled at
+    `per_minute` requests per minute. With several workers the buckets live
+    in the shared state, so the limit holds for the instance rather than per
+    worker. Otherwise they are kept in memory and idle clients are evicted
+    beyond `max_clients` (least recently seen first).
+    """
+
+    def __init__(
+        self,
+        per_minute: float = RATE_LIMIT_PER_MINUTE,
+        burst: int = RATE_LIMIT_BURST,
+        max_clients: int = 10_000,
+        shared: Optional[SharedState] = None,
+    ):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self.shared = shared
+        # client -> (tokens, last refill time)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def acquire(self, client: str):
+        """Takes one token for the client or raises AdmissionRejected (429)."""
+        if self.rate <= 0:
+            return
+        if self.shared:
+            tokens = self.shared.take_token(client, self.rate, self.burst)
+        else:
+            tokens = self._take_local(client)
+        if tokens < 1:
+            ADMISSION_REJECTIONS.labels(reason="rate_limited").inc()
+            raise AdmissionRejected(
+                429, "Too many requests, please slow down", (1 - tokens) / self.rate
+            )
+
+    def _take_local(self, client: str) -> float:
+        """In-memory bucket, returns the tokens available before taking one."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        self._buckets[client] = (tokens - 1 if tokens >= 1 else tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return tokens
+
+
+# Client address: the X-Forwarded-For entry added by the outermost trusted
+# proxy (TRUSTED_PROXY_HOPS from the right). Entries left of it are sent by
+# the client and can be spoofed, so they are never used.
+def client_id(request: Request, trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and trusted_hops > 0:
+        entries = [entry.strip() for entry in forwarded.split(",")]
+        if len(entries) >= trusted_hops and entries[-trusted_hops]:
+            return entries[-trusted_hops]
+    return request.client.host if request.client else "unknown"
+
+
+# Shared instances used by the chat endpoints and the RAG services
+llm_admission = LLMAdmission()
+rate_limiter = TokenBucketLimiter(shared=shared_state)
@@ -0,0 +1,391 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+
+from backend.services.base_rag_service import BaseRAGService
+from backend.services.entity_matcher import question_entities
+from backend.services.query_embeddings import normalize_question, query_embedding_cache
+from backend.services.shared_state import SharedState, shared_state
+from backend.services.tracing import span
+from common.resilience import UpstreamError
+
+# Answer cache configuration
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 1000))
+ANSWER_CACHE_MAX_BYTES = int(os.environ.get("ANSWER_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 3600))
+ANSWER_CACHE_SEMANTIC = (
+    os.environ.get("ANSWER_CACHE_SEMANTIC", "true").lower() == "true"
+)
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", 0.95))
+
+
+class _CacheEntry:
+    """A cached answer with the metadata needed for eviction and invalidation."""
+
+    __slots__ = (
+        "namespace",
+        "result",
+        "entities",
+        "embedding",
+        "mentions",
+        "expires_at",
+        "size",
+    )
+
+    def __init__(
+        self, namespace, result, entities, embedding, expires_at, mentions=None
+    ):
+        self.namespace = namespace
+        self.result = result
+        self.entities = entities
+        self.embedding = embedding
+        # Brands/products named in the question (None: no semantic hits)
+        self.mentions = mentions
+        self.expires_at = expires_at
+        self.size = _estimate_size(result, entities, embedding)
+
+
+class AnswerCache:
+    """
+    In-memory answer cache for the RAG services.
+    - Exact hits on the normalized question.
+    - Semantic hits on questions whose embeddings have a cosine similarity
+      above the threshold and that name the same brands/products (optional,
+      costs one embedding call on a miss). Questions differing only in the
+      brand embed almost identically, so the names must match too.
+    - LRU eviction bounded by entry count and estimated memory, plus a TTL.
+    - Entries are tagged with the brands/products they were built from,
+      so graph edits can invalidate them.
+    - With several workers, a shared tier (SharedState) behind the in-memory
+      one: exact lookups missing locally are served from it, and stores and
+      invalidations reach every worker.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        semantic: bool = ANSWER_CACHE_SEMANTIC,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+        shared: Optional[SharedState] = shared_state,
+        match_entities: Callable[[str], FrozenSet[str]] = question_entities,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.shared = shared
+        self.match_entities = match_entities
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        # Graph edits run in the threadpool, so guard all mutations
+        self._lock = threading.Lock()
+        # Lazily rebuilt (keys, matrix) of normalized embeddings for semantic lookup
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self._stats = {
+            "exact_hits": 0,
+            "shared_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    async def lookup(
+        self, namespace: str, question: str
+    ) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+        """
+        Looks up a cached result for the question.
+        Returns (result, embedding); the embedding computed on a miss is
+        returned so the caller can pass it back to store().
+        """
+        key = _make_key(namespace, normalize_question(question))
+
+        with self._lock:
+            entry = self._get_live_entry(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry.result, entry.embedding
+
+        entry = self._shared_lookup(key)
+        if entry:
+            return entry.result, entry.embedding
+
+        if not self.semantic:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None, None
+
+        try:
+            raw = await query_embedding_cache.embed_async(question)
+        except UpstreamError as e:
+            # Exact lookups only until the embedding deployment recovers
+            print(f"Semantic cache lookup skipped: {e}")
+            raw = None
+        embedding = _unit_vector(raw) if raw else None
+        mentions = self.match_entities(question) if embedding is not None else None
+
+        with self._lock:
+            match = self._find_similar(namespace, embedding, mentions)
+            if match:
+                self._entries.move_to_end(match)
+                self._stats["semantic_hits"] += 1
+                return self._entries[match].result, embedding
+
+            self._stats["misses"] += 1
+            return None, embedding
+
+    def store(
+        self,
+        namespace: str,
+        question: str,
+        result: Dict,
+        embedding: Optional[np.ndarray] = None,
+    ):
+        """Stores a result, evicting least recently used entries if over budget."""
+        key = _make_key(namespace, normalize_question(question))
+        entities = {normalize_question(e) for e in result.get("entities") or []}
+        mentions = self.match_entities(question) if embedding is not None else None
+        entry = _CacheEntry(
+            namespace=namespace,
+            result=result,
+            entities=entities,
+            embedding=embedding,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            mentions=mentions,
+        )
+        if entry.size > self.max_bytes:
+            return
+
+        self._insert(key, entry)
+        if self.shared:
+            self.shared.put_answer(
+                key,
+                (namespace, result, embedding, mentions),
+                entities,
+                self.ttl_seconds,
+                self.max_entries,
+            )
+
+    def _insert(self, key: str, entry: _CacheEntry):
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._matrix = None
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, names: Iterable[str], broadcast: bool = True) -> int:
+        """
+        Removes every entry built from any of the given brand/product names
+        (in every worker unless `broadcast` is False).
+        Returns the number of removed entries.
+        """
+        targets = {normalize_question(n) for n in names if n}
+        if not targets:
+            return 0
+
+        if self.shared and broadcast:
+            self.shared.delete_answers(targets)
+            self.shared.publish("answer_cache.invalidate", {"names": sorted(targets)})
+
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.entities & targets]
+            for key in stale:
+                self._remove(key)
+            self._stats["invalidations"] += len(stale)
+            return len(stale)
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+
+    def stats(self) -> Dict:
+        """Returns hit/miss counters and the current size of the cache."""
+        with self._lock:
+            hits = (
+                self._stats["exact_hits"]
+                + self._stats["shared_hits"]
+                + self._stats["semantic_hits"]
+            )
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _shared_lookup(self, key: str) -> Optional[_CacheEntry]:
+        """Copies an entry stored by another worker into this one, if any."""
+        if not self.shared:
+            return None
+        found = self.shared.get_answer(key)
+        if not found:
+            return None
+        (namespace, result, embedding, *mentions), ttl = found
+        # Entries stored before mentions were recorded give no semantic hits
+        mentions = mentions[0] if mentions else None
+        entities = {normalize_question(e) for e in result.get("entities") or []}
+        entry = _CacheEntry(
+            namespace, result, entities, embedding, time.monotonic() + ttl, mentions
+        )
+        self._insert(key, entry)
+        with self._lock:
+            self._stats["shared_hits"] += 1
+        return entry
+
+    def _get_live_entry(self, key: str) -> Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry and entry.expires_at < time.monotonic():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def _find_similar(
+        self,
+        namespace: str,
+        embedding: Optional[np.ndarray],
+        mentions: Optional[FrozenSet[str]],
+    ) -> Optional[str]:
+        """
+        Returns the key of the most similar live entry above the threshold
+        whose question names the same brands/products.
+        """
+        if embedding is None or mentions is None or not self._entries:
+            return None
+
+        if self._matrix is None:
+            keys = [k for k, e in self._entries.items() if e.embedding is not None]
+            if not keys:
+                return None
+            matrix = np.stack([self._entries[k].embedding for k in keys])
+            self._matrix = (keys, matrix)
+
+        keys, matrix = self._matrix
+        scores = matrix @ embedding
+        for idx in np.argsort(scores)[::-1]:
+            if scores[idx] < self.similarity_threshold:
+                return None
+            key = keys[idx]
+            entry = self._get_live_entry(key)
+            if entry and entry.namespace == namespace and entry.mentions == mentions:
+                return key
+        return None
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry.size
+            self._matrix = None
+
+
+class CachedRAGService:
+    """
+    Wraps a RAG service with the answer cache.
+    Exposes the same async entry points as BaseRAGService.
+    """
+
+    def __init__(self, service: BaseRAGService, cache: AnswerCache, namespace: str):
+        self.service = service
+        self.cache = cache
+        self.namespace = namespace
+
+    async def answer_question_async(self, question: str) -> Dict:
+        with span("cache"):
+            cached, embedding = await self.cache.lookup(self.namespace, question)
+        if cached:
+            return {**cached, "prompt_tokens": 0}
+
+        result = await self.service.answer_question_async(question)
+        if result.get("answer", "").strip():
+            self.cache.store(self.namespace, question, result, embedding)
+        return result
+
+    async def stream_answer_async(self, question: str) -> AsyncIterator[Dict]:
+        """On a hit, replays the cached answer as a single token event."""
+        with span("cache"):
+            cached, embedding = await self.cache.lookup(self.namespace, question)
+        if cached:
+            sources = cached["sources"]
+            yield {"event": "sources", "data": [s.model_dump() for s in sources]}
+            yield {"event": "token", "data": cached["answer"]}
+            yield {
+                "event": "done",
+                "data": {"answer": cached["answer"], "prompt_tokens": 0},
+            }
+            return
+
+        async for event in self.service.stream_answer_async(question):
+            if event["event"] == "done" and event["data"]["answer"]:
+                result = {
+                    "answer": event["data"]["answer"],
+                    "sources": event["sources"],
+                    "entities": event["entities"],
+                }
+                self.cache.store(self.namespace, question, result, embedding)
+            yield event
+
+
+def _make_key(namespace: str, normalized: str) -> str:
+    return f"{namespace}:{normalized}"
+
+
+def _unit_vector(values: List[float]) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _estimate_size(
+    result: Dict, entities: Set[str], embedding: Optional[np.ndarray]
+) -> int:
+    """Rough memory estimate of an entry (text lengths + embedding buffer)."""
+    size = len(result.get("answer", ""))
+    for source in result.get("sources", []):
+        size += sum(len(v) for v in source.model_dump().values() if v)
+    size += sum(len(e) for e in entities)
+    if embedding is not None:
+        size += embedding.nbytes
+    return size
+
+
+# Shared cache instance used by the chat endpoints and invalidated by graph edits
+answer_cache = AnswerCache()
+
+# Invalidations made by graph edits in other workers
+if shared_state:
+    shared_state.on(
+        "answer_cache.invalidate",
+        lambda event: answer_cache.invalidate(event["names"], broadcast=False),
+    )
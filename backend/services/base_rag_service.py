@@ -1,6 +1,14 @@
-from typing import Dict
+import time
+from typing import AsyncIterator, Dict, List
 from abc import ABC, abstractmethod
-from common.azure_clients import get_chat_completion
+from backend.services.admission import llm_admission
+from backend.services.context_packer import count_message_tokens
+from backend.services.tracing import record_span, span
+from common.azure_clients import (
+    get_chat_completion,
+    get_chat_completion_async,
+    stream_chat_completion_async,
+)
 
 
 class BaseRAGService(ABC):
@@ -16,11 +24,89 @@ class BaseRAGService(ABC):
     def answer_question(self, question: str) -> Dict:
         pass
 
+    @abstractmethod
+    async def retrieve_async(self, question: str) -> Dict:
+        """
+        Retrieves the LLM context for the question.
+        Returns a dict with `context`, `sources` and `entities`
+        (the brand/product names the context was built from).
+        """
+        pass
+
+    async def answer_question_async(self, question: str) -> Dict:
+        """
+        Async version of answer_question, used by the FastAPI endpoints.
+        """
+        retrieval = await self.retrieve_async(question)
+        answer = await self.get_answer_async(question, retrieval["context"])
+        messages = self.build_messages(question, retrieval["context"])
+
+        return {
+            "answer": answer,
+            "sources": retrieval["sources"],
+            "entities": retrieval["entities"],
+            "prompt_tokens": count_message_tokens(messages),
+        }
+
+    async def stream_answer_async(self, question: str) -> AsyncIterator[Dict]:
+        """
+        Streams the answer as events: the sources as soon as retrieval finishes,
+        then each answer token, then a final event with the full answer and the
+        prompt token count.
+        The final event also carries the retrieval entities (not sent to clients).
+        """
+        retrieval = await self.retrieve_async(question)
+        sources = retrieval["sources"]
+        yield {"event": "sources", "data": [s.model_dump() for s in sources]}
+
+        messages = self.build_messages(question, retrieval["context"])
+        tokens = []
+        async with llm_admission.slot():
+            start = time.perf_counter()
+            async for token in stream_chat_completion_async(messages):
+                if not tokens:
+                    record_span("llm_first_token", time.perf_counter() - start)
+                tokens.append(token)
+                yield {"event": "token", "data": token}
+            record_span("llm", time.perf_counter() - start)
+
+        yield {
+            "event": "done",
+            "data": {
+                "answer": "".join(tokens).strip(),
+                "prompt_tokens": count_message_tokens(messages),
+            },
+            "sources": sources,
+            "entities": retrieval["entities"],
+        }
+
     def get_answer(self, question: str, context: str) -> str:
         """
         Calls the LLM to generate an answer, using the provided context.
         The system prompt instructs the model to only use the context and reference numbers.
         """
+        messages = self.build_messages(question, context)
+        with span("llm"):
+            answer = get_chat_completion(messages)
+
+        return answer.strip()
+
+    async def get_answer_async(self, question: str, context: str) -> str:
+        """
+        Async version of get_answer, used by the FastAPI endpoints so the
+        LLM call does not block the event loop.
+        """
+        messages = self.build_messages(question, context)
+        async with llm_admission.slot():
+            with span("llm"):
+                answer = await get_chat_completion_async(messages)
+
+        return answer.strip()
+
+    def build_messages(self, question: str, context: str) -> List[Dict]:
+        """
+        Builds the chat messages (system prompt + question with context) for the LLM.
+        """
         system_message = (
             "You are Nestlé's official AI assistant. Only answer questions related to Nestlé. "
             "Answer customer questions using only the provided content from semantic and graph-based retrieval. "
@@ -30,11 +116,7 @@ class BaseRAGService(ABC):
 
         user_message = f"{question}\n\nContext:\n{context}"
 
-        messages = [
+        return [
             {"role": "system", "content": system_message},
             {"role": "user", "content": user_message},
         ]
-
-        answer = get_chat_completion(messages)
-
-        return answer.strip()
@@ -0,0 +1,134 @@
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from backend.services.entity_matcher import normalize_name
+from backend.services.tracing import span
+from common.tokens import count_tokens, truncate_to_tokens
+
+# Max tokens of retrieved context (vector + graph) sent to the chat model
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 3000))
+# Max tokens of a single document or product, longer ones are truncated
+CONTEXT_ITEM_MAX_TOKENS = int(os.environ.get("CONTEXT_ITEM_MAX_TOKENS", 600))
+# Smallest truncated item worth adding when the budget is almost used up
+CONTEXT_ITEM_MIN_TOKENS = int(os.environ.get("CONTEXT_ITEM_MIN_TOKENS", 50))
+
+GRAPH_CONTEXT_HEADER = "[Graph Knowledge from Neo4j]"
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Prompt tokens of chat messages (content plus ~4 tokens of framing each)."""
+    return sum(count_tokens(m["content"]) + 4 for m in messages) + 3
+
+
+def format_graph_product(product: dict) -> str:
+    """Context block of a graph product."""
+    lines = [
+        f"Product: {product.get('name', '')}",
+        f"Label: {product.get('label', '')}",
+        f"Size: {product.get('product_size', '')}",
+        f"Product Line: {product.get('product_line', '')}",
+        f"Description: {product.get('description', '')}",
+        f"URL: {product.get('url', '')}",
+    ]
+    return "\n".join(lines).strip()
+
+
+@dataclass
+class PackedContext:
+    """
+    Output of pack_context.
+    `docs` are the vector documents kept, in citation order ([1], [2], ...),
+    `products` the graph products kept; `tokens` is the context size.
+    """
+
+    context: str
+    docs: List[dict] = field(default_factory=list)
+    products: List[dict] = field(default_factory=list)
+    tokens: int = 0
+    dropped: int = 0
+    truncated: int = 0
+
+
+def pack_context(
+    docs: List[dict],
+    products: Optional[List[dict]] = None,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    item_max_tokens: int = CONTEXT_ITEM_MAX_TOKENS,
+) -> PackedContext:
+    """
+    Packs the highest-ranked vector documents and graph products into a token
+    budget. Documents and products are taken alternately in rank order, each
+    truncated to item_max_tokens (or to what is left of the budget); graph
+    products already present as a vector document are skipped. The layout is
+    the numbered vector context followed by the graph knowledge section.
+    """
+    with span("context"):
+        return _pack_context(docs, products or [], budget, item_max_tokens)
+
+
+def _pack_context(
+    docs: List[dict], products: List[dict], budget: int, item_max_tokens: int
+) -> PackedContext:
+    docs = [d for d in docs if d.get("content")]
+    titles = {normalize_name(d["title"]) for d in docs if d.get("title")}
+    products = [
+        p for p in products if p.get("name") and normalize_name(p["name"]) not in titles
+    ]
+
+    # Rank order: doc 1, product 1, doc 2, product 2, ...
+    candidates = []
+    for rank in range(max(len(docs), len(products))):
+        if rank < len(docs):
+            candidates.append(("doc", docs[rank]))
+        if rank < len(products):
+            candidates.append(("product", products[rank]))
+
+    kept_docs, doc_texts = [], []
+    kept_products, product_texts = [], []
+    used = count_tokens(GRAPH_CONTEXT_HEADER) if products else 0
+    truncated = 0
+
+    for kind, item in candidates:
+        if kind == "doc":
+            # Reference number and separator
+            overhead = count_tokens(f"[{len(kept_docs) + 1}] ") + 1
+            text = item["content"]
+        else:
+            overhead = 1
+            text = format_graph_product(item)
+
+        limit = min(item_max_tokens, budget - used - overhead)
+        if limit < CONTEXT_ITEM_MIN_TOKENS:
+            continue
+        tokens = count_tokens(text)
+        if tokens > limit:
+            text = truncate_to_tokens(text, limit)
+            tokens = count_tokens(text)
+            truncated += 1
+
+        used += tokens + overhead
+        if kind == "doc":
+            kept_docs.append(item)
+            doc_texts.append(text)
+        else:
+            kept_products.append(item)
+            product_texts.append(text)
+
+    vector_context = "\n\n".join(f"[{i+1}] {t}" for i, t in enumerate(doc_texts))
+    graph_context = "\n\n".join(product_texts)
+    if not graph_context:
+        context = vector_context
+    elif not vector_context:
+        context = graph_context
+    else:
+        context = f"{vector_context}\n\n{GRAPH_CONTEXT_HEADER}\n{graph_context}"
+
+    return PackedContext(
+        context=context,
+        docs=kept_docs,
+        products=kept_products,
+        tokens=count_tokens(context),
+        dropped=len(candidates) - len(kept_docs) - len(kept_products),
+        truncated=truncated,
+    )
@@ -0,0 +1,66 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+from common.constants import GRAPH_BRANDS_PATH, GRAPH_PRODUCTS_PATH
+from common.utils import read_jsonl
+
+
+def normalize_name(text: str) -> str:
+    """Lowercases, strips accents and punctuation, and collapses whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EntityMatcher:
+    """
+    Detects brand and product names mentioned directly in a question,
+    so graph lookups can start before vector search returns.
+    Names are loaded from the processed graph data.
+    """
+
+    def __init__(self, brand_names: List[str], product_names: List[str]):
+        self.brand_patterns = self._compile(brand_names)
+        self.product_patterns = self._compile(product_names)
+
+    @classmethod
+    def from_graph_files(cls) -> "EntityMatcher":
+        brands = [b["name"] for b in read_jsonl(GRAPH_BRANDS_PATH) if b.get("name")]
+        products = [p["name"] for p in read_jsonl(GRAPH_PRODUCTS_PATH) if p.get("name")]
+        return cls(brands, products)
+
+    def match(self, question: str) -> Tuple[List[str], List[str]]:
+        """Returns (brands, products) whose names appear in the question."""
+        text = normalize_name(question)
+        brands = [name for name, p in self.brand_patterns.items() if p.search(text)]
+        products = [name for name, p in self.product_patterns.items() if p.search(text)]
+        return brands, products
+
+    def _compile(self, names: List[str]) -> Dict[str, re.Pattern]:
+        """
+        Builds one word-boundary pattern per name. Multi-word names also match
+        without spaces (e.g. "Kit Kat" matches "kitkat").
+        """
+        patterns = {}
+        for name in names:
+            normalized = normalize_name(name)
+            if len(normalized) < 3:
+                continue
+            variants = {re.escape(normalized), re.escape(normalized.replace(" ", ""))}
+            patterns[name] = re.compile(r"\b(?:" + "|".join(variants) + r")\b")
+        return patterns
+
+
+# Matcher over the processed graph data, shared by the hybrid service and the
+# answer cache
+@lru_cache(maxsize=None)
+def get_entity_matcher() -> EntityMatcher:
+    return EntityMatcher.from_graph_files()
+
+
+# Brand and product names mentioned in a question
+def question_entities(question: str) -> FrozenSet[str]:
+    brands, products = get_entity_matcher().match(question)
+    return frozenset(brands + products)
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+# Indexes that make MERGE on name a lookup instead of a label scan
+SCHEMA_QUERIES = [
+    "CREATE INDEX brand_name IF NOT EXISTS FOR (b:Brand) ON (b.name)",
+    "CREATE INDEX product_name IF NOT EXISTS FOR (p:Product) ON (p.name)",
+]
+
+BRANDS_QUERY = """
+UNWIND $rows AS row
+MERGE (b:Brand {name: row.name})
+SET b.url = row.url, b.image = row.image
+"""
+
+PRODUCTS_QUERY = """
+UNWIND $rows AS row
+MERGE (p:Product {name: row.name})
+SET p.brand = row.brand, p.url = row.url, p.image = row.image,
+    p.description = row.description,
+    p.product_size = row.product_size,
+    p.product_line = row.product_line,
+    p.label = row.label
+"""
+
+EDGES_QUERY = """
+UNWIND $rows AS row
+MATCH (b:Brand {name: row.from_brand})
+MATCH (p:Product {name: row.to_product})
+MERGE (b)-[r:HAS_PRODUCT]->(p)
+"""
+
+BRAND_FIELDS = ["name", "url", "image"]
+PRODUCT_FIELDS = [
+    "name",
+    "brand",
+    "url",
+    "image",
+    "description",
+    "product_size",
+    "product_line",
+    "label",
+]
+EDGE_FIELDS = ["from_brand", "to_product"]
+
+# Edge variant for the bulk API: creates edges whose ends exist and
+# returns the row index of every edge with a missing brand or product
+EDGES_REPORT_MISSING_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (b:Brand {name: row.from_brand})
+OPTIONAL MATCH (p:Product {name: row.to_product})
+FOREACH (_ IN CASE WHEN b IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+    MERGE (b)-[:HAS_PRODUCT]->(p))
+WITH row, b, p
+WHERE b IS NULL OR p IS NULL
+RETURN row.index AS index, b IS NULL AS missing_brand, p IS NULL AS missing_product
+"""
+
+
+def to_rows(items: Iterable[Dict], fields: List[str]) -> List[Dict]:
+    """Keeps only the query parameters, filling missing fields with None."""
+    return [{f: item.get(f) for f in fields} for item in items]
+
+
+def chunk(rows: List[Dict], batch_size: int) -> List[List[Dict]]:
+    return [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+
+
+def ensure_schema(driver):
+    """Creates the name indexes used by MERGE (no-op if they exist)."""
+    with driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+
+
+def write_batch(
+    session, query: str, rows: List[Dict]
+) -> Tuple[Dict[str, int], List[Dict]]:
+    """
+    Writes one batch in an explicit write transaction (retried by the driver
+    on transient errors). Returns its update counters and any returned records.
+    """
+
+    def work(tx):
+        result = tx.run(query, rows=rows)
+        records = [record.data() for record in result]
+        return result.consume().counters, records
+
+    counters, records = session.execute_write(work)
+    return {
+        "nodes_created": counters.nodes_created,
+        "properties_set": counters.properties_set,
+        "relationships_created": counters.relationships_created,
+    }, records
+
+
+def write_batches(
+    driver, query: str, rows: List[Dict], batch_size: int = 1000, workers: int = 1
+) -> Dict[str, int]:
+    """
+    Sends rows through an UNWIND query in batches, one transaction per batch.
+    With workers > 1, batches run in parallel sessions.
+    Returns the summed update counters.
+    """
+
+    def run(batch):
+        with driver.session() as session:
+            counters, _ = write_batch(session, query, batch)
+            return counters
+
+    batches = chunk(rows, batch_size)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run, batches))
+    else:
+        results = [run(batch) for batch in batches]
+
+    return sum_counters(results)
+
+
+def sum_counters(results: List[Dict[str, int]]) -> Dict[str, int]:
+    totals = {"nodes_created": 0, "properties_set": 0, "relationships_created": 0}
+    for result in results:
+        for key in totals:
+            totals[key] += result[key]
+    return totals
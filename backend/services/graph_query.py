@@ -1,27 +1,79 @@
-from typing import List, Optional, Dict
-from common.neo4j_client import get_neo4j_driver
-
-
-def get_products_by_brand(brand_name: str) -> List[Dict]:
-    driver = get_neo4j_driver()
-    query = """
-        MATCH (b:Brand {name: $brand_name})-[:HAS_PRODUCT]->(p:Product)
-        RETURN p.name AS name, p.description AS description, p.label AS label,
-               p.product_size AS product_size, p.url AS url
-    """
-    with driver.session() as session:
-        results = session.run(query, brand_name=brand_name)
+import os
+from typing import List, Dict
+from backend.services.graph_snapshot import graph_snapshot
+from common.neo4j_client import get_neo4j_driver, get_async_neo4j_driver
+
+# Max products returned per brand by a graph lookup
+GRAPH_PRODUCTS_PER_BRAND = int(os.environ.get("GRAPH_PRODUCTS_PER_BRAND", 50))
+
+# Products of every candidate brand (capped per brand) and every candidate
+# product name, resolved in one round trip. Returns every field used by
+# format_graph_product and the product reranker.
+GRAPH_PRODUCTS_QUERY = """
+    CALL {
+        UNWIND $brand_names AS brand_name
+        MATCH (:Brand {name: brand_name})-[:HAS_PRODUCT]->(p:Product)
+        WITH brand_name, collect(p)[..$per_brand] AS products
+        UNWIND products AS p
+        RETURN p
+        UNION
+        UNWIND $names AS name
+        MATCH (p:Product {name: name})
+        RETURN p
+    }
+    RETURN DISTINCT p.name AS name, p.description AS description,
+           p.label AS label, p.product_size AS product_size,
+           p.product_line AS product_line, p.url AS url
+"""
+
+
+# Lookups are served from the in-memory graph snapshot once it is loaded,
+# Neo4j is only queried before that (or with GRAPH_SNAPSHOT_ENABLED=false)
+
+
+def get_graph_products(
+    brand_names: List[str],
+    names: List[str],
+    per_brand: int = GRAPH_PRODUCTS_PER_BRAND,
+) -> List[Dict]:
+    """Products of the given brands and products with the given names."""
+    if not brand_names and not names:
+        return []
+    if graph_snapshot.loaded:
+        return graph_snapshot.lookup(brand_names, names, per_brand)
+
+    def read(tx):
+        results = tx.run(
+            GRAPH_PRODUCTS_QUERY,
+            brand_names=brand_names,
+            names=names,
+            per_brand=per_brand,
+        )
         return [record.data() for record in results]
 
+    with get_neo4j_driver().session() as session:
+        return session.execute_read(read)
+
+
+async def get_graph_products_async(
+    brand_names: List[str],
+    names: List[str],
+    per_brand: int = GRAPH_PRODUCTS_PER_BRAND,
+) -> List[Dict]:
+    """Async version of get_graph_products (one read transaction)."""
+    if not brand_names and not names:
+        return []
+    if graph_snapshot.loaded:
+        return graph_snapshot.lookup(brand_names, names, per_brand)
+
+    async def read(tx):
+        results = await tx.run(
+            GRAPH_PRODUCTS_QUERY,
+            brand_names=brand_names,
+            names=names,
+            per_brand=per_brand,
+        )
+        return [record.data() async for record in results]
 
-def get_product_by_name(name: str) -> Optional[Dict]:
-    driver = get_neo4j_driver()
-    query = """
-        MATCH (p:Product {name: $name})
-        RETURN p.name AS name, p.description AS description, p.label AS label,
-               p.product_size AS product_size, p.url AS url
-    """
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        record = result.single()
-        return record.data() if record else None
+    async with get_async_neo4j_driver().session() as session:
+        return await session.execute_read(read)
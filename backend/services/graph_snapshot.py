@@ -0,0 +1,258 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.shared_state import SharedState, shared_state
+from common.constants import GRAPH_BRANDS_PATH, GRAPH_EDGES_PATH, GRAPH_PRODUCTS_PATH
+from common.neo4j_client import get_async_neo4j_driver
+from common.utils import read_jsonl
+
+# In-process read model of the Brand -> Product graph
+GRAPH_SNAPSHOT_ENABLED = (
+    os.environ.get("GRAPH_SNAPSHOT_ENABLED", "true").lower() == "true"
+)
+# Initial load: "neo4j" (falls back to the processed files) or "files"
+GRAPH_SNAPSHOT_SOURCE = os.environ.get("GRAPH_SNAPSHOT_SOURCE", "neo4j").lower()
+# Seconds between full reloads from Neo4j (0 disables reconciliation)
+GRAPH_SNAPSHOT_RECONCILE_SECONDS = float(
+    os.environ.get("GRAPH_SNAPSHOT_RECONCILE_SECONDS", 300)
+)
+
+# Product properties returned by lookups (same as the graph_query Cypher query)
+PRODUCT_RESULT_FIELDS = (
+    "name",
+    "description",
+    "label",
+    "product_size",
+    "product_line",
+    "url",
+)
+
+SNAPSHOT_BRANDS_QUERY = "MATCH (b:Brand) RETURN properties(b) AS brand"
+SNAPSHOT_PRODUCTS_QUERY = "MATCH (p:Product) RETURN properties(p) AS product"
+SNAPSHOT_EDGES_QUERY = """
+    MATCH (b:Brand)-[:HAS_PRODUCT]->(p:Product)
+    RETURN b.name AS from_brand, p.name AS to_product
+"""
+
+# A write applied to the snapshot: (kind, row) with kind brand, product or edge
+GraphWrite = Tuple[str, dict]
+
+
+class _GraphState:
+    """Brands, products and the Brand -> Product adjacency (product names in order)."""
+
+    def __init__(self):
+        self.brands: Dict[str, dict] = {}
+        self.products: Dict[str, dict] = {}
+        self.brand_products: Dict[str, Dict[str, None]] = {}
+
+    def apply(self, kind: str, row: dict):
+        """Applies a write with the same semantics as the Cypher MERGE queries."""
+        if kind == "brand":
+            self.brands.setdefault(row["name"], {}).update(row)
+        elif kind == "product":
+            self.products.setdefault(row["name"], {}).update(row)
+        elif kind == "edge":
+            brand, product = row["from_brand"], row["to_product"]
+            # The edge queries MATCH both ends, so nothing is created if one is missing
+            if brand in self.brands and product in self.products:
+                self.brand_products.setdefault(brand, {})[product] = None
+
+
+class GraphSnapshot:
+    """
+    In-memory copy of the Brand -> Product graph serving the hybrid service's
+    lookups as dictionary reads. Loaded at startup from Neo4j (or the processed
+    graph files), kept current by the graph editing API and periodically
+    reconciled with Neo4j. Lookups return None while nothing is loaded, so the
+    callers fall back to Neo4j.
+    With several workers, the first one to start loads the snapshot and shares
+    it (SharedState) with the others, and writes are replayed in every worker.
+    """
+
+    def __init__(self, shared: Optional[SharedState] = shared_state):
+        self.shared = shared
+        self._state: Optional[_GraphState] = None
+        self._lock = threading.Lock()
+        # Writes made while a reload is in flight, replayed on the new state
+        self._journal: Optional[List[GraphWrite]] = None
+        self.source: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._state is not None
+
+    def lookup(
+        self, brand_names: List[str], names: List[str], per_brand: int
+    ) -> Optional[List[Dict]]:
+        """
+        Up to `per_brand` products of each brand, then the named products,
+        without duplicates (same result as graph_query.GRAPH_PRODUCTS_QUERY).
+        """
+        with self._lock:
+            if self._state is None:
+                return None
+            state = self._state
+            found: Dict[str, None] = {}
+            for brand_name in brand_names:
+                for name in list(state.brand_products.get(brand_name, {}))[:per_brand]:
+                    found[name] = None
+            for name in names:
+                if name in state.products:
+                    found[name] = None
+            return [_product_result(state.products[name]) for name in found]
+
+    def apply_write(self, kind: str, row: dict, broadcast: bool = True):
+        """
+        Mirrors a committed graph write (brand, product or edge), in every
+        worker unless `broadcast` is False.
+        """
+        row = {k: v for k, v in row.items() if k != "index"}
+        if self.shared and broadcast:
+            self.shared.publish("graph_snapshot.write", {"kind": kind, "row": row})
+        with self._lock:
+            if self._state is not None:
+                self._state.apply(kind, row)
+            if self._journal is not None:
+                self._journal.append((kind, row))
+
+    def load_from_files(self):
+        """Loads the snapshot from processed_data/graph."""
+        writes = [("brand", b) for b in read_jsonl(GRAPH_BRANDS_PATH)]
+        writes += [("product", p) for p in read_jsonl(GRAPH_PRODUCTS_PATH)]
+        writes += [("edge", e) for e in read_jsonl(GRAPH_EDGES_PATH)]
+        self._replace(writes, "files")
+
+    async def load_from_neo4j(self):
+        """Loads (or reloads) the snapshot from Neo4j."""
+        with self._lock:
+            self._journal = []
+        try:
+            driver = get_async_neo4j_driver()
+            async with driver.session() as session:
+                brands = await _fetch(session, SNAPSHOT_BRANDS_QUERY)
+                products = await _fetch(session, SNAPSHOT_PRODUCTS_QUERY)
+                edges = await _fetch(session, SNAPSHOT_EDGES_QUERY)
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        writes = [("brand", r["brand"]) for r in brands]
+        writes += [("product", r["product"]) for r in products]
+        writes += [("edge", r) for r in edges]
+        self._replace(writes, "neo4j")
+
+    async def load(self, source: str = GRAPH_SNAPSHOT_SOURCE):
+        """Initial load; falls back to the processed files if Neo4j is unavailable."""
+        if not self.shared:
+            await self._load(source)
+            return
+
+        # One worker loads, the others wait and take its copy
+        async with self.shared.lock("graph_snapshot"):
+            shared = self.shared.get_blob("graph_snapshot")
+            max_age = GRAPH_SNAPSHOT_RECONCILE_SECONDS or float("inf")
+            if shared and shared[2] < max_age:
+                writes, seq, _ = shared
+                self._replace(writes, "shared")
+                # Apply the writes made since the copy was taken
+                self.shared.rewind(seq)
+                return
+            seq = self.shared.last_seq()
+            await self._load(source)
+            self.shared.put_blob("graph_snapshot", self._export(), seq)
+
+    async def _load(self, source: str):
+        if source == "neo4j":
+            try:
+                await self.load_from_neo4j()
+                return
+            except Exception as e:
+                print(f"Graph snapshot: Neo4j load failed, using processed files: {e}")
+        self.load_from_files()
+
+    async def reconcile_forever(
+        self, interval: float = GRAPH_SNAPSHOT_RECONCILE_SECONDS
+    ):
+        """Periodically reloads the snapshot from Neo4j to pick up external writes."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                seq = self.shared.last_seq() if self.shared else 0
+                await self.load_from_neo4j()
+                if self.shared:
+                    self.shared.put_blob("graph_snapshot", self._export(), seq)
+            except Exception as e:
+                print(f"Graph snapshot: reconciliation failed: {e}")
+
+    def _export(self) -> List[GraphWrite]:
+        """The current state as writes, to share it with the other workers."""
+        with self._lock:
+            state = self._state
+            writes = [("brand", b) for b in state.brands.values()]
+            writes += [("product", p) for p in state.products.values()]
+            writes += [
+                ("edge", {"from_brand": brand, "to_product": name})
+                for brand, names in state.brand_products.items()
+                for name in names
+            ]
+            return writes
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._state
+            return {
+                "loaded": state is not None,
+                "source": self.source,
+                "loaded_at": self.loaded_at,
+                "brands": len(state.brands) if state else 0,
+                "products": len(state.products) if state else 0,
+                "edges": (
+                    sum(len(p) for p in state.brand_products.values()) if state else 0
+                ),
+            }
+
+    def _replace(self, writes: List[GraphWrite], source: str):
+        state = _GraphState()
+        for kind, row in writes:
+            if row.get("name") or kind == "edge":
+                state.apply(kind, row)
+
+        with self._lock:
+            for kind, row in self._journal or []:
+                state.apply(kind, row)
+            self._journal = None
+            self._state = state
+            self.source = source
+            self.loaded_at = time.time()
+        print(
+            f"Graph snapshot loaded from {source}: {len(state.brands)} brands, "
+            f"{len(state.products)} products"
+        )
+
+
+async def _fetch(session, query: str) -> List[Dict]:
+    result = await session.run(query)
+    return [record.data() async for record in result]
+
+
+def _product_result(product: dict) -> Dict:
+    return {field: product.get(field) for field in PRODUCT_RESULT_FIELDS}
+
+
+# Shared snapshot used by graph_query and kept current by the graph editing API
+graph_snapshot = GraphSnapshot()
+
+# Graph writes made in other workers
+if shared_state:
+    shared_state.on(
+        "graph_snapshot.write",
+        lambda event: graph_snapshot.apply_write(
+            event["kind"], event["row"], broadcast=False
+        ),
+    )
@@ -1,12 +1,30 @@
+import asyncio
+import os
 from typing import Dict, List, Optional
+from backend.services.tracing import span
 from backend.services.vector_rag_service import VectorRAGService
 from backend.services.base_rag_service import BaseRAGService
-from backend.services.graph_query import get_product_by_name, get_products_by_brand
+from backend.services.graph_query import get_graph_products, get_graph_products_async
+from backend.services.context_packer import pack_context
+from backend.services.entity_matcher import get_entity_matcher
+from backend.services.product_reranker import (
+    RERANK_TOP_N,
+    get_product_reranker,
+    keyword_rerank,
+)
+from common.resilience import UpstreamError, remaining_time
+
+# Time budget (seconds) for the graph lookups of a single hybrid question
+GRAPH_TIMEOUT_SECONDS = float(os.environ.get("GRAPH_TIMEOUT_SECONDS", 2.0))
 
 
 class HybridRAGService(BaseRAGService):
-    def __init__(self):
-        self.vector_rag = VectorRAGService()
+    def __init__(self, vector_rag: Optional[VectorRAGService] = None):
+        # Vector retrieval, shared with the vector-only service when given
+        self.vector_rag = vector_rag or VectorRAGService()
+        self.entity_matcher = get_entity_matcher()
+        # Embedding reranker (RERANK_MODE=embedding), None for keyword reranking
+        self.product_reranker = get_product_reranker()
 
     def answer_question(self, question: str) -> Dict:
         """
@@ -14,41 +32,144 @@ class HybridRAGService(BaseRAGService):
         1. Retrieve vector documents.
         2. Extract brand from top documents.
         3. Query Neo4j for related graph context.
-        4. Merge both into a unified context for the LLM.
+        4. Pack both into a unified, token-budgeted context for the LLM.
         """
         # Step 1: vector search
         vector_docs = self.vector_rag.search_documents(question)
-        vector_context = self.vector_rag.build_context(vector_docs)
-        sources = self.vector_rag.prepare_sources(vector_docs)
 
         # Step 2: extract brand or fallback name
         brand = self.extract_brand_from_docs(vector_docs)
         name = self.extract_top_name_from_docs(vector_docs)
 
         # Step 3: graph search
-        if brand:
-            graph_products = get_products_by_brand(brand)
-        elif name:
-            graph_product = get_product_by_name(name)
-            graph_products = [graph_product] if graph_product else []
-        else:
-            graph_products = []
-
-        # Step 4: skip graph if nothing found
-        if graph_products:
-            graph_products = self._filter_and_rerank_products(question, graph_products)
-            graph_context = self.build_graph_context(graph_products)
-        else:
-            graph_context = ""
-
-        # Step 5: Merge vector and graph contexts
-        context = self.merge_contexts(vector_context, graph_context)
-
-        # Step 6: Generate answer using the LLM
-        answer = self.get_answer(question, context)
+        with span("graph"):
+            if brand:
+                graph_products = get_graph_products([brand], [])
+            elif name:
+                graph_products = get_graph_products([], [name])
+            else:
+                graph_products = []
+
+        # Step 4: rerank graph products and pack both sources into the budget
+        graph_products = self.rerank_products(question, graph_products)
+        packed = pack_context(vector_docs, graph_products)
+        sources = self.vector_rag.prepare_sources(packed.docs)
+
+        # Step 5: Generate answer using the LLM
+        answer = self.get_answer(question, packed.context)
 
         return {"answer": answer, "sources": sources}
 
+    async def retrieve_async(self, question: str) -> Dict:
+        """
+        Async retrieval stage of the hybrid pipeline.
+        1. Start vector search and graph lookups for brands/products named in the
+           question at the same time.
+        2. Extract brand or fallback name from the top documents.
+        3. Run a follow-up graph lookup only if the doc-derived brand was not
+           already looked up. Graph lookups share a GRAPH_TIMEOUT_SECONDS budget;
+           on timeout the answer is built without graph context.
+        4. Pack both into a unified, token-budgeted context for the LLM.
+        Returns the packed context, the vector sources and the entities used.
+        """
+        loop = asyncio.get_running_loop()
+        # Graph budget, shortened by the request deadline if less time is left
+        graph_budget = min(GRAPH_TIMEOUT_SECONDS, remaining_time(GRAPH_TIMEOUT_SECONDS))
+        graph_deadline = loop.time() + graph_budget
+
+        # Step 1: vector search and question-based graph lookup run concurrently
+        question_brands, question_names = self.entity_matcher.match(question)
+        graph_task = asyncio.create_task(
+            self._graph_lookup_async(
+                question_brands, question_names, graph_deadline, graph_budget
+            )
+        )
+        try:
+            vector_docs = await self.vector_rag.search_documents_async(question)
+        except BaseException:
+            graph_task.cancel()
+            raise
+
+        # Step 2: extract brand or fallback name
+        brand = self.extract_brand_from_docs(vector_docs)
+        name = self.extract_top_name_from_docs(vector_docs)
+
+        # Step 3: follow-up graph lookup only when the docs point somewhere new
+        follow_brands, follow_names = [], []
+        if brand and brand not in question_brands:
+            follow_brands = [brand]
+        elif not brand and not question_brands and not question_names and name:
+            follow_names = [name]
+
+        graph_products = await graph_task
+        if follow_brands or follow_names:
+            graph_products += await self._graph_lookup_async(
+                follow_brands, follow_names, graph_deadline, graph_budget
+            )
+        graph_products = _dedupe_products(graph_products)
+
+        # Step 4: rerank graph products and pack both sources into the budget
+        graph_products = await self.rerank_products_async(question, graph_products)
+        packed = pack_context(vector_docs, graph_products)
+        sources = self.vector_rag.prepare_sources(packed.docs)
+
+        entities = self.vector_rag.extract_entities(packed.docs)
+        entities.update(p["name"] for p in packed.products if p.get("name"))
+        entities.update(question_brands + follow_brands)
+
+        return {"context": packed.context, "sources": sources, "entities": entities}
+
+    async def _graph_lookup_async(
+        self, brands: List[str], names: List[str], deadline: float, budget: float
+    ) -> List[dict]:
+        """
+        Resolves all brands and product names in one graph round trip, giving
+        up at the deadline (`budget` is the graph budget it belongs to, for logs).
+        A timed-out or failed lookup yields no graph products.
+        """
+        if not brands and not names:
+            return []
+
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            print("Graph lookup skipped: time budget exhausted")
+            return []
+
+        try:
+            with span("graph"):
+                return await asyncio.wait_for(
+                    get_graph_products_async(brands, names), timeout=timeout
+                )
+        except asyncio.TimeoutError:
+            print(f"Graph lookup timed out (graph budget {budget:.2f}s)")
+        except Exception as e:
+            print(f"Graph lookup failed: {e}")
+        return []
+
+    def rerank_products(self, question: str, products: List[dict]) -> List[dict]:
+        """Keeps the RERANK_TOP_N graph products most relevant to the question."""
+        with span("rerank"):
+            if self.product_reranker and products:
+                return self.product_reranker.rerank(question, products, RERANK_TOP_N)
+            return keyword_rerank(question, products, RERANK_TOP_N)
+
+    async def rerank_products_async(
+        self, question: str, products: List[dict]
+    ) -> List[dict]:
+        """
+        Async version of rerank_products. Falls back to keyword reranking if
+        the question (or a new product) cannot be embedded.
+        """
+        with span("rerank"):
+            if self.product_reranker and products:
+                try:
+                    return await self.product_reranker.rerank_async(
+                        question, products, RERANK_TOP_N
+                    )
+                except UpstreamError as e:
+                    print(f"Embedding rerank failed, using keyword rerank: {e}")
+            return keyword_rerank(question, products, RERANK_TOP_N)
+
     def extract_brand_from_docs(self, docs: List[dict]) -> Optional[str]:
         """Extracts the most common non-empty brand from top documents."""
         brands = [doc.get("brand") for doc in docs if doc.get("brand")]
@@ -59,58 +180,15 @@ class HybridRAGService(BaseRAGService):
         names = [doc.get("name") for doc in docs if doc.get("name")]
         return max(set(names), key=names.count) if names else None
 
-    def build_graph_context(self, graph_products: List[dict]) -> str:
-        """Builds a context string from graph-based knowledge."""
-        if not graph_products:
-            return ""
-
-        parts = []
-        for p in graph_products:
-            lines = [
-                f"Product: {p.get('name', '')}",
-                f"Label: {p.get('label', '')}",
-                f"Size: {p.get('product_size', '')}",
-                f"Product Line: {p.get('product_line', '')}",
-                f"Description: {p.get('description', '')}",
-                f"URL: {p.get('url', '')}",
-            ]
-            parts.append("\n".join(lines).strip())
-
-        return "\n\n".join(parts).strip()
-
-    def merge_contexts(self, vector_context: str, graph_context: str) -> str:
-        """Merges vector and graph contexts into a single string."""
-        if not graph_context:
-            return vector_context
-        if not vector_context:
-            return graph_context
-        return f"{vector_context}\n\n[Graph Knowledge from Neo4j]\n{graph_context}"
-
-    def _filter_and_rerank_products(
-        self, question: str, products: List[dict]
-    ) -> List[dict]:
-        """
-        Filter out unrelated products and rerank based on simple keyword overlap with the question.
-        This reduces noise in graph-based context and improves answer relevance.
-        """
-        if not products:
-            return []
-
-        question_lower = question.lower()
-
-        def relevance_score(p: dict) -> int:
-            """Simple score: count of matching keywords from question in product fields"""
-            fields = " ".join(
-                [
-                    str(p.get("name", "")),
-                    str(p.get("description", "")),
-                    str(p.get("label", "")),
-                ]
-            ).lower()
-            return sum(1 for word in question_lower.split() if word in fields)
-
-        # Filter out products with no keyword match
-        filtered = [p for p in products if relevance_score(p) > 0]
 
-        # Rerank by descending relevance score
-        return sorted(filtered, key=relevance_score, reverse=True)
+def _dedupe_products(products: List[dict]) -> List[dict]:
+    """Removes duplicate products (same name), keeping the first occurrence."""
+    seen = set()
+    unique = []
+    for p in products:
+        key = p.get("name")
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(p)
+    return unique
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.retrievers import (
+    BaseEmbedder,
+    LocalVectorRetriever,
+    build_local_index,
+)
+from common.constants import PRODUCT_EMBEDDINGS_DIR
+
+# Graph product reranking: "keyword" (word overlap) or "embedding"
+RERANK_MODE = os.environ.get("RERANK_MODE", "keyword").lower()
+
+# Max number of graph products passed to the context builder
+RERANK_TOP_N = int(os.environ.get("RERANK_TOP_N", 10))
+# Max products embedded on the fly (missing from the precomputed matrix, e.g.
+# added or edited through the graph API) kept in memory, least recently used
+# ones are dropped
+RERANK_EXTRA_EMBEDDINGS = int(os.environ.get("RERANK_EXTRA_EMBEDDINGS", 2048))
+
+
+def product_text(product: dict) -> str:
+    """Text that represents a graph product for embedding."""
+    parts = [
+        product.get("name"),
+        product.get("label"),
+        product.get("product_line"),
+        product.get("description"),
+    ]
+    return "\n".join(str(p) for p in parts if p)
+
+
+# Embedding key of a product: a hash of its embedded text, so an edited
+# description or label gets a new embedding instead of the stale one
+def product_key(product: dict) -> str:
+    return hashlib.sha256(product_text(product).encode("utf-8")).hexdigest()
+
+
+def keyword_rerank(
+    question: str, products: List[dict], top_n: Optional[int] = None
+) -> List[dict]:
+    """
+    Filter out unrelated products and rerank based on simple keyword overlap with the question.
+    This reduces noise in graph-based context and improves answer relevance.
+    """
+    if not products:
+        return []
+
+    words = set(question.lower().split())
+
+    def relevance_score(p: dict) -> int:
+        """Simple score: count of matching keywords from question in product fields"""
+        fields = " ".join(
+            [
+                str(p.get("name", "")),
+                str(p.get("description", "")),
+                str(p.get("label", "")),
+            ]
+        ).lower()
+        return sum(1 for word in words if word in fields)
+
+    # Score each product once, filter out products with no keyword match
+    scored = [(relevance_score(p), p) for p in products]
+    scored = [(score, p) for score, p in scored if score > 0]
+
+    # Rerank by descending relevance score
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [p for _, p in scored[:top_n]]
+
+
+def build_product_embeddings(
+    products: Iterable[dict],
+    embedder: BaseEmbedder,
+    index_dir: str = PRODUCT_EMBEDDINGS_DIR,
+) -> int:
+    """Precomputes product embeddings (same on-disk format as the local index)."""
+    documents = [
+        {"id": product_key(p), "name": p["name"], "content": product_text(p)}
+        for p in products
+        if p.get("name")
+    ]
+    return build_local_index(documents, embedder, index_dir=index_dir)
+
+
+class ProductReranker:
+    """
+    Reranks graph products by cosine similarity to the question.
+    Product embeddings are precomputed (memory-mapped float32 matrix keyed by
+    product_key, a hash of the embedded text); products missing from it, e.g.
+    added or edited through the graph editing API, are embedded on first sight
+    and the `max_extra` most recently used of them kept in memory.
+    All candidates are scored with a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        index_dir: str = PRODUCT_EMBEDDINGS_DIR,
+        max_extra: int = RERANK_EXTRA_EMBEDDINGS,
+    ):
+        index = LocalVectorRetriever(index_dir)
+        self.embedder = index.embedder
+        self.embeddings = index.embeddings
+        self.rows = {doc["id"]: i for i, doc in enumerate(index.documents)}
+        self.max_extra = max_extra
+        # product_key -> vector of products embedded on the fly, LRU order
+        self._extra: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rerank(self, question: str, products: List[dict], top_n: int) -> List[dict]:
+        keys = [product_key(p) for p in products]
+        extra, missing = self._lookup(products, keys)
+        if missing:
+            vectors = self.embedder.embed([product_text(p) for p in missing.values()])
+            extra.update(self._remember(missing, vectors))
+        query = self.embedder.embed_query(question)
+        return self._top_n(query[0], products, keys, extra, top_n)
+
+    async def rerank_async(
+        self, question: str, products: List[dict], top_n: int
+    ) -> List[dict]:
+        keys = [product_key(p) for p in products]
+        extra, missing = self._lookup(products, keys)
+        if missing:
+            vectors = await self.embedder.embed_async(
+                [product_text(p) for p in missing.values()]
+            )
+            extra.update(self._remember(missing, vectors))
+        query = await self.embedder.embed_query_async(question)
+        return self._top_n(query[0], products, keys, extra, top_n)
+
+    def _top_n(
+        self,
+        query: np.ndarray,
+        products: List[dict],
+        keys: List[str],
+        extra: Dict[str, np.ndarray],
+        top_n: int,
+    ) -> List[dict]:
+        if not products:
+            return []
+
+        matrix = np.stack(
+            [extra[k] if k in extra else self.embeddings[self.rows[k]] for k in keys]
+        )
+        scores = matrix @ query
+        k = min(top_n, len(products))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [products[i] for i in top[np.argsort(-scores[top])]]
+
+    def _lookup(
+        self, products: List[dict], keys: List[str]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, dict]]:
+        """
+        Splits products missing from the precomputed matrix into those embedded
+        earlier (key -> vector, held by this call so a concurrent eviction
+        does not affect it) and those still to embed (key -> product).
+        """
+        extra, missing = {}, {}
+        with self._lock:
+            for key, product in zip(keys, products):
+                if key in self.rows or key in extra:
+                    continue
+                if key in self._extra:
+                    self._extra.move_to_end(key)
+                    extra[key] = self._extra[key]
+                else:
+                    missing[key] = product
+        return extra, missing
+
+    def _remember(
+        self, missing: Dict[str, dict], vectors: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """Keeps new vectors, evicting the least recently used beyond max_extra."""
+        fresh = dict(zip(missing, vectors))
+        with self._lock:
+            self._extra.update(fresh)
+            while len(self._extra) > self.max_extra:
+                self._extra.popitem(last=False)
+        return fresh
+
+
+@lru_cache(maxsize=None)
+def get_product_reranker() -> Optional[ProductReranker]:
+    """
+    Returns the shared embedding reranker, or None (keyword reranking)
+    if RERANK_MODE is not "embedding" or the embeddings were not built.
+    """
+    if RERANK_MODE != "embedding":
+        return None
+    try:
+        return ProductReranker()
+    except FileNotFoundError:
+        print(
+            "Embedding reranker disabled: product embeddings not found. "
+            "Run `python -m scripts.graph.build_product_embeddings` first."
+        )
+        return None
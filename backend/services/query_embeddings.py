@@ -0,0 +1,81 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from common.azure_clients import generate_embeddings, generate_embeddings_async
+
+# Number of question embeddings kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 2048))
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a question for cache keys:
+    lowercase, punctuation/hyphens replaced by spaces, whitespace collapsed.
+    """
+    text = re.sub(r"[^\w\s]", " ", question.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    LRU cache of question embeddings keyed by the normalized question,
+    so repeated questions skip the embedding round trip.
+    """
+
+    def __init__(self, max_size: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, question: str) -> Optional[List[float]]:
+        key = normalize_question(question)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        embeddings = generate_embeddings([key])
+        return self._put(key, embeddings[0]) if embeddings else None
+
+    async def embed_async(self, question: str) -> Optional[List[float]]:
+        key = normalize_question(question)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        embeddings = await generate_embeddings_async([key])
+        return self._put(key, embeddings[0]) if embeddings else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def _get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def _put(self, key: str, embedding: List[float]) -> List[float]:
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return embedding
+
+
+# Shared instance used by the retrievers and the answer cache
+query_embedding_cache = QueryEmbeddingCache()
@@ -0,0 +1,481 @@
+import asyncio
+import os
+import re
+import unicodedata
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.services.query_embeddings import query_embedding_cache
+from common.azure_clients import (
+    get_search_client,
+    get_async_search_client,
+    generate_embeddings,
+    generate_embeddings_async,
+)
+from common.constants import LOCAL_INDEX_DIR
+from common.resilience import SEARCH_TIMEOUT_SECONDS, UpstreamError, call_azure
+from common.utils import load_json, save_json
+
+# Retriever backend: "azure" (Azure AI Search) or "local" (in-process NumPy index)
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "azure").lower()
+
+# Azure query mode: "keyword", "vector", or "hybrid" (both fused with RRF)
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "keyword").lower()
+SEARCH_MODES = ("keyword", "vector", "hybrid")
+
+# Reciprocal-rank fusion constant (60 is the value from the original RRF paper)
+RRF_K = int(os.environ.get("RRF_K", 60))
+
+# Metadata fields the retrievers can filter on
+FILTER_FIELDS = ("type", "brand")
+
+# Fields returned by Azure searches (the 1536-d embedding is left out of the payload)
+SELECT_FIELDS = [
+    "id",
+    "type",
+    "title",
+    "brand",
+    "content",
+    "image",
+    "created_at",
+    "sourcepage",
+    "recipe_tags",
+    "product_category",
+    "product_label",
+    "product_line",
+    "article_theme",
+    "published_at",
+    "parent_id",
+    "chunk_index",
+]
+
+
+# ************* Embedders *************
+class BaseEmbedder(ABC):
+    """Turns texts into L2-normalized float32 vectors of shape (len(texts), dim)."""
+
+    name: str
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        pass
+
+    async def embed_async(self, texts: List[str]) -> np.ndarray:
+        return self.embed(texts)
+
+    def embed_query(self, question: str) -> np.ndarray:
+        return self.embed([question])
+
+    async def embed_query_async(self, question: str) -> np.ndarray:
+        return await self.embed_async([question])
+
+
+class AzureEmbedder(BaseEmbedder):
+    """Embeddings from the Azure OpenAI embedding deployment."""
+
+    name = "azure"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return _to_unit_matrix(generate_embeddings(texts), len(texts))
+
+    async def embed_async(self, texts: List[str]) -> np.ndarray:
+        return _to_unit_matrix(await generate_embeddings_async(texts), len(texts))
+
+    def embed_query(self, question: str) -> np.ndarray:
+        embedding = query_embedding_cache.embed(question)
+        return _to_unit_matrix([embedding] if embedding else [], 1)
+
+    async def embed_query_async(self, question: str) -> np.ndarray:
+        embedding = await query_embedding_cache.embed_async(question)
+        return _to_unit_matrix([embedding] if embedding else [], 1)
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Offline embedder: signed feature hashing of word unigrams and bigrams
+    with sublinear term frequency and optional IDF weights (see fit()).
+    Deterministic across processes, so an index built once can be queried
+    without any network access.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024, idf: Optional[np.ndarray] = None):
+        self.dim = dim
+        self.idf = idf
+
+    def fit(self, texts: List[str]) -> "HashingEmbedder":
+        """Computes IDF weights per hash bucket from the corpus."""
+        df = np.count_nonzero(self._term_frequencies(texts), axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = self._term_frequencies(texts)
+        if self.idf is not None:
+            matrix *= self.idf
+        return _normalize_rows(matrix)
+
+    def _term_frequencies(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.dim] += sign
+        return np.sign(matrix) * np.log1p(np.abs(matrix))
+
+
+def get_embedder(
+    name: str, dim: Optional[int] = None, idf: Optional[np.ndarray] = None
+) -> BaseEmbedder:
+    if name == "hashing":
+        return HashingEmbedder(dim or 1024, idf)
+    if name == "azure":
+        return AzureEmbedder()
+    raise ValueError(f"Unknown embedder: {name}")
+
+
+# ************* Retrievers *************
+class BaseRetriever(ABC):
+    """
+    Retrieval backend behind VectorRAGService.search_documents.
+    Returns index documents as dicts (same fields as the Azure index,
+    plus "@search.score"). `filters` maps a FILTER_FIELDS name to a value.
+    """
+
+    @abstractmethod
+    def search(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def search_async(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        pass
+
+
+class AzureSearchRetriever(BaseRetriever):
+    """
+    Azure AI Search retriever with three query modes:
+    - keyword: full-text search on the question (BM25)
+    - vector: k-NN search on the question embedding
+    - hybrid: keyword and vector queries fused with reciprocal-rank fusion
+    Question embeddings go through the shared query embedding cache;
+    if embedding fails the query falls back to keyword search.
+    Async searches are bounded by the request deadline, retried and hedged.
+    """
+
+    def __init__(self, mode: str = SEARCH_MODE):
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown SEARCH_MODE: {mode}")
+        self.mode = mode
+
+    def search(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        if self.mode != "keyword":
+            embedding = query_embedding_cache.embed(question)
+            if embedding is not None:
+                vector = self._vector(embedding, top_k, filters)
+                if self.mode == "vector":
+                    return vector
+                keyword = self._keyword(question, top_k, filters)
+                return reciprocal_rank_fusion([keyword, vector], top_k)
+
+        return self._keyword(question, top_k, filters)
+
+    async def search_async(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        if self.mode == "keyword":
+            return await self._keyword_async(question, top_k, filters)
+
+        if self.mode == "vector":
+            embedding = await _embed_question_async(question)
+            if embedding is None:
+                return await self._keyword_async(question, top_k, filters)
+            return await self._vector_async(embedding, top_k, filters)
+
+        # Hybrid: the keyword query runs while the question is being embedded
+        keyword_task = asyncio.create_task(
+            self._keyword_async(question, top_k, filters)
+        )
+        try:
+            embedding = await _embed_question_async(question)
+            vector = (
+                await self._vector_async(embedding, top_k, filters) if embedding else []
+            )
+        except BaseException:
+            keyword_task.cancel()
+            raise
+        return reciprocal_rank_fusion([await keyword_task, vector], top_k)
+
+    def _keyword(self, question, top_k, filters) -> List[dict]:
+        results = get_search_client().search(
+            search_text=question,
+            top=top_k,
+            filter=_odata_filter(filters),
+            select=SELECT_FIELDS,
+        )
+        return [doc for doc in results]
+
+    def _vector(self, embedding, top_k, filters) -> List[dict]:
+        results = get_search_client().search(
+            search_text=None,
+            vector_queries=[_vector_query(embedding, top_k)],
+            top=top_k,
+            filter=_odata_filter(filters),
+            select=SELECT_FIELDS,
+        )
+        return [doc for doc in results]
+
+    async def _keyword_async(self, question, top_k, filters) -> List[dict]:
+        return await _search_async(
+            search_text=question,
+            top=top_k,
+            filter=_odata_filter(filters),
+            select=SELECT_FIELDS,
+        )
+
+    async def _vector_async(self, embedding, top_k, filters) -> List[dict]:
+        return await _search_async(
+            search_text=None,
+            vector_queries=[_vector_query(embedding, top_k)],
+            top=top_k,
+            filter=_odata_filter(filters),
+            select=SELECT_FIELDS,
+        )
+
+
+# Runs an async Azure search; results are fetched while iterating, so the
+# whole iteration is one attempt
+async def _search_async(**kwargs) -> List[dict]:
+    async def request():
+        results = await get_async_search_client().search(**kwargs)
+        return [doc async for doc in results]
+
+    return await call_azure(
+        "search", request, timeout=SEARCH_TIMEOUT_SECONDS, hedge=True
+    )
+
+
+# Question embedding, or None (keyword fallback) if the embedding call failed
+async def _embed_question_async(question: str) -> Optional[List[float]]:
+    try:
+        return await query_embedding_cache.embed_async(question)
+    except UpstreamError as e:
+        print(f"Question embedding failed, falling back to keyword search: {e}")
+        return None
+
+
+class LocalVectorRetriever(BaseRetriever):
+    """
+    In-process dense retriever over processed_data/vector.
+    Embeddings are a contiguous float32 matrix memory-mapped from disk;
+    search is a batched dot product followed by a partial top-k sort.
+    Build the index with `python -m scripts.vector.build_local_index`.
+    """
+
+    def __init__(self, index_dir: str = LOCAL_INDEX_DIR):
+        paths = _index_paths(index_dir)
+        if not os.path.exists(paths["embeddings"]):
+            raise FileNotFoundError(
+                f"Local vector index not found in {index_dir}. "
+                "Run `python -m scripts.vector.build_local_index` first."
+            )
+
+        meta = load_json(paths["meta"])
+        self.documents = load_json(paths["documents"])
+        self.embeddings = np.load(paths["embeddings"], mmap_mode="r")
+        idf = np.load(paths["idf"]) if os.path.exists(paths["idf"]) else None
+        self.embedder = get_embedder(
+            meta.get("embedder", "azure"), meta.get("dim"), idf
+        )
+
+        # Column arrays for vectorized metadata filtering
+        self._field_values = {
+            field: np.array([doc.get(field) or "" for doc in self.documents])
+            for field in FILTER_FIELDS
+        }
+
+    def search(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        query = self.embedder.embed_query(question)
+        return self._top_k(query, top_k, filters)[0]
+
+    async def search_async(
+        self, question: str, top_k: int, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        query = await self.embedder.embed_query_async(question)
+        return self._top_k(query, top_k, filters)[0]
+
+    def search_batch(
+        self, questions: List[str], top_k: int, filters: Optional[Dict] = None
+    ) -> List[List[dict]]:
+        """Embeds and scores several questions with a single matrix product."""
+        return self._top_k(self.embedder.embed(questions), top_k, filters)
+
+    def _top_k(
+        self, query: np.ndarray, top_k: int, filters: Optional[Dict]
+    ) -> List[List[dict]]:
+        if not len(self.documents) or top_k <= 0:
+            return [[] for _ in range(len(query))]
+
+        scores = query @ self.embeddings.T
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(top_k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates])]
+            results.append(
+                [
+                    {**self.documents[i], "@search.score": float(scores[row, i])}
+                    for i in ordered
+                    if np.isfinite(scores[row, i])
+                ]
+            )
+        return results
+
+    def _filter_mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self.documents), dtype=bool)
+        for field, value in filters.items():
+            if field not in self._field_values:
+                raise ValueError(f"Unsupported filter field: {field}")
+            mask &= self._field_values[field] == value
+        return mask
+
+
+def build_local_index(
+    documents: List[dict],
+    embedder: BaseEmbedder,
+    index_dir: str = LOCAL_INDEX_DIR,
+    batch_size: int = 16,
+) -> int:
+    """
+    Embeds the documents' content and writes the local index:
+    embeddings.npy (float32, L2-normalized), documents.json, meta.json
+    and, for the hashing embedder, idf.npy.
+    Returns the number of indexed documents.
+    """
+    documents = [d for d in documents if (d.get("content") or "").strip()]
+    if isinstance(embedder, HashingEmbedder):
+        embedder.fit([d["content"] for d in documents])
+
+    batches = []
+    for start in range(0, len(documents), batch_size):
+        texts = [d["content"] for d in documents[start : start + batch_size]]
+        batches.append(embedder.embed(texts))
+    dim = batches[0].shape[1] if batches else 0
+    matrix = np.ascontiguousarray(
+        np.vstack(batches) if batches else np.zeros((0, dim)), dtype=np.float32
+    )
+
+    paths = _index_paths(index_dir)
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(paths["embeddings"], matrix)
+    if getattr(embedder, "idf", None) is not None:
+        np.save(paths["idf"], embedder.idf)
+    save_json(
+        [{k: v for k, v in d.items() if k != "embedding"} for d in documents],
+        paths["documents"],
+    )
+    save_json(
+        {"embedder": embedder.name, "dim": dim, "count": len(documents)},
+        paths["meta"],
+    )
+    return len(documents)
+
+
+@lru_cache(maxsize=None)
+def get_retriever(backend: str = VECTOR_BACKEND) -> BaseRetriever:
+    """Returns the shared retriever for the configured backend."""
+    if backend == "local":
+        return LocalVectorRetriever()
+    if backend == "azure":
+        return AzureSearchRetriever()
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[dict]], top_k: int, k: int = RRF_K
+) -> List[dict]:
+    """
+    Fuses ranked result lists: each document scores sum(1 / (k + rank)) over
+    the lists it appears in. "@search.score" is replaced by the fused score.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, dict] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.get("id") or doc.get("sourcepage") or doc.get("title")
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**docs[key], "@search.score": scores[key]} for key in ranked]
+
+
+def _vector_query(embedding: List[float], top_k: int):
+    from azure.search.documents.models import VectorizedQuery
+
+    return VectorizedQuery(
+        vector=embedding, k_nearest_neighbors=top_k, fields="embedding"
+    )
+
+
+def _index_paths(index_dir: str) -> Dict[str, str]:
+    return {
+        "embeddings": os.path.join(index_dir, "embeddings.npy"),
+        "documents": os.path.join(index_dir, "documents.json"),
+        "meta": os.path.join(index_dir, "meta.json"),
+        "idf": os.path.join(index_dir, "idf.npy"),
+    }
+
+
+def _odata_filter(filters: Optional[Dict]) -> Optional[str]:
+    """Builds an OData filter such as "type eq 'product' and brand eq 'Aero'"."""
+    if not filters:
+        return None
+    clauses = []
+    for field, value in filters.items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Unsupported filter field: {field}")
+        escaped = str(value).replace("'", "''")
+        clauses.append(f"{field} eq '{escaped}'")
+    return " and ".join(clauses)
+
+
+def _tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"\w+", text.lower())
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _to_unit_matrix(embeddings: List[List[float]], expected: int) -> np.ndarray:
+    if len(embeddings) != expected:
+        raise RuntimeError(
+            f"Embedding request returned {len(embeddings)} vectors for {expected} texts"
+        )
+    return _normalize_rows(np.asarray(embeddings, dtype=np.float32))
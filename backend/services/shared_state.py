@@ -0,0 +1,324 @@
+import asyncio
+import fcntl
+import json
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Worker processes serving the app (startup.sh), "auto" for one per CPU
+WEB_CONCURRENCY = os.environ.get("WEB_CONCURRENCY", "1")
+WEB_CONCURRENCY = (
+    os.cpu_count() or 1 if WEB_CONCURRENCY == "auto" else int(WEB_CONCURRENCY)
+)
+# Share caches and graph state between the workers (on by default with >1 worker)
+SHARED_STATE_ENABLED = (
+    os.environ.get("SHARED_STATE_ENABLED", str(WEB_CONCURRENCY > 1)).lower() == "true"
+)
+# Directory of the shared state, tmpfs (memory) by default
+SHARED_STATE_DIR = os.environ.get(
+    "SHARED_STATE_DIR",
+    (
+        "/dev/shm/rag-chatbot"
+        if os.path.isdir("/dev/shm")
+        else os.path.join(tempfile.gettempdir(), "rag-chatbot")
+    ),
+)
+# Seconds between checks for graph writes and invalidations made by other workers
+SHARED_STATE_POLL_SECONDS = float(os.environ.get("SHARED_STATE_POLL_SECONDS", 0.5))
+
+# Seconds events are kept, long enough for every worker to have applied them
+EVENT_RETENTION_SECONDS = 3600
+# Pages of the database mapped into each worker instead of copied on read
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS answers (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires_at REAL NOT NULL,
+        stored_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS answer_entities (
+        entity TEXT NOT NULL,
+        key TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS answer_entities_entity ON answer_entities (entity);
+    CREATE TABLE IF NOT EXISTS blobs (
+        name TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        seq INTEGER NOT NULL,
+        stored_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        client TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        full_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        origin INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+"""
+
+
+class SharedState:
+    """
+    State shared by the worker processes of one instance: a SQLite database
+    (WAL, memory-mapped) under SHARED_STATE_DIR that every worker opens.
+    - A second answer cache tier, so an answer generated by one worker is an
+      exact hit in all of them.
+    - Named blobs, e.g. the graph snapshot loaded once per instance.
+    - Per-client rate limit buckets, so a client gets the configured rate
+      whichever worker serves it.
+    - An event log replaying the graph writes and cache invalidations made by
+      one worker in the others (see follow_forever).
+    Operations are single indexed statements on tmpfs and run inline.
+    """
+
+    def __init__(self, directory: str = SHARED_STATE_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, "state.db")
+        self._conn: Optional[sqlite3.Connection] = None
+        # One connection per worker, also used from the threadpool (graph edits)
+        self._lock = threading.Lock()
+        # Last event applied by this worker
+        self._cursor = 0
+        self._handlers: Dict[str, Callable[[Dict], None]] = {}
+        self._stats = {"published": 0, "applied": 0}
+
+    # ************* Answers *************
+
+    def get_answer(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Returns (value, seconds to live) of a live answer, or None."""
+        rows = self._execute(
+            "SELECT value, expires_at FROM answers WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        )
+        if not rows:
+            return None
+        value, expires_at = rows[0]
+        return pickle.loads(value), expires_at - time.time()
+
+    def put_answer(
+        self,
+        key: str,
+        value: Any,
+        entities: Iterable[str],
+        ttl_seconds: float,
+        max_entries: int,
+    ):
+        """Stores an answer tagged with entities, evicting the oldest beyond max_entries."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("DELETE FROM answer_entities WHERE key = ?", (key,))
+            db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl_seconds, now),
+            )
+            db.executemany(
+                "INSERT INTO answer_entities VALUES (?, ?)",
+                [(entity, key) for entity in entities],
+            )
+            stale = db.execute(
+                "SELECT key FROM answers WHERE expires_at <= ?", (now,)
+            ).fetchall()
+            stale += db.execute(
+                "SELECT key FROM answers ORDER BY stored_at DESC LIMIT -1 OFFSET ?",
+                (max_entries,),
+            ).fetchall()
+            self._delete_answers(db, list({k for (k,) in stale}))
+
+    def delete_answers(self, entities: Iterable[str]) -> int:
+        """Removes the answers tagged with any of the entities."""
+        entities = list(entities)
+        if not entities:
+            return 0
+        placeholders = ",".join("?" * len(entities))
+        with self._transaction() as db:
+            keys = db.execute(
+                "SELECT DISTINCT key FROM answer_entities "
+                f"WHERE entity IN ({placeholders})",
+                entities,
+            ).fetchall()
+            return self._delete_answers(db, [k for (k,) in keys])
+
+    @staticmethod
+    def _delete_answers(db: sqlite3.Connection, keys: List[str]) -> int:
+        db.executemany("DELETE FROM answers WHERE key = ?", [(k,) for k in keys])
+        db.executemany(
+            "DELETE FROM answer_entities WHERE key = ?", [(k,) for k in keys]
+        )
+        return len(keys)
+
+    # ************* Blobs *************
+
+    def put_blob(self, name: str, value: Any, seq: int):
+        """Stores a blob as of event `seq` (later events are not included in it)."""
+        self._execute(
+            "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)",
+            (name, pickle.dumps(value), seq, time.time()),
+        )
+
+    def get_blob(self, name: str) -> Optional[Tuple[Any, int, float]]:
+        """Returns (value, seq, age in seconds) of a blob, or None."""
+        rows = self._execute(
+            "SELECT value, seq, stored_at FROM blobs WHERE name = ?", (name,)
+        )
+        if not rows:
+            return None
+        value, seq, stored_at = rows[0]
+        return pickle.loads(value), seq, time.time() - stored_at
+
+    # ************* Rate limits *************
+
+    def take_token(self, client: str, rate: float, burst: int) -> float:
+        """
+        Token bucket shared by all workers: refills the client's bucket at
+        `rate` tokens per second (up to `burst`) and takes one token if there
+        is one. Returns the tokens available before taking.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT tokens, updated_at FROM rate_limits WHERE client = ?",
+                (client,),
+            ).fetchone()
+            tokens, last = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - last) * rate)
+            left = tokens - 1 if tokens >= 1 else tokens
+            db.execute(
+                "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)",
+                (client, left, now, now + (burst - left) / rate),
+            )
+        return tokens
+
+    @asynccontextmanager
+    async def lock(self, name: str):
+        """Cross-process lock, e.g. so only one worker loads the graph snapshot."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{name}.lock"), "w") as f:
+            await asyncio.to_thread(fcntl.flock, f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # ************* Events *************
+
+    def on(self, kind: str, handler: Callable[[Dict], None]):
+        """Registers the handler applying events of this kind from other workers."""
+        self._handlers[kind] = handler
+
+    def publish(self, kind: str, payload: Dict):
+        self._execute(
+            "INSERT INTO events (origin, kind, payload, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (os.getpid(), kind, json.dumps(payload), time.time()),
+        )
+        self._stats["published"] += 1
+
+    def last_seq(self) -> int:
+        rows = self._execute("SELECT MAX(seq) FROM events")
+        return rows[0][0] or 0
+
+    def rewind(self, seq: int):
+        """Replays events after `seq` on the next poll (state restored from a blob)."""
+        self._db()
+        self._cursor = min(self._cursor, seq)
+
+    def poll(self) -> int:
+        """Applies the events published by other workers since the last poll."""
+        rows = self._execute(
+            "SELECT seq, origin, kind, payload FROM events WHERE seq > ? ORDER BY seq",
+            (self._cursor,),
+        )
+        applied = 0
+        for seq, origin, kind, payload in rows:
+            self._cursor = seq
+            handler = self._handlers.get(kind)
+            if origin == os.getpid() or handler is None:
+                continue
+            try:
+                handler(json.loads(payload))
+                applied += 1
+            except Exception as e:
+                print(f"Shared state: failed to apply {kind} event {seq}: {e}")
+        self._stats["applied"] += applied
+        return applied
+
+    async def follow_forever(self, interval: float = SHARED_STATE_POLL_SECONDS):
+        """Applies other workers' events every `interval` seconds, pruning old ones."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.poll()
+                self._execute(
+                    "DELETE FROM events WHERE created_at < ?",
+                    (time.time() - EVENT_RETENTION_SECONDS,),
+                )
+                # Full buckets are the same as no bucket
+                self._execute(
+                    "DELETE FROM rate_limits WHERE full_at < ?", (time.time(),)
+                )
+            except Exception as e:
+                print(f"Shared state: polling failed: {e}")
+
+    def stats(self) -> Dict:
+        answers = self._execute("SELECT COUNT(*) FROM answers")[0][0]
+        return {
+            **self._stats,
+            "path": self.path,
+            "pid": os.getpid(),
+            "answers": answers,
+            "cursor": self._cursor,
+        }
+
+    # ************* Connection *************
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            # Events published before this worker started are already reflected
+            # in what it loads at startup
+            self._cursor = (
+                conn.execute("SELECT MAX(seq) FROM events").fetchone()[0] or 0
+            )
+        return self._conn
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        with self._lock:
+            return self._db().execute(sql, tuple(params)).fetchall()
+
+    @contextmanager
+    def _transaction(self):
+        """Multi-statement write transaction."""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+
+# Shared instance, None when a single worker serves the app
+shared_state = SharedState() if SHARED_STATE_ENABLED else None
@@ -0,0 +1,166 @@
+import asyncio
+import os
+from contextlib import nullcontext
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from prometheus_client import Counter
+
+from backend.services.query_embeddings import normalize_question
+from backend.services.tracing import span
+
+# Share one pipeline run between concurrent requests with the same question
+SINGLE_FLIGHT_ENABLED = (
+    os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+)
+
+COALESCED_REQUESTS = Counter(
+    "rag_coalesced_requests_total",
+    "Chat requests served by another request's in-flight pipeline run",
+    ["namespace", "mode"],
+)
+
+
+class _StreamFlight:
+    """
+    One in-flight answer stream. Events are kept so subscribers joining late
+    replay what they missed, then follow the live events.
+    """
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    async def run(self, events: AsyncIterator[Dict]):
+        try:
+            async for event in events:
+                self.events.append(event)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.finished = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[Dict]:
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.finished:
+                if self.error:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+    The first caller starts the work in its own task; callers arriving while it
+    runs wait for the same result (or exception) instead of starting another.
+    A caller that disconnects does not cancel the work for the others.
+    Keys are forgotten as soon as the work finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Dict]]) -> Dict:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._forget(self._calls, key, f))
+            self._stats["executions"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        # Shield the shared task from the cancellation of any single caller
+        return await asyncio.shield(future)
+
+    def stream(
+        self, key: str, fn: Callable[[], AsyncIterator[Dict]]
+    ) -> AsyncIterator[Dict]:
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            task = asyncio.ensure_future(flight.run(fn()))
+            task.add_done_callback(lambda t: self._forget(self._streams, key, flight))
+            self._stats["executions"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        return flight.subscribe()
+
+    def is_running(self, key: str) -> bool:
+        return key in self._calls
+
+    def is_streaming(self, key: str) -> bool:
+        return key in self._streams
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
+
+    @staticmethod
+    def _forget(flights: Dict, key: str, flight):
+        if flights.get(key) is flight:
+            del flights[key]
+        # Mark the exception as retrieved if every waiter went away
+        if isinstance(flight, asyncio.Future) and not flight.cancelled():
+            flight.exception()
+
+
+class CoalescedRAGService:
+    """
+    Wraps a RAG service (or CachedRAGService) so concurrent requests with the
+    same normalized question share one pipeline run and one LLM completion.
+    Exposes the same async entry points as BaseRAGService.
+    """
+
+    def __init__(self, service, flights: SingleFlight, namespace: str):
+        self.service = service
+        self.flights = flights
+        self.namespace = namespace
+
+    async def answer_question_async(self, question: str) -> Dict:
+        key = self._key(question)
+        coalesced = self.flights.is_running(key)
+        if coalesced:
+            COALESCED_REQUESTS.labels(namespace=self.namespace, mode="answer").inc()
+
+        with span("coalesced") if coalesced else nullcontext():
+            result = await self.flights.do(
+                key, lambda: self.service.answer_question_async(question)
+            )
+        # Callers share the result, give each its own dict
+        return dict(result)
+
+    async def stream_answer_async(self, question: str) -> AsyncIterator[Dict]:
+        key = self._key(question)
+        if self.flights.is_streaming(key):
+            COALESCED_REQUESTS.labels(namespace=self.namespace, mode="stream").inc()
+        events = self.flights.stream(
+            key, lambda: self.service.stream_answer_async(question)
+        )
+        async for event in events:
+            yield event
+
+    def _key(self, question: str) -> str:
+        return f"{self.namespace}:{normalize_question(question)}"
+
+
+# Shared instance used by the chat endpoints
+single_flight = SingleFlight()
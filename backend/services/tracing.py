@@ -0,0 +1,159 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+
+# Export stage spans as OpenTelemetry spans as well (needs opentelemetry-api,
+# plus an SDK/exporter configured e.g. through `opentelemetry-instrument`)
+OTEL_TRACING_ENABLED = os.environ.get("OTEL_TRACING_ENABLED", "false").lower() == "true"
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+_tracer = (
+    otel_trace.get_tracer("nestle-chatbot")
+    if OTEL_TRACING_ENABLED and otel_trace
+    else None
+)
+
+# Set (by startup.sh) when several workers serve the app: each writes its
+# metrics there and /metrics reports the sum over all workers
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Latency buckets (seconds) from cache hits to slow LLM completions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+
+STAGE_DURATION = Histogram(
+    "rag_stage_duration_seconds",
+    "Duration of a RAG pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+CHAT_REQUESTS = Counter(
+    "rag_chat_requests_total", "Chat requests by outcome", ["endpoint", "outcome"]
+)
+RETRIEVED_DOCS = Histogram(
+    "rag_retrieved_docs",
+    "Source documents returned per chat answer",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+PROMPT_TOKENS = Histogram(
+    "rag_prompt_tokens",
+    "Prompt tokens sent to the chat model per answer",
+    ["endpoint"],
+    buckets=(0, 250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000),
+)
+
+# Stage spans of the current request: [(stage, seconds)], shared with child tasks
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = (
+    contextvars.ContextVar("request_spans", default=None)
+)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times a pipeline stage: observed in the stage histogram, added to the
+    request's Server-Timing header and, if enabled, exported as an OTel span.
+    Works around sync and async code (`with span("search"): await ...`).
+    """
+    otel_span = _tracer.start_as_current_span(stage) if _tracer else None
+    if otel_span:
+        otel_span.__enter__()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - start)
+        if otel_span:
+            otel_span.__exit__(None, None, None)
+
+
+def record_span(stage: str, seconds: float):
+    """Records an already measured stage duration (e.g. across stream chunks)."""
+    STAGE_DURATION.labels(stage=stage).observe(seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def record_chat_result(endpoint: str, result: Dict):
+    """Counts a chat answer (empty or not) with its source count and prompt size."""
+    answer = (result.get("answer") or "").strip()
+    CHAT_REQUESTS.labels(endpoint=endpoint, outcome="ok" if answer else "empty").inc()
+    RETRIEVED_DOCS.labels(endpoint=endpoint).observe(len(result.get("sources") or []))
+    if result.get("prompt_tokens") is not None:
+        PROMPT_TOKENS.labels(endpoint=endpoint).observe(result["prompt_tokens"])
+
+
+def record_chat_error(endpoint: str):
+    CHAT_REQUESTS.labels(endpoint=endpoint, outcome="error").inc()
+
+
+def record_chat_rejected(endpoint: str):
+    CHAT_REQUESTS.labels(endpoint=endpoint, outcome="rejected").inc()
+
+
+async def server_timing_middleware(request: Request, call_next):
+    """
+    Collects the stage spans of each request into a Server-Timing header
+    (durations summed per stage, plus the total) and records the request
+    duration by route. Streaming responses only carry the spans finished
+    before their headers are sent.
+    """
+    spans: List[Tuple[str, float]] = []
+    token = _request_spans.set(spans)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _request_spans.reset(token)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    REQUEST_DURATION.labels(
+        method=request.method,
+        route=getattr(route, "path", "other"),
+        status=response.status_code,
+    ).observe(elapsed)
+
+    response.headers["Server-Timing"] = format_server_timing(spans, elapsed)
+    return response
+
+
+def format_server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    durations: Dict[str, float] = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{stage};dur={s * 1000:.1f}" for stage, s in durations.items())
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition of the metrics above (of all workers)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,47 +1,80 @@
-from typing import List
-from common.azure_clients import search_client, get_chat_completion
+import os
+from typing import Dict, List, Optional, Set
 from backend.models.response_models import Source
 from backend.services.base_rag_service import BaseRAGService
+from backend.services.context_packer import pack_context
+from backend.services.retrievers import BaseRetriever, get_retriever
+from backend.services.tracing import span
+
+# Chunks retrieved per requested document (several chunks may share a parent)
+CHUNK_CANDIDATES_PER_DOC = int(os.environ.get("CHUNK_CANDIDATES_PER_DOC", 3))
+# Max passages of one document kept in the context
+MAX_CHUNKS_PER_DOC = int(os.environ.get("MAX_CHUNKS_PER_DOC", 3))
 
 
 class VectorRAGService(BaseRAGService):
-    def __init__(self, top_k: int = 5):
+    def __init__(self, top_k: int = 5, retriever: Optional[BaseRetriever] = None):
         super().__init__(top_k=top_k)
+        # Retrieval backend selected by VECTOR_BACKEND unless given explicitly
+        self.retriever = retriever or get_retriever()
 
     def answer_question(self, question: str) -> dict:
         """
         Main entry point for answering a user question using RAG.
         1. Retrieve relevant documents.
-        2. Build the context string with reference numbers.
+        2. Pack the documents into the context token budget, with reference numbers.
         3. Generate an answer using the LLM.
-        4. Prepare the sources for the frontend.
+        4. Prepare the sources (the packed documents) for the frontend.
         """
         docs = self.search_documents(question)
-        context = self.build_context(docs)
-        answer = self.get_answer(question, context)
-        sources = self.prepare_sources(docs)
+        packed = pack_context(docs)
+        answer = self.get_answer(question, packed.context)
+        sources = self.prepare_sources(packed.docs)
 
         return {
             "answer": answer,
             "sources": sources,
         }
 
-    def search_documents(self, question: str) -> List[dict]:
+    async def retrieve_async(self, question: str) -> Dict:
         """
-        Uses the search client to retrieve top_k relevant documents for the question.
+        Retrieves relevant documents and returns the numbered context (packed
+        into the token budget), sources and the entities (brands/titles) the
+        packed documents refer to.
         """
-        results = search_client.search(search_text=question, top=self.top_k)
-        return [doc for doc in results]
+        docs = await self.search_documents_async(question)
+        packed = pack_context(docs)
+        return {
+            "context": packed.context,
+            "sources": self.prepare_sources(packed.docs),
+            "entities": self.extract_entities(packed.docs),
+        }
+
+    def search_documents(
+        self, question: str, filters: Optional[Dict] = None
+    ) -> List[dict]:
+        """
+        Uses the retriever to get top_k relevant documents for the question,
+        optionally filtered on metadata (e.g. {"type": "product"}).
+        The index holds chunks, so more chunks are retrieved and grouped by parent.
+        """
+        with span("search"):
+            chunks = self.retriever.search(
+                question, self.top_k * CHUNK_CANDIDATES_PER_DOC, filters
+            )
+        return group_chunks(chunks, self.top_k)
 
-    def build_context(self, docs: List[dict]) -> str:
+    async def search_documents_async(
+        self, question: str, filters: Optional[Dict] = None
+    ) -> List[dict]:
         """
-        Builds the context string for the LLM, numbering each document as [1], [2], etc.
+        Async version of search_documents.
         """
-        return f"\n\n".join(
-            f"[{i+1}] {doc['content']}"
-            for i, doc in enumerate(docs)
-            if doc.get("content")
-        )
+        with span("search"):
+            chunks = await self.retriever.search_async(
+                question, self.top_k * CHUNK_CANDIDATES_PER_DOC, filters
+            )
+        return group_chunks(chunks, self.top_k)
 
     def prepare_sources(self, docs: List[dict]) -> List[Source]:
         """
@@ -56,3 +89,52 @@ class VectorRAGService(BaseRAGService):
             )
             for doc in docs
         ]
+
+    def extract_entities(self, docs: List[dict]) -> Set[str]:
+        """
+        Collects the brand and title names referenced by the documents.
+        Used to invalidate cached answers when the graph changes.
+        """
+        entities = set()
+        for doc in docs:
+            for key in ("brand", "title", "name"):
+                if doc.get(key):
+                    entities.add(doc[key])
+        return entities
+
+
+def group_chunks(
+    chunks: List[dict], top_k: int, max_chunks: int = MAX_CHUNKS_PER_DOC
+) -> List[dict]:
+    """
+    Groups retrieved chunks by parent document, ranked by their best chunk.
+    Each group becomes one document (one citation) whose content is its
+    best passages in document order; unchunked documents pass through.
+    """
+    groups: Dict[str, List[dict]] = {}
+    for chunk in chunks:
+        parent = chunk.get("parent_id") or chunk.get("id")
+        if parent not in groups and len(groups) == top_k:
+            continue
+        group = groups.setdefault(parent, [])
+        if len(group) < max_chunks:
+            group.append(chunk)
+
+    docs = []
+    for parent, group in groups.items():
+        group.sort(key=lambda c: c.get("chunk_index") or 0)
+        content = ""
+        for i, chunk in enumerate(group):
+            passage = chunk.get("content") or ""
+            if i > 0:
+                # Later chunks start with "<title> (continued)", drop it once merged
+                if chunk.get("title"):
+                    passage = passage.removeprefix(f"{chunk['title']} (continued)\n")
+                adjacent = (
+                    chunk.get("chunk_index")
+                    == (group[i - 1].get("chunk_index") or 0) + 1
+                )
+                content += "\n" if adjacent else "\n…\n"
+            content += passage
+        docs.append({**group[0], "id": parent, "content": content})
+    return docs
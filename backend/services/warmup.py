@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict
+
+from common.tokens import get_tokenizer
+from common.azure_clients import (
+    CHAT_ENDPOINT,
+    EMBEDDING_ENDPOINT,
+    get_async_openai_chat_client,
+    get_async_openai_embedding_client,
+    get_async_search_client,
+)
+from common.http_pool import preconnect_async
+from common.neo4j_client import get_async_neo4j_driver
+
+# Startup warm-up: "blocking" (ready once warm), "background" (ready at once,
+# warm-up runs alongside the first requests) or "off" (everything on first use)
+WARMUP_MODE = os.environ.get("WARMUP_MODE", "blocking").lower()
+# Optional question retrieved once at startup (search, embedding, graph; no LLM)
+WARMUP_QUESTION = os.environ.get("WARMUP_QUESTION", "")
+# Max seconds spent warming up, remaining steps are left to the first requests
+WARMUP_TIMEOUT_SECONDS = float(os.environ.get("WARMUP_TIMEOUT_SECONDS", 15))
+
+
+async def warm_up(get_services: Callable[[], Awaitable[Dict]]) -> Dict[str, float]:
+    """
+    Builds the RAG services and clients and opens the Azure Search, Azure
+    OpenAI and Neo4j connections ahead of the first request, then optionally runs
+    WARMUP_QUESTION through retrieval. A failed step is logged and skipped.
+    Returns the duration of each step in seconds.
+    """
+    timings: Dict[str, float] = {}
+
+    async def step(name: str, action):
+        start = time.perf_counter()
+        try:
+            await action()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {type(e).__name__}: {e}")
+        timings[name] = time.perf_counter() - start
+
+    async def import_sdks():
+        # Slow imports, done in a thread so background warm-up does not block
+        # requests; the client factories then only construct the clients
+        def load():
+            import azure.search.documents.aio  # noqa: F401
+            import neo4j  # noqa: F401
+            import openai  # noqa: F401
+
+        await asyncio.to_thread(load)
+
+    async def build_services():
+        # Loads indexes, entity matcher and reranker embeddings (CPU bound, in
+        # a thread); requests arriving meanwhile wait for the same build
+        await get_services()
+
+    async def load_tokenizer():
+        await asyncio.to_thread(get_tokenizer)
+
+    async def connect_search():
+        await get_async_search_client().get_document_count()
+
+    async def connect_neo4j():
+        await get_async_neo4j_driver().verify_connectivity()
+
+    async def connect_openai():
+        get_async_openai_embedding_client()
+        get_async_openai_chat_client()
+        await preconnect_async([EMBEDDING_ENDPOINT, CHAT_ENDPOINT])
+
+    async def first_question():
+        service = (await get_services())["hybrid"]
+        # Through the cache/coalescing wrappers to the pipeline's retrieval
+        while not hasattr(service, "retrieve_async"):
+            service = service.service
+        await service.retrieve_async(WARMUP_QUESTION)
+
+    async def connect():
+        await step("sdks", import_sdks)
+        await asyncio.gather(
+            step("search", connect_search),
+            step("neo4j", connect_neo4j),
+            step("openai", connect_openai),
+        )
+
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                step("services", build_services),
+                step("tokenizer", load_tokenizer),
+                connect(),
+            ),
+            WARMUP_TIMEOUT_SECONDS,
+        )
+        if WARMUP_QUESTION:
+            remaining = WARMUP_TIMEOUT_SECONDS - (time.perf_counter() - start)
+            await asyncio.wait_for(step("question", first_question), remaining)
+    except asyncio.TimeoutError:
+        print(f"Warm-up stopped after {WARMUP_TIMEOUT_SECONDS}s")
+
+    timings["total"] = time.perf_counter() - start
+    print("Warm-up: " + ", ".join(f"{name} {s:.2f}s" for name, s in timings.items()))
+    return timings
@@ -1,10 +1,25 @@
+import asyncio
 import os
+import threading
+import traceback
+
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
 
-import traceback
+from common.http_pool import (
+    close_async_pools,
+    get_openai_async_http_client,
+    get_openai_http_client,
+    get_search_async_transport,
+    get_search_transport,
+)
+from common.resilience import (
+    CHAT_TIMEOUT_SECONDS,
+    EMBEDDING_TIMEOUT_SECONDS,
+    UpstreamError,
+    UpstreamTimeout,
+    call_azure,
+    remaining_time,
+)
 
 # Load environment variables
 load_dotenv()
@@ -28,33 +43,126 @@ SEARCH_KEY = os.environ.get("AZURE_SEARCH_API_KEY")
 SEARCH_INDEX = os.environ.get("AZURE_SEARCH_INDEX")
 
 
-# Init Azure AI Search client
-search_client = SearchClient(
-    endpoint=SEARCH_ENDPOINT,
-    index_name=SEARCH_INDEX,
-    credential=AzureKeyCredential(SEARCH_KEY),
-)
+# Clients are created on first use (the SDK imports and TLS setup are slow,
+# and scripts that only need the settings should not need every secret).
+# Tests and the offline load test may assign stand-ins to these names.
+# Clients of a kind share one tuned connection pool (common.http_pool), so
+# concurrent requests reuse keep-alive connections instead of paying new TLS
+# handshakes, and chat and embedding requests multiplex over HTTP/2.
+search_client = None
+openai_embedding_client = None
+openai_chat_client = None
+# Async counterparts used by the FastAPI request path
+async_search_client = None
+async_openai_embedding_client = None
+async_openai_chat_client = None
 
-# Init Azure OpenAI client for embeddings
-openai_embedding_client = AzureOpenAI(
-    azure_endpoint=EMBEDDING_ENDPOINT,
-    api_key=EMBEDDING_KEY,
-    api_version=EMBEDDING_API_VERSION,
-)
+# Sync clients may be first used from several threadpool threads at once
+_clients_lock = threading.Lock()
+
+
+# Azure AI Search client
+def get_search_client():
+    global search_client
+    with _clients_lock:
+        if search_client is None:
+            from azure.core.credentials import AzureKeyCredential
+            from azure.search.documents import SearchClient
+
+            search_client = SearchClient(
+                endpoint=SEARCH_ENDPOINT,
+                index_name=SEARCH_INDEX,
+                credential=AzureKeyCredential(SEARCH_KEY),
+                transport=get_search_transport(),
+            )
+    return search_client
+
+
+# Azure OpenAI client for embeddings
+def get_openai_embedding_client():
+    global openai_embedding_client
+    with _clients_lock:
+        if openai_embedding_client is None:
+            from openai import AzureOpenAI
+
+            openai_embedding_client = AzureOpenAI(
+                azure_endpoint=EMBEDDING_ENDPOINT,
+                api_key=EMBEDDING_KEY,
+                api_version=EMBEDDING_API_VERSION,
+                http_client=get_openai_http_client(),
+            )
+    return openai_embedding_client
+
+
+# Azure OpenAI client for chat completions
+def get_openai_chat_client():
+    global openai_chat_client
+    with _clients_lock:
+        if openai_chat_client is None:
+            from openai import AzureOpenAI
+
+            openai_chat_client = AzureOpenAI(
+                azure_endpoint=CHAT_ENDPOINT,
+                api_key=CHAT_KEY,
+                api_version=CHAT_API_VERSION,
+                http_client=get_openai_http_client(),
+            )
+    return openai_chat_client
+
+
+# Async Azure AI Search client. Timeouts and retries of the async clients are
+# handled by common.resilience, so the SDKs' own retry loops are disabled.
+def get_async_search_client():
+    global async_search_client
+    if async_search_client is None:
+        from azure.core.credentials import AzureKeyCredential
+        from azure.search.documents.aio import SearchClient as AsyncSearchClient
+
+        async_search_client = AsyncSearchClient(
+            endpoint=SEARCH_ENDPOINT,
+            index_name=SEARCH_INDEX,
+            credential=AzureKeyCredential(SEARCH_KEY),
+            retry_total=0,
+            transport=get_search_async_transport(),
+        )
+    return async_search_client
+
+
+def get_async_openai_embedding_client():
+    global async_openai_embedding_client
+    if async_openai_embedding_client is None:
+        from openai import AsyncAzureOpenAI
+
+        async_openai_embedding_client = AsyncAzureOpenAI(
+            azure_endpoint=EMBEDDING_ENDPOINT,
+            api_key=EMBEDDING_KEY,
+            api_version=EMBEDDING_API_VERSION,
+            max_retries=0,
+            http_client=get_openai_async_http_client(),
+        )
+    return async_openai_embedding_client
 
-# Init Azure OpenAI client for chat completions
-openai_chat_client = AzureOpenAI(
-    azure_endpoint=CHAT_ENDPOINT,
-    api_key=CHAT_KEY,
-    api_version=CHAT_API_VERSION,
-)
+
+def get_async_openai_chat_client():
+    global async_openai_chat_client
+    if async_openai_chat_client is None:
+        from openai import AsyncAzureOpenAI
+
+        async_openai_chat_client = AsyncAzureOpenAI(
+            azure_endpoint=CHAT_ENDPOINT,
+            api_key=CHAT_KEY,
+            api_version=CHAT_API_VERSION,
+            max_retries=0,
+            http_client=get_openai_async_http_client(),
+        )
+    return async_openai_chat_client
 
 
 # Generate embeddings for a list of texts using Azure OpenAI
 def generate_embeddings(texts):
     try:
-        response = openai_embedding_client.embeddings.create(
-            model=EMBEDDING_MODEL, input=texts
+        response = get_openai_embedding_client().embeddings.create(
+            model=EMBEDDING_MODEL, input=texts, timeout=EMBEDDING_TIMEOUT_SECONDS
         )
         return [r.embedding for r in response.data]
     except Exception as e:
@@ -65,12 +173,13 @@ def generate_embeddings(texts):
 # Get chat completion from Azure OpenAI given a list of messages
 def get_chat_completion(messages, top_p=1.0):
     try:
-        response = openai_chat_client.chat.completions.create(
+        response = get_openai_chat_client().chat.completions.create(
             messages=messages,
             temperature=CHAT_TEMPERATURE,
             max_tokens=CHAT_MAX_TOKENS,
             top_p=top_p,
             model=CHAT_MODEL,
+            timeout=CHAT_TIMEOUT_SECONDS,
         )
 
         # Return the generated message content
@@ -81,3 +190,87 @@ def get_chat_completion(messages, top_p=1.0):
         print(f"Error getting chat completion: {e}")
         traceback.print_exc()
         return ""
+
+
+# Async version of generate_embeddings, with timeouts, retries and hedging.
+# Raises UpstreamError instead of returning [] on failure.
+async def generate_embeddings_async(texts):
+    response = await call_azure(
+        "embedding",
+        lambda: get_async_openai_embedding_client().embeddings.create(
+            model=EMBEDDING_MODEL, input=texts
+        ),
+        timeout=EMBEDDING_TIMEOUT_SECONDS,
+        hedge=True,
+    )
+    return [r.embedding for r in response.data]
+
+
+# Async version of get_chat_completion, with timeouts and retries.
+# Raises UpstreamError instead of returning "" on failure.
+async def get_chat_completion_async(messages, top_p=1.0):
+    response = await call_azure(
+        "chat",
+        lambda: get_async_openai_chat_client().chat.completions.create(
+            messages=messages,
+            temperature=CHAT_TEMPERATURE,
+            max_tokens=CHAT_MAX_TOKENS,
+            top_p=top_p,
+            model=CHAT_MODEL,
+        ),
+        timeout=CHAT_TIMEOUT_SECONDS,
+    )
+    return response.choices[0].message.content or ""
+
+
+# Stream chat completion tokens from Azure OpenAI as they are generated.
+# The request is retried until the stream opens; after that a stalled or
+# broken stream raises UpstreamTimeout / UpstreamError.
+async def stream_chat_completion_async(messages, top_p=1.0):
+    response = await call_azure(
+        "chat",
+        lambda: get_async_openai_chat_client().chat.completions.create(
+            messages=messages,
+            temperature=CHAT_TEMPERATURE,
+            max_tokens=CHAT_MAX_TOKENS,
+            top_p=top_p,
+            model=CHAT_MODEL,
+            stream=True,
+        ),
+        timeout=CHAT_TIMEOUT_SECONDS,
+    )
+
+    chunks = response.__aiter__()
+    while True:
+        timeout = min(CHAT_TIMEOUT_SECONDS, remaining_time(CHAT_TIMEOUT_SECONDS))
+        try:
+            chunk = await asyncio.wait_for(chunks.__anext__(), max(timeout, 0))
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise UpstreamTimeout("chat", "stream stalled")
+        except Exception as e:
+            print(f"Error streaming chat completion: {e}")
+            traceback.print_exc()
+            raise UpstreamError("chat", f"{type(e).__name__}: {e}") from e
+
+        # Azure may send chunks without choices (e.g. content filter results)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+# Close the async clients that were created and their shared connection pools
+# (called on application shutdown)
+async def close_async_clients():
+    global async_search_client, async_openai_embedding_client, async_openai_chat_client
+    for client in (
+        async_search_client,
+        async_openai_embedding_client,
+        async_openai_chat_client,
+    ):
+        if client is not None:
+            await client.close()
+    async_search_client = None
+    async_openai_embedding_client = None
+    async_openai_chat_client = None
+    await close_async_pools()
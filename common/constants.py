@@ -6,9 +6,9 @@ SITEMAP_URL = urljoin(BASE_URL, "/sitemap")
 
 # Raw data paths
 RAW_DIR = "scraper/raw_data"
-PRODUCTS_PATH = f"{RAW_DIR}/products.json"
-RECIPES_PATH = f"{RAW_DIR}/recipes.json"
-ARTICLES_PATH = f"{RAW_DIR}/articles.json"
+PRODUCTS_PATH = f"{RAW_DIR}/products.jsonl"
+RECIPES_PATH = f"{RAW_DIR}/recipes.jsonl"
+ARTICLES_PATH = f"{RAW_DIR}/articles.jsonl"
 ABOUT_PATH = f"{RAW_DIR}/about.json"
 
 SITEMAP_LINKS_PATH = f"{RAW_DIR}/links/sitemap_links.json"
@@ -17,14 +17,28 @@ BROKEN_LINKS_PATH = f"{RAW_DIR}/links/broken_links.json"
 
 # Processed data for Vector DB
 PROCESSED_DIR = "processed_data"
-GRAPH_PROCESSED_DIR = f"{PROCESSED_DIR}/vector"
-PROCESSED_PRODUCTS_PATH = f"{PROCESSED_DIR}/products_vector.json"
-PROCESSED_RECIPES_PATH = f"{PROCESSED_DIR}/recipes_vector.json"
-PROCESSED_ARTICLES_PATH = f"{PROCESSED_DIR}/articles_vector.json"
+VECTOR_PROCESSED_DIR = f"{PROCESSED_DIR}/vector"
+PROCESSED_PRODUCTS_PATH = f"{VECTOR_PROCESSED_DIR}/products_vector.jsonl"
+PROCESSED_RECIPES_PATH = f"{VECTOR_PROCESSED_DIR}/recipes_vector.jsonl"
+PROCESSED_ARTICLES_PATH = f"{VECTOR_PROCESSED_DIR}/articles_vector.jsonl"
+PROCESSED_VECTOR_PATHS = [
+    PROCESSED_PRODUCTS_PATH,
+    PROCESSED_RECIPES_PATH,
+    PROCESSED_ARTICLES_PATH,
+]
+
+# Manifest of documents uploaded to Azure AI Search (incremental sync)
+INDEX_MANIFEST_PATH = f"{VECTOR_PROCESSED_DIR}/index_manifest.json"
+
+# Local vector index (in-process retriever backend)
+LOCAL_INDEX_DIR = f"{VECTOR_PROCESSED_DIR}/local_index"
 
 
 # Processed data for graph DB
 GRAPH_PROCESSED_DIR = f"{PROCESSED_DIR}/graph"
-GRAPH_PRODUCTS_PATH = f"{GRAPH_PROCESSED_DIR}/products_graph.json"
-GRAPH_BRANDS_PATH = f"{GRAPH_PROCESSED_DIR}/brands_graph.json"
-GRAPH_EDGES_PATH = f"{GRAPH_PROCESSED_DIR}/edges_graph.json"
+GRAPH_PRODUCTS_PATH = f"{GRAPH_PROCESSED_DIR}/products_graph.jsonl"
+GRAPH_BRANDS_PATH = f"{GRAPH_PROCESSED_DIR}/brands_graph.jsonl"
+GRAPH_EDGES_PATH = f"{GRAPH_PROCESSED_DIR}/edges_graph.jsonl"
+
+# Precomputed product embeddings for graph reranking
+PRODUCT_EMBEDDINGS_DIR = f"{GRAPH_PROCESSED_DIR}/product_embeddings"
@@ -0,0 +1,291 @@
+import os
+import threading
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Max open connections per pool (per worker); requests beyond it wait for one
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 100))
+# Idle connections kept open for reuse
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+)
+# Seconds an idle connection stays open (Azure closes idle connections after ~4 min)
+HTTP_KEEPALIVE_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_SECONDS", 60))
+# Multiplex Azure OpenAI requests over HTTP/2 (Azure Search only speaks HTTP/1.1
+# through azure-core's transports)
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "true").lower() == "true"
+# Seconds to open a connection (TCP + TLS)
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", 5))
+# Set by startup.sh with several workers: metrics are read from shared files
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+# Seconds between updates of the pool gauges in multiprocess mode
+HTTP_POOL_METRICS_INTERVAL_SECONDS = float(
+    os.environ.get("HTTP_POOL_METRICS_INTERVAL_SECONDS", 5)
+)
+
+HTTP_REQUESTS = Counter(
+    "http_client_requests_total", "Requests sent to Azure, per pool", ["pool"]
+)
+HTTP_CONNECTIONS_CREATED = Counter(
+    "http_client_connections_created_total",
+    "Connections opened (TCP + TLS handshake), per pool; "
+    "1 - created / requests is the connection reuse ratio",
+    ["pool"],
+)
+HTTP_POOL_CONNECTIONS = Gauge(
+    "http_client_pool_connections",
+    "Open connections per pool, busy (serving a request) or idle",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+HTTP_POOL_WAIT = Histogram(
+    "http_client_pool_wait_seconds",
+    "Time a request waited for a free connection (pool exhausted)",
+    ["pool"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+# Pools shared by every client of the same kind, created on first use.
+# Azure OpenAI chat and embedding clients share one httpx pool (sync and async),
+# the Search clients share an azure-core transport. The offline load test may
+# assign stand-ins to these names.
+openai_http_client = None
+openai_async_http_client = None
+search_transport = None
+search_async_transport = None
+_search_async_session = None
+
+_pools_lock = threading.Lock()
+# pool -> (busy, idle) connection counters, see _watch_pool
+_pool_counters = {}
+_pool_counters_lock = threading.Lock()
+
+
+# HTTP/2 needs the h2 package; without it httpx would fail on first use
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+
+        return True
+    except ImportError:
+        print("HTTP2_ENABLED is set but h2 is not installed, using HTTP/1.1")
+        return False
+
+
+def _httpx_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+    )
+
+
+def _httpx_timeout():
+    import httpx
+
+    # Read timeouts are set per call (common.resilience / the sync helpers)
+    return httpx.Timeout(60, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+# Counts new connections via httpcore's trace events
+def _count_connection(pool: str, event: str):
+    if event == "connection.connect_tcp.complete":
+        HTTP_CONNECTIONS_CREATED.labels(pool=pool).inc()
+
+
+# Exposes busy/idle connection counts of a pool. With one process they are
+# read at scrape time. In multiprocess mode /metrics only sees values written
+# to the shared files (set_function is ignored), so each worker writes them
+# every HTTP_POOL_METRICS_INTERVAL_SECONDS instead.
+def _watch_pool(pool: str, busy, idle):
+    if not PROMETHEUS_MULTIPROC_DIR:
+        HTTP_POOL_CONNECTIONS.labels(pool=pool, state="busy").set_function(busy)
+        HTTP_POOL_CONNECTIONS.labels(pool=pool, state="idle").set_function(idle)
+        return
+    with _pool_counters_lock:
+        _pool_counters[pool] = (busy, idle)
+        if len(_pool_counters) == 1:
+            threading.Thread(
+                target=_update_pool_gauges_forever, name="pool-metrics", daemon=True
+            ).start()
+    _update_pool_gauges()
+
+
+def _update_pool_gauges():
+    for pool, (busy, idle) in list(_pool_counters.items()):
+        try:
+            counts = busy(), idle()
+        except Exception:
+            # Pool changed while being counted, keep the last values
+            continue
+        HTTP_POOL_CONNECTIONS.labels(pool=pool, state="busy").set(counts[0])
+        HTTP_POOL_CONNECTIONS.labels(pool=pool, state="idle").set(counts[1])
+
+
+def _update_pool_gauges_forever():
+    while True:
+        time.sleep(HTTP_POOL_METRICS_INTERVAL_SECONDS)
+        _update_pool_gauges()
+
+
+# Busy/idle counters of an httpx client's pool
+def _watch_httpx_pool(pool: str, client):
+    def count(busy: bool):
+        # httpx does not expose its pool, httpcore's pool lists its connections
+        transport = getattr(client(), "_transport", None)
+        connections = getattr(getattr(transport, "_pool", None), "connections", [])
+        return sum(1 for c in list(connections) if c.is_idle() != busy)
+
+    _watch_pool(pool, lambda: count(True), lambda: count(False))
+
+
+# Shared httpx client for the sync Azure OpenAI clients (scripts, indexing)
+def get_openai_http_client():
+    global openai_http_client
+    with _pools_lock:
+        if openai_http_client is None:
+            import httpx
+
+            def trace(event, info):
+                _count_connection("openai_sync", event)
+
+            def on_request(request):
+                HTTP_REQUESTS.labels(pool="openai_sync").inc()
+                request.extensions["trace"] = trace
+
+            openai_http_client = httpx.Client(
+                http2=_http2_available(),
+                limits=_httpx_limits(),
+                timeout=_httpx_timeout(),
+                event_hooks={"request": [on_request]},
+            )
+            _watch_httpx_pool("openai_sync", lambda: openai_http_client)
+    return openai_http_client
+
+
+# Shared httpx client for the async Azure OpenAI clients (request path)
+def get_openai_async_http_client():
+    global openai_async_http_client
+    if openai_async_http_client is None:
+        import httpx
+
+        async def trace(event, info):
+            _count_connection("openai", event)
+
+        async def on_request(request):
+            HTTP_REQUESTS.labels(pool="openai").inc()
+            request.extensions["trace"] = trace
+
+        openai_async_http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=_httpx_limits(),
+            timeout=_httpx_timeout(),
+            event_hooks={"request": [on_request]},
+        )
+        _watch_httpx_pool("openai", lambda: openai_async_http_client)
+    return openai_async_http_client
+
+
+# Shared azure-core transport for the sync Search clients
+def get_search_transport():
+    global search_transport
+    with _pools_lock:
+        if search_transport is None:
+            import requests
+            from azure.core.pipeline.transport import RequestsTransport
+
+            # urllib3 keeps up to pool_maxsize connections per host open
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=4, pool_maxsize=HTTP_MAX_CONNECTIONS
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            search_transport = RequestsTransport(
+                session=session,
+                session_owner=False,
+                connection_timeout=HTTP_CONNECT_TIMEOUT_SECONDS,
+            )
+    return search_transport
+
+
+# Shared azure-core transport for the async Search clients (request path).
+# Must be first called from the event loop that will use it.
+def get_search_async_transport():
+    global search_async_transport, _search_async_session
+    if search_async_transport is None:
+        import aiohttp
+        from azure.core.pipeline.transport import AioHttpTransport
+
+        pool = "search"
+
+        async def on_request_start(session, context, params):
+            HTTP_REQUESTS.labels(pool=pool).inc()
+
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+
+        async def on_queued_end(session, context, params):
+            waited = time.perf_counter() - context.queued_at
+            HTTP_POOL_WAIT.labels(pool=pool).observe(waited)
+
+        async def on_connection_created(session, context, params):
+            HTTP_CONNECTIONS_CREATED.labels(pool=pool).inc()
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_connection_created)
+
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        )
+        _search_async_session = aiohttp.ClientSession(
+            connector=connector, trace_configs=[trace]
+        )
+        search_async_transport = AioHttpTransport(
+            session=_search_async_session,
+            session_owner=False,
+            connection_timeout=HTTP_CONNECT_TIMEOUT_SECONDS,
+        )
+
+        # aiohttp keeps acquired connections and idle ones per host separately
+        def busy():
+            return len(getattr(connector, "_acquired", ()))
+
+        def idle():
+            conns = getattr(connector, "_conns", {})
+            return sum(len(c) for c in list(conns.values()))
+
+        _watch_pool(pool, busy, idle)
+    return search_async_transport
+
+
+# Open a keep-alive connection to each origin ahead of the first request, so
+# its TCP and TLS setup is not paid by a user (startup warm-up)
+async def preconnect_async(urls):
+    client = get_openai_async_http_client()
+    for url in set(filter(None, urls)):
+        # Any response (even 404) leaves a warm connection in the pool
+        await client.head(url, timeout=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+# Close the async pools that were created (called on application shutdown,
+# after the clients using them)
+async def close_async_pools():
+    global openai_async_http_client, search_async_transport, _search_async_session
+    if openai_async_http_client is not None:
+        await openai_async_http_client.aclose()
+    if _search_async_session is not None:
+        await _search_async_session.close()
+    openai_async_http_client = None
+    search_async_transport = None
+    _search_async_session = None
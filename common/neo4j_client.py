@@ -1,6 +1,7 @@
 import os
+import threading
+
 from dotenv import load_dotenv
-from neo4j import GraphDatabase
 
 # Load .env file
 load_dotenv()
@@ -12,15 +13,49 @@ NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
 NEO4J_INSTANCE_NAME = os.environ.get("AURA_INSTANCENAME")
 NEO4J_INSTANCE_ID = os.environ.get("AURA_INSTANCEID")
 
-# Singleton driver instance
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Singleton drivers, created on first use (tests and the offline load test
+# may assign stand-ins to these names)
+driver = None
+# Async driver used by the FastAPI request path
+async_driver = None
+
+_driver_lock = threading.Lock()
 
 
 def get_neo4j_driver():
     """Return Neo4j driver instance."""
+    global driver
+    with _driver_lock:
+        if driver is None:
+            from neo4j import GraphDatabase
+
+            driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     return driver
 
 
 def close_driver():
     """Close Neo4j driver connection."""
-    driver.close()
+    global driver
+    if driver is not None:
+        driver.close()
+        driver = None
+
+
+def get_async_neo4j_driver():
+    """Return async Neo4j driver instance."""
+    global async_driver
+    if async_driver is None:
+        from neo4j import AsyncGraphDatabase
+
+        async_driver = AsyncGraphDatabase.driver(
+            NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)
+        )
+    return async_driver
+
+
+async def close_async_driver():
+    """Close async Neo4j driver connection."""
+    global async_driver
+    if async_driver is not None:
+        await async_driver.close()
+        async_driver = None
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+# Total time budget (seconds) of a chat request across retrieval and generation
+REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", 30))
+# Per-attempt timeouts (seconds), always capped by what is left of the deadline
+SEARCH_TIMEOUT_SECONDS = float(os.environ.get("SEARCH_TIMEOUT_SECONDS", 5))
+EMBEDDING_TIMEOUT_SECONDS = float(os.environ.get("EMBEDDING_TIMEOUT_SECONDS", 5))
+CHAT_TIMEOUT_SECONDS = float(os.environ.get("CHAT_TIMEOUT_SECONDS", 25))
+# Retries of a retryable failure (throttling, connection errors, 5xx, timeouts)
+AZURE_MAX_RETRIES = int(os.environ.get("AZURE_MAX_RETRIES", 2))
+AZURE_RETRY_BASE_SECONDS = float(os.environ.get("AZURE_RETRY_BASE_SECONDS", 0.2))
+# Send a second search/embedding request when the first is slower than the p95
+HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "false").lower() == "true"
+# Hedge delay (seconds) used until enough latencies are known to compute the p95
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.environ.get("HEDGE_DEFAULT_DELAY_SECONDS", 0.5))
+
+# Latencies kept per service for the hedging p95, and needed before using it
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+T = TypeVar("T")
+
+
+# ************* Errors *************
+
+
+class UpstreamError(Exception):
+    """An Azure dependency failed (after retries), as opposed to "no answer"."""
+
+    def __init__(self, service: str, message: str):
+        super().__init__(f"{service}: {message}")
+        self.service = service
+
+
+class UpstreamTimeout(UpstreamError):
+    """An Azure dependency did not answer within its timeout or the deadline."""
+
+
+class UpstreamThrottled(UpstreamError):
+    """An Azure dependency kept answering 429; `retry_after` is its hint."""
+
+    def __init__(self, service: str, message: str, retry_after: float):
+        super().__init__(service, message)
+        self.retry_after = retry_after
+
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+# Retryable SDK exceptions, imported on first use like the SDKs themselves
+@lru_cache(maxsize=None)
+def _retryable_errors() -> Tuple[type, ...]:
+    from azure.core.exceptions import ServiceRequestError, ServiceResponseError
+    from openai import (
+        APIConnectionError,
+        APITimeoutError,
+        InternalServerError,
+        RateLimitError,
+    )
+
+    return (
+        RateLimitError,
+        APIConnectionError,
+        APITimeoutError,
+        InternalServerError,
+        ServiceRequestError,
+        ServiceResponseError,
+        ConnectionError,
+        TimeoutError,
+    )
+
+
+def is_retryable(error: BaseException) -> bool:
+    from azure.core.exceptions import HttpResponseError
+
+    if isinstance(error, HttpResponseError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, _retryable_errors())
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After sent with a 429/503, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers else None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ************* Deadline *************
+
+# Monotonic time at which the current request gives up, shared with child tasks
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float = REQUEST_DEADLINE_SECONDS):
+    """
+    Sets the time budget of everything awaited inside (and in tasks started
+    inside). A nested deadline can only shorten the outer one.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(min(deadline, outer) if outer else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the current deadline (default when there is none)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    return deadline - time.monotonic()
+
+
+# ************* Calls *************
+
+
+class _LatencyTracker:
+    """Recent successful latencies of a service, for the hedging delay."""
+
+    def __init__(self):
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, service: str, seconds: float):
+        self._samples.setdefault(service, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def p95(self, service: str) -> float:
+        samples = self._samples.get(service)
+        if not samples or len(samples) < LATENCY_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_SECONDS
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+latencies = _LatencyTracker()
+
+
+async def call_azure(
+    service: str,
+    request: Callable[[], Awaitable[T]],
+    timeout: float,
+    retries: int = AZURE_MAX_RETRIES,
+    hedge: bool = False,
+) -> T:
+    """
+    Runs an Azure request with a per-attempt timeout capped by the request
+    deadline, and jittered exponential backoff (or the server's Retry-After)
+    between retryable failures. With `hedge`, an attempt slower than the
+    service's p95 gets a second identical request and the first answer wins;
+    only use it for idempotent reads. Raises UpstreamTimeout,
+    UpstreamThrottled or UpstreamError.
+    """
+    last_error: Optional[UpstreamError] = None
+    for attempt in range(retries + 1):
+        budget = min(timeout, remaining_time(timeout))
+        if budget <= 0:
+            raise last_error or UpstreamTimeout(service, "request deadline exceeded")
+
+        start = time.perf_counter()
+        try:
+            if hedge and HEDGE_ENABLED:
+                result = await asyncio.wait_for(_hedged(service, request), budget)
+            else:
+                result = await asyncio.wait_for(request(), budget)
+            latencies.record(service, time.perf_counter() - start)
+            return result
+        except asyncio.TimeoutError:
+            last_error = UpstreamTimeout(service, f"no response after {budget:.1f}s")
+            error = None
+        except Exception as e:
+            if not is_retryable(e):
+                print(f"{service} request failed: {type(e).__name__}: {e}")
+                raise UpstreamError(service, f"{type(e).__name__}: {e}") from e
+            last_error = _upstream_error(service, e)
+            error = e
+
+        if attempt < retries:
+            delay = backoff_delay(error, attempt)
+            if delay >= remaining_time(delay + 1):
+                break
+            print(f"{service} attempt {attempt + 1} failed ({last_error}), retrying")
+            await asyncio.sleep(delay)
+
+    print(f"{service} request failed after {attempt + 1} attempt(s): {last_error}")
+    raise last_error
+
+
+async def _hedged(service: str, request: Callable[[], Awaitable[T]]) -> T:
+    """
+    Starts the request, and a second one if the first has not answered after
+    the service's p95 latency. Returns the first successful result.
+    """
+    pending = {asyncio.ensure_future(request())}
+    error: Optional[BaseException] = None
+    try:
+        done, pending = await asyncio.wait(pending, timeout=latencies.p95(service))
+        if done:
+            return done.pop().result()
+
+        pending.add(asyncio.ensure_future(request()))
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _upstream_error(service: str, error: Exception) -> UpstreamError:
+    from openai import APITimeoutError
+
+    message = f"{type(error).__name__}: {error}"
+    if getattr(error, "status_code", None) == 429:
+        return UpstreamThrottled(service, message, retry_after_seconds(error) or 1.0)
+    if isinstance(error, (APITimeoutError, TimeoutError)):
+        return UpstreamTimeout(service, message)
+    return UpstreamError(service, message)
+
+
+def backoff_delay(error: Optional[Exception], attempt: int) -> float:
+    """The server's Retry-After if present, else full-jitter exponential backoff."""
+    retry_after = retry_after_seconds(error) if error else None
+    if retry_after is not None:
+        return retry_after + random.uniform(0, AZURE_RETRY_BASE_SECONDS)
+    return random.uniform(0, AZURE_RETRY_BASE_SECONDS * 2**attempt)
@@ -0,0 +1,64 @@
+import os
+import re
+from functools import lru_cache
+
+from common.azure_clients import CHAT_MODEL
+
+# tiktoken encoding, defaults to the one of the chat model (or o200k_base)
+CHAT_TOKENIZER = os.environ.get("CHAT_TOKENIZER")
+
+# Characters per token used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer():
+    """
+    Returns the tiktoken encoding of the chat model, or None (character-based
+    estimate) if tiktoken or the encoding file is not available.
+    """
+    try:
+        import tiktoken
+
+        if CHAT_TOKENIZER:
+            return tiktoken.get_encoding(CHAT_TOKENIZER)
+        try:
+            # Azure deployment names often differ from the model name
+            return tiktoken.encoding_for_model(CHAT_MODEL or "")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"Tokenizer unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cuts text to at most max_tokens, ending on a sentence (or at least a word)
+    boundary, with an ellipsis.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    tokenizer = get_tokenizer()
+    # Leave room for the ellipsis
+    if tokenizer is None:
+        cut = text[: (max_tokens - 1) * CHARS_PER_TOKEN]
+    else:
+        tokens = tokenizer.encode(text, disallowed_special=())
+        cut = tokenizer.decode(tokens[: max_tokens - 1])
+
+    sentence_end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if sentence_end > len(cut) // 2:
+        return cut[: sentence_end + 1] + " …"
+    word_end = cut.rfind(" ")
+    if word_end > 0:
+        cut = cut[:word_end]
+    return re.sub(r"[\s,;:]+$", "", cut) + " …"
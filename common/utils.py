@@ -1,9 +1,16 @@
 import os
+import gzip
 import json
 import re
-from typing import Any
+import time
+from typing import Any, Iterable, Iterator
 from typing import Optional
 
+try:
+    import orjson  # several times faster than json on the data pipeline
+except ImportError:
+    orjson = None
+
 
 # Save data as JSON to the specified file path
 def save_json(data: Any, path: str):
@@ -26,6 +33,154 @@ def load_json(path: str):
         return []
 
 
+# Encode one record as a JSON line (bytes, newline included)
+def dump_record(record: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# Decode one JSON line
+def load_record(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+# Open a JSONL file in binary mode, gzip-compressed when the path ends with .gz
+def open_jsonl(path: str, mode: str = "rb", compressed: Optional[bool] = None):
+    if compressed is None:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+# Yield the records of a JSONL file one at a time (nothing if it cannot be read)
+def read_jsonl(path: str) -> Iterator[Any]:
+    try:
+        f = open_jsonl(path)
+    except Exception as e:
+        print(f"Failed to load JSONL from {path}: {e}")
+        return
+    with f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield load_record(line)
+            except ValueError as e:
+                print(f"Skipping invalid record at {path}:{number}: {e}")
+
+
+# Yield the records of a JSONL file while a live JsonlWriter is still appending
+# to it, polling for new lines until the writer closes (plain JSONL only).
+# Waits up to start_timeout seconds for the writer to start, then reads the
+# file as it is.
+def follow_jsonl(
+    path: str, poll_seconds: float = 0.5, start_timeout: float = 120
+) -> Iterator[Any]:
+    if path.endswith(".gz"):
+        raise ValueError(f"Cannot follow a compressed file: {path}")
+    marker = f"{path}.writing"
+    deadline = time.monotonic() + start_timeout
+    while not _writer_alive(marker) and time.monotonic() < deadline:
+        time.sleep(poll_seconds)
+    if not os.path.exists(path):
+        print(f"Failed to follow JSONL {path}: file not found")
+        return
+
+    with open(path, "rb") as f:
+        pending, number = b"", 0
+        while True:
+            # Checked before reading, so lines written before the writer
+            # closed are read in this pass
+            writing = _writer_alive(marker)
+            for line in iter(f.readline, b""):
+                pending += line
+                if not pending.endswith(b"\n"):
+                    continue  # half-written line, the rest comes later
+                line, pending = pending, b""
+                number += 1
+                if not line.strip():
+                    continue
+                try:
+                    yield load_record(line)
+                except ValueError as e:
+                    print(f"Skipping invalid record at {path}:{number}: {e}")
+            if not writing:
+                return
+            time.sleep(poll_seconds)
+
+
+# A live writer leaves "<path>.writing" with its pid until it closes
+def _writer_alive(marker: str) -> bool:
+    try:
+        with open(marker) as f:
+            os.kill(int(f.read()), 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+# Write records to a JSONL file as they are produced, returns how many were written
+def write_jsonl(records: Iterable[Any], path: str, live: bool = False) -> int:
+    with JsonlWriter(path, live=live) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+class JsonlWriter:
+    """
+    Streams records to a JSONL file (gzip-compressed for a .gz path).
+    By default records go to "<path>.partial" and the file replaces `path`
+    when the writer is closed, so readers never see a half-written file and
+    a run that wrote nothing or failed keeps the previous data. With
+    flush=True each record is flushed as it is written, so a crashed crawl
+    leaves everything scraped so far in the partial file.
+    With live=True records are appended to `path` itself and flushed one by
+    one, and "<path>.writing" marks the file as in progress, so the next
+    stage can process them with follow_jsonl before this one finishes; the
+    previous file is truncated at once, so a failed run does not keep it.
+    """
+
+    def __init__(self, path: str, flush: bool = False, live: bool = False):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.live = live
+        self.partial_path = path if live else f"{path}.partial"
+        self.marker_path = f"{path}.writing" if live else None
+        self.flush = flush or live
+        self.count = 0
+        self._file = open_jsonl(self.partial_path, "wb", path.endswith(".gz"))
+        # After truncating, so a follower never reads the previous run's data
+        if live:
+            with open(self.marker_path, "w") as f:
+                f.write(str(os.getpid()))
+
+    def write(self, record: Any):
+        self._file.write(dump_record(record))
+        if self.flush:
+            self._file.flush()
+        self.count += 1
+
+    def close(self, commit: bool = True):
+        if self._file.closed:
+            return
+        self._file.close()
+        if self.live:
+            os.remove(self.marker_path)
+        elif commit and self.count:
+            os.replace(self.partial_path, self.path)
+        elif not self.count:
+            os.remove(self.partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
 # Clean text by collapsing whitespace and stripping leading/trailing spaces
 def clean_text(text: Optional[str]) -> Optional[str]:
     if not text:
@@ -1,13 +1,12 @@
 import json
 import asyncio
-from typing import List
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from datetime import datetime, timezone
 from scraper.crawlers.base_crawler import BaseCrawler
 from common.constants import ARTICLES_PATH, SITEMAP_LINKS_PATH
 from scraper.models import Article
-from common.utils import save_json, clean_text
+from common.utils import JsonlWriter, clean_text
 
 
 class ArticleCrawler(BaseCrawler):
@@ -17,14 +16,19 @@ class ArticleCrawler(BaseCrawler):
     to extract metadata such as title, date, and content.
     """
 
-    def __init__(self, headless=True, max_concurrent=5):
+    # Selectors an article page fetched over HTTP must have (else browser fallback)
+    DETAIL_REQUIRED_SELECTORS = ("h1",)
+
+    def __init__(self, headless=True, max_concurrent=5, live=False):
         super().__init__(headless)
+        self.live = live
         self.semaphore = asyncio.Semaphore(max_concurrent)
 
     async def run(self):
         """
         Main entry point. Iterates through all article category pages listed in the sitemap,
-        extracts article links, fetches individual article pages, and saves the results to JSON.
+        extracts article links, fetches individual article pages, and appends each article
+        to a JSONL file as it is parsed.
         """
         await self.init_browser()
         try:
@@ -33,35 +37,40 @@ class ArticleCrawler(BaseCrawler):
 
             articles = sitemap.get("articles", [])
 
-            all_articles: List[dict] = []
-
-            for article in articles:
-                category = article["title"]
-                article_url = article["url"]
+            # Articles are written to "<file>.partial", which replaces the file
+            # only if the crawl finishes and scraped something. With live=True
+            # they go straight to the file, so the cleaning scripts can follow
+            # it (--follow) while the crawl runs
+            with JsonlWriter(ARTICLES_PATH, flush=True, live=self.live) as all_articles:
+                for article in articles:
+                    category = article["title"]
+                    article_url = article["url"]
 
-                print(f"\nCrawling articles for theme: {category} ...")
+                    print(f"\nCrawling articles for theme: {category} ...")
 
-                html = await self.load_page_content(article_url, click_more=True)
-                soup = BeautifulSoup(html, "html.parser")
+                    html = await self.load_page_content(article_url, click_more=True)
+                    soup = BeautifulSoup(html, "html.parser")
 
-                article_cards = soup.select(".masonry-item.views-row")
+                    article_cards = soup.select(".masonry-item.views-row")
 
-                print(f"Found {len(article_cards)} articles for {category}")
+                    print(f"Found {len(article_cards)} articles for {category}")
 
-                # Parse each article card concurrently
-                tasks = [
-                    self.parse_article_page(card, category) for card in article_cards
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                    # Parse each article card concurrently
+                    tasks = [
+                        self.parse_article_page(card, category)
+                        for card in article_cards
+                    ]
+                    scraped = 0
+                    for task in asyncio.as_completed(tasks):
+                        result = await task
+                        if isinstance(result, Article):
+                            all_articles.write(result.dict())
+                            scraped += 1
 
-                articles = [r.dict() for r in results if isinstance(r, Article)]
-                all_articles.extend(articles)
+                    print(f"{category}: {scraped} articles scraped.")
 
-                print(f"{category}: {len(articles)} articles scraped.")
-
-            if all_articles:
-                save_json(all_articles, ARTICLES_PATH)
-                print(f"\nSaved {len(all_articles)} articles to {ARTICLES_PATH}")
+            if all_articles.count:
+                print(f"\nSaved {all_articles.count} articles to {ARTICLES_PATH}")
 
         finally:
             await self.close_browser()
@@ -73,8 +82,9 @@ class ArticleCrawler(BaseCrawler):
                 a_tag = card.select_one("a[href]")
                 article_url = urljoin("https://www.madewithnestle.ca", a_tag["href"])
 
-                html = await self.load_page_content(article_url)
-                soup = BeautifulSoup(html, "html.parser")
+                soup = await self.load_page_soup(
+                    article_url, self.DETAIL_REQUIRED_SELECTORS
+                )
 
                 title_tag = soup.select_one("h1")
                 title = title_tag.get_text(strip=True) if title_tag else "Untitled"
@@ -1,33 +1,47 @@
+import asyncio
+from typing import Iterable
 from urllib.parse import urlparse
+from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
+from scraper.crawlers.fetchers import CRAWL_HTTP_ENABLED, USER_AGENT, HttpFetcher
 
 
 class BaseCrawler:
     """
     Base class for Playwright-based crawlers.
-    Handles browser initialization and context setup.
+    Handles browser initialization and context setup. Detail pages are
+    fetched over plain HTTP first (see load_page_soup), the browser is used
+    for paginated listings and as a fallback.
     """
 
     def __init__(self, headless=True):
         self.headless = headless  # Run browser in headless mode by default
         self.browser = None
         self.context = None
+        self.http = HttpFetcher() if CRAWL_HTTP_ENABLED else None
+        self.fetch_stats = {"http": 0, "browser": 0, "fallback": 0}
+        self._browser_lock = asyncio.Lock()
 
     # Launch a new browser context with default viewport and user settings
     async def init_browser(self):
+        async with self._browser_lock:
+            if not self.browser:
+                await self._launch_browser()
+
+    async def _launch_browser(self):
         playwright = await async_playwright().start()
         self.browser = await playwright.chromium.launch(headless=self.headless)
         self.context = await self.browser.new_context(
             viewport={"width": 1280, "height": 800},
             locale="en-US",
             timezone_id="America/Toronto",
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+            user_agent=USER_AGENT,
         )
 
     # Load the page content using Playwright
     async def load_page_content(self, url: str, click_more=False) -> str:
-        if not self.browser:
-            raise RuntimeError("Browser not initialized. Call init_browser() first.")
+        # Launched on first use when only fallbacks need it
+        await self.init_browser()
         try:
             page = await self.context.new_page()
             await page.goto(url, timeout=60000, wait_until="domcontentloaded")
@@ -55,11 +69,26 @@ class BaseCrawler:
             await page.wait_for_timeout(1000)
             content = await page.content()
             await page.close()
+            self.fetch_stats["browser"] += 1
             return content
         except Exception as e:
             print(f"❌ Error loading {url}: {e}")
             return ""
 
+    # Load and parse a server-rendered page, over plain HTTP when the page has
+    # every required selector and does not need JavaScript, else in the browser
+    async def load_page_soup(
+        self, url: str, required: Iterable[str] = ()
+    ) -> BeautifulSoup:
+        if self.http:
+            soup = await self.http.fetch(url, required)
+            if soup is not None:
+                self.fetch_stats["http"] += 1
+                return soup
+            self.fetch_stats["fallback"] += 1
+        html = await self.load_page_content(url)
+        return BeautifulSoup(html, "html.parser")
+
     # Check if the URL is internal to the madewithnestle.ca domain
     def is_internal_url(self, url: str) -> bool:
         parsed = urlparse(url)
@@ -87,10 +116,17 @@ class BaseCrawler:
         except Exception:
             return True
 
-    # Clean up browser resources after crawling is complete
+    # Clean up browser and HTTP resources after crawling is complete
     async def close_browser(self):
         if self.browser:
             await self.browser.close()
+        if self.http:
+            await self.http.close()
+        stats = self.fetch_stats
+        print(
+            f"{type(self).__name__}: {stats['http']} pages fetched over HTTP, "
+            f"{stats['browser']} in the browser ({stats['fallback']} fallbacks)"
+        )
 
     # Extract stripped text
     def _text(self, soup, selector: str) -> str:
@@ -0,0 +1,76 @@
+import os
+from typing import Iterable, Optional
+
+import httpx
+from bs4 import BeautifulSoup
+
+# Fetch detail pages over plain HTTP, with Playwright only as a fallback
+CRAWL_HTTP_ENABLED = os.environ.get("CRAWL_HTTP_ENABLED", "true").lower() == "true"
+# Max open connections of the HTTP fetcher (one pool per crawler)
+CRAWL_HTTP_MAX_CONNECTIONS = int(os.environ.get("CRAWL_HTTP_MAX_CONNECTIONS", 10))
+# Seconds to fetch one page over HTTP before falling back to the browser
+CRAWL_HTTP_TIMEOUT_SECONDS = float(os.environ.get("CRAWL_HTTP_TIMEOUT_SECONDS", 15))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+# Text found in pages that only render in a browser: bot challenges and
+# JavaScript-only shells. Matched case-insensitively against the raw HTML.
+JS_REQUIRED_MARKERS = (
+    "please enable javascript",
+    "you need to enable javascript",
+    "cf-browser-verification",
+    "challenge-platform",
+    "data-js-required",
+)
+
+
+class HttpFetcher:
+    """
+    Fetches server-rendered pages with a pooled async HTTP client, so a
+    detail page costs one request instead of a Chromium page. A page is
+    refused (None) when it does not look like the complete page: a non-200
+    or non-HTML response, a JS-dependent page (JS_REQUIRED_MARKERS) or one
+    of the required selectors missing. The caller then loads it in the browser.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = CRAWL_HTTP_MAX_CONNECTIONS,
+        timeout: float = CRAWL_HTTP_TIMEOUT_SECONDS,
+    ):
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en-US"},
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+        )
+
+    async def fetch(
+        self, url: str, required: Iterable[str] = ()
+    ) -> Optional[BeautifulSoup]:
+        """Returns the parsed page, or None when it needs a browser."""
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            print(f"HTTP fetch failed for {url}, using the browser: {e}")
+            return None
+
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            return None
+
+        html = response.text
+        lowered = html.lower()
+        if any(marker in lowered for marker in JS_REQUIRED_MARKERS):
+            return None
+
+        soup = BeautifulSoup(html, "html.parser")
+        if any(soup.select_one(selector) is None for selector in required):
+            return None
+        return soup
+
+    async def close(self):
+        await self.client.aclose()
@@ -1,7 +1,7 @@
 import json
 import asyncio
 import traceback
-from typing import List, Optional
+from typing import Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from datetime import datetime, timezone
@@ -13,15 +13,15 @@ from common.constants import (
     BROKEN_LINKS_PATH,
 )
 from scraper.models import Product, Nutrition, NutritionItem, ProductContent
-from common.utils import save_json
+from common.utils import JsonlWriter, save_json
 
 
 class ProductCrawler(BaseCrawler):
     """
     ProductCrawler handles the end-to-end scraping of product data from brand pages
     on the Nestlé Canada website. It loads each brand's product listing page, paginates
-    if needed, visits each product's detail page, extracts structured data, and saves
-    the results to JSON file.
+    if needed, visits each product's detail page, extracts structured data, and appends
+    each product to a JSONL file as soon as it is parsed.
     """
 
     SPECIAL_BRAND_URLS = {
@@ -40,8 +40,12 @@ class ProductCrawler(BaseCrawler):
         "Boost": ["https://www.madewithnestle.ca/boost/products"],
     }
 
-    def __init__(self, headless=True, max_concurrent=5):
+    # Selectors a product page fetched over HTTP must have (else browser fallback)
+    DETAIL_REQUIRED_SELECTORS = ("h1",)
+
+    def __init__(self, headless=True, max_concurrent=5, live=False):
         super().__init__(headless)
+        self.live = live
         self.semaphore = asyncio.Semaphore(max_concurrent)  # Limit concurrent requests
         self.external_links = []
         self.broken_links = []
@@ -56,48 +60,49 @@ class ProductCrawler(BaseCrawler):
 
             brands = sitemap.get("brands", [])
 
-            all_products: List[dict] = []
-
-            # Iterate through each brand and scrape products
-            for brand in brands:
-                brand_name = brand["title"]
-                category = brand["category"]
-                print(f"\nCrawling brand: {brand_name}...")
-
-                brand_urls = await self.classify_brand(brand)
-                if not brand_urls:
-                    continue
-
-                # Loop through brand URLs and scrape product cards
-                for brand_url in brand_urls:
-                    html = await self.load_page_content(brand_url, click_more=True)
-                    soup = BeautifulSoup(html, "html.parser")
-                    product_cards = soup.select(
-                        ".coh-column.product-column, .coh-column.nescafe-product, .coh-column.product-card, .coh-column.product-drumstick"
-                    )
-
-                    if not product_cards:
-                        print(f"No products found for brand: {brand_name}")
+            # Products are written to "<file>.partial", which replaces the file
+            # only if the crawl finishes and scraped something. With live=True
+            # they go straight to the file, so the cleaning scripts can follow
+            # it (--follow) while the crawl runs
+            with JsonlWriter(PRODUCTS_PATH, flush=True, live=self.live) as products:
+                # Iterate through each brand and scrape products
+                for brand in brands:
+                    brand_name = brand["title"]
+                    category = brand["category"]
+                    print(f"\nCrawling brand: {brand_name}...")
+
+                    brand_urls = await self.classify_brand(brand)
+                    if not brand_urls:
                         continue
 
-                    # Parse each product concurrently
-                    tasks = [
-                        self.parse_product_page(card, brand_name, category)
-                        for card in product_cards
-                    ]
+                    # Loop through brand URLs and scrape product cards
+                    for brand_url in brand_urls:
+                        html = await self.load_page_content(brand_url, click_more=True)
+                        soup = BeautifulSoup(html, "html.parser")
+                        product_cards = soup.select(
+                            ".coh-column.product-column, .coh-column.nescafe-product, .coh-column.product-card, .coh-column.product-drumstick"
+                        )
+
+                        if not product_cards:
+                            print(f"No products found for brand: {brand_name}")
+                            continue
 
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
+                        # Parse each product concurrently, saving each as it completes
+                        tasks = [
+                            self.parse_product_page(card, brand_name, category)
+                            for card in product_cards
+                        ]
 
-                    brand_products = [
-                        p.dict() for p in results if isinstance(p, Product)
-                    ]
-                    all_products.extend(brand_products)
-                    print(f"{brand_name}: {len(brand_products)} products scraped.")
+                        scraped = 0
+                        for task in asyncio.as_completed(tasks):
+                            product = await task
+                            if isinstance(product, Product):
+                                products.write(product.dict())
+                                scraped += 1
+                        print(f"{brand_name}: {scraped} products scraped.")
 
-            # Save successfully parsed products
-            if all_products:
-                save_json(all_products, PRODUCTS_PATH)
-                print(f"\nSaved {len(all_products)} products to {PRODUCTS_PATH}")
+            if products.count:
+                print(f"\nSaved {products.count} products to {PRODUCTS_PATH}")
 
             # Save skipped external brand links for reference
             if self.external_links:
@@ -129,8 +134,9 @@ class ProductCrawler(BaseCrawler):
                 title = a_tag.get_text(strip=True)
 
                 # Load and parse detail page
-                detail_html = await self.load_page_content(detail_url)
-                detail_soup = BeautifulSoup(detail_html, "html.parser")
+                detail_soup = await self.load_page_soup(
+                    detail_url, self.DETAIL_REQUIRED_SELECTORS
+                )
 
                 # Extract product name, description, size
                 name_tag = detail_soup.select_one("h1")
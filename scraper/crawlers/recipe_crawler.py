@@ -1,13 +1,12 @@
 import json
 import asyncio
-from typing import List
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from datetime import datetime, timezone
 from scraper.crawlers.base_crawler import BaseCrawler
 from common.constants import RECIPES_PATH, SITEMAP_LINKS_PATH
 from scraper.models import Recipe, RecipeStats
-from common.utils import save_json, clean_text
+from common.utils import JsonlWriter, clean_text
 
 
 class RecipeCrawler(BaseCrawler):
@@ -17,8 +16,12 @@ class RecipeCrawler(BaseCrawler):
     recipe data from individual recipe detail pages.
     """
 
-    def __init__(self, headless=True, max_concurrent=5):
+    # Selectors a recipe page fetched over HTTP must have (else browser fallback)
+    DETAIL_REQUIRED_SELECTORS = ("h1", ".what-you-need-content")
+
+    def __init__(self, headless=True, max_concurrent=5, live=False):
         super().__init__(headless)
+        self.live = live
         self.semaphore = asyncio.Semaphore(max_concurrent)
 
     async def run(self):
@@ -29,36 +32,41 @@ class RecipeCrawler(BaseCrawler):
 
             recipes = sitemap.get("recipes", [])
 
-            all_recipes: List[dict] = []
-
-            for recipe in recipes:
-                brand_name = recipe["brand"]
-                recipe_url = recipe["url"]
+            # Recipes are written to "<file>.partial", which replaces the file
+            # only if the crawl finishes and scraped something. With live=True
+            # they go straight to the file, so the cleaning scripts can follow
+            # it (--follow) while the crawl runs
+            with JsonlWriter(RECIPES_PATH, flush=True, live=self.live) as all_recipes:
+                for recipe in recipes:
+                    brand_name = recipe["brand"]
+                    recipe_url = recipe["url"]
 
-                print(f"\nCrawling recipes for brand: {brand_name} ...")
+                    print(f"\nCrawling recipes for brand: {brand_name} ...")
 
-                html = await self.load_page_content(recipe_url, click_more=True)
-                soup = BeautifulSoup(html, "html.parser")
-
-                recipe_cards = soup.select(
-                    ".recipe-search-results .recipe-search-card-wrapper"
-                )
+                    html = await self.load_page_content(recipe_url, click_more=True)
+                    soup = BeautifulSoup(html, "html.parser")
 
-                print(f"Found {len(recipe_cards)} recipes for {brand_name}")
+                    recipe_cards = soup.select(
+                        ".recipe-search-results .recipe-search-card-wrapper"
+                    )
 
-                tasks = [
-                    self.parse_recipe_page(card, brand_name) for card in recipe_cards
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                    print(f"Found {len(recipe_cards)} recipes for {brand_name}")
 
-                recipes = [r.dict() for r in results if isinstance(r, Recipe)]
-                all_recipes.extend(recipes)
+                    tasks = [
+                        self.parse_recipe_page(card, brand_name)
+                        for card in recipe_cards
+                    ]
+                    scraped = 0
+                    for task in asyncio.as_completed(tasks):
+                        result = await task
+                        if isinstance(result, Recipe):
+                            all_recipes.write(result.dict())
+                            scraped += 1
 
-                print(f"{brand_name}: {len(recipes)} recipes scraped.")
+                    print(f"{brand_name}: {scraped} recipes scraped.")
 
-            if all_recipes:
-                save_json(all_recipes, RECIPES_PATH)
-                print(f"\nSaved {len(all_recipes)} recipes to {RECIPES_PATH}")
+            if all_recipes.count:
+                print(f"\nSaved {all_recipes.count} recipes to {RECIPES_PATH}")
 
         finally:
             await self.close_browser()
@@ -69,8 +77,9 @@ class RecipeCrawler(BaseCrawler):
                 a_tag = card.select_one("a[href]")
                 recipe_url = urljoin("https://www.madewithnestle.ca", a_tag["href"])
 
-                html = await self.load_page_content(recipe_url)
-                soup = BeautifulSoup(html, "html.parser")
+                soup = await self.load_page_soup(
+                    recipe_url, self.DETAIL_REQUIRED_SELECTORS
+                )
 
                 name = soup.select_one("h1")
                 title = name.get_text(strip=True) if name else "Untitled"
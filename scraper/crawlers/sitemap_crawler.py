@@ -1,7 +1,6 @@
 import asyncio
 import os
 import json
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from scraper.crawlers.base_crawler import BaseCrawler
 from common.utils import save_json
@@ -17,9 +16,14 @@ class SitemapCrawler(BaseCrawler):
         super().__init__(headless)
 
     async def run(self):
-
-        await self.init_browser()
-
+        # The sitemap pages are fetched over HTTP, the browser only starts if
+        # one of them needs it
+        try:
+            return await self.extract_sitemap()
+        finally:
+            await self.close_browser()
+
+    async def extract_sitemap(self):
         sitemap = {
             "brands": [],
             "recipes": [],
@@ -28,8 +32,7 @@ class SitemapCrawler(BaseCrawler):
         }
 
         # Load main sitemap
-        html = await self.load_page_content(SITEMAP_URL)
-        soup = BeautifulSoup(html, "html.parser")
+        soup = await self.load_page_soup(SITEMAP_URL, [".sitemap-section"])
 
         # Extract brand links
         brand_section = soup.select_one(".sitemap-section.brands-section")
@@ -48,10 +51,10 @@ class SitemapCrawler(BaseCrawler):
         print(f"Extracted {len(sitemap['brands'])} brands.")
 
         # Extract recipe links from "All Recipes" page
-        recipe_html = await self.load_page_content(
-            "https://www.madewithnestle.ca/recipes"
+        recipe_soup = await self.load_page_soup(
+            "https://www.madewithnestle.ca/recipes",
+            ["ul[data-drupal-facet-alias='recipe_brand_reference']"],
         )
-        recipe_soup = BeautifulSoup(recipe_html, "html.parser")
 
         facet_section = recipe_soup.select_one(
             "ul[data-drupal-facet-alias='recipe_brand_reference']"
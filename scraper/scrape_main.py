@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 from scraper.crawlers.product_crawler import ProductCrawler
 from scraper.crawlers.sitemap_crawler import SitemapCrawler
@@ -6,24 +7,29 @@ from scraper.crawlers.article_crawler import ArticleCrawler
 
 
 # Main entry point for running all crawlers
-async def run_all():
+async def run_all(live: bool = False):
 
     # Step 1: Extract sitemap links
     print("Starting SitemapCrawler to extract sitemap links...")
     await SitemapCrawler().run()
 
-    # Step 2.1: Crawl products
-    print("Starting ProductCrawler...")
-    await ProductCrawler().run()
-
-    # Step 2.2: Crawl recipes
-    print("Starting RecipeCrawler...")
-    await RecipeCrawler().run()
-
-    # Step 2.3: Crawl articles
-    print("Starting ArticleCrawler...")
-    await ArticleCrawler().run()
+    # Step 2: Crawl products, recipes and articles concurrently (detail pages
+    # are mostly fetched over HTTP, so the crawlers are network-bound)
+    print("Starting ProductCrawler, RecipeCrawler and ArticleCrawler...")
+    await asyncio.gather(
+        ProductCrawler(live=live).run(),
+        RecipeCrawler(live=live).run(),
+        ArticleCrawler(live=live).run(),
+    )
 
 
 if __name__ == "__main__":
-    asyncio.run(run_all())
+    parser = argparse.ArgumentParser(description="Crawl the Nestlé Canada site")
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="write records straight to the raw files so the cleaning scripts "
+        "can --follow them (a failed crawl then replaces the previous data)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run_all(live=args.live))
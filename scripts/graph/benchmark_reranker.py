@@ -0,0 +1,105 @@
+import argparse
+import random
+import re
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.services.product_reranker import ProductReranker, keyword_rerank
+from common.constants import GRAPH_PRODUCTS_PATH, PRODUCT_EMBEDDINGS_DIR
+from common.utils import read_jsonl
+
+# Reranks (question, candidate products, top_n) -> top products
+Reranker = Callable[[str, List[dict], int], List[dict]]
+
+
+def build_eval_set(sample_size: int, seed: int = 42) -> List[Dict]:
+    """
+    Builds (question, expected product, candidates) triples from the graph data.
+    The question is a description sentence other than the first (which usually
+    repeats the product name); the candidates are all products of the same brand,
+    like the graph lookup of the hybrid service returns them.
+    """
+    products = [p for p in read_jsonl(GRAPH_PRODUCTS_PATH) if p.get("name")]
+    by_brand = defaultdict(list)
+    for p in products:
+        by_brand[p.get("brand")].append(p)
+
+    eval_set = []
+    for p in products:
+        sentences = re.split(r"(?<=[.!?])\s+", p.get("description") or "")
+        sentences = [s for s in sentences[1:] if len(s.split()) >= 5]
+        candidates = by_brand[p.get("brand")]
+        if sentences and len(candidates) > 1:
+            eval_set.append(
+                {
+                    "question": sentences[0],
+                    "expected": p["name"],
+                    "candidates": candidates,
+                }
+            )
+
+    random.Random(seed).shuffle(eval_set)
+    return eval_set[:sample_size]
+
+
+def evaluate(rerank: Reranker, eval_set: List[Dict], top_n: int) -> Dict:
+    """Reranks every question's candidates and reports hit rate, MRR and latency."""
+    latencies = []
+    reciprocal_ranks = []
+
+    for item in eval_set:
+        start = time.perf_counter()
+        ranked = rerank(item["question"], item["candidates"], top_n)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        names = [p.get("name") for p in ranked]
+        if item["expected"] in names:
+            reciprocal_ranks.append(1 / (names.index(item["expected"]) + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+
+    return {
+        f"hit@{top_n}": float(np.mean([rr > 0 for rr in reciprocal_ranks])),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    """
+    Compares the keyword reranker with the embedding reranker on questions
+    derived from product descriptions. Build the embeddings first with
+    `python -m scripts.graph.build_product_embeddings`.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark graph product reranking")
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--index-dir", default=PRODUCT_EMBEDDINGS_DIR)
+    args = parser.parse_args()
+
+    eval_set = build_eval_set(args.sample_size)
+    runs = [
+        ("keyword", keyword_rerank),
+        ("embedding", ProductReranker(args.index_dir).rerank),
+    ]
+    candidates = np.mean([len(item["candidates"]) for item in eval_set])
+
+    print(
+        f"{len(eval_set)} questions, {candidates:.1f} candidates on average, "
+        f"top_n={args.top_n}\n"
+    )
+    print(f"{'reranker':<12}{'hit@n':>8}{'mrr':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, rerank in runs:
+        result = evaluate(rerank, eval_set, args.top_n)
+        print(
+            f"{name:<12}{result[f'hit@{args.top_n}']:>8.3f}{result['mrr']:>8.3f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import argparse
+import time
+from backend.services.product_reranker import build_product_embeddings
+from backend.services.retrievers import get_embedder
+from common.constants import GRAPH_PRODUCTS_PATH, PRODUCT_EMBEDDINGS_DIR
+from common.utils import read_jsonl
+
+
+def main():
+    """
+    Precomputes the graph product embeddings used by the embedding reranker
+    (RERANK_MODE=embedding). Embeddings are keyed by a hash of the product
+    text, so edited products are re-embedded on first sight; rebuild after
+    reloading the graph data to have them all precomputed again.
+    """
+    parser = argparse.ArgumentParser(description="Build graph product embeddings")
+    parser.add_argument("--embedder", choices=["azure", "hashing"], default="azure")
+    parser.add_argument("--dim", type=int, default=1024, help="hashing embedder only")
+    parser.add_argument("--index-dir", default=PRODUCT_EMBEDDINGS_DIR)
+    args = parser.parse_args()
+
+    products = read_jsonl(GRAPH_PRODUCTS_PATH)
+
+    start = time.perf_counter()
+    count = build_product_embeddings(
+        products, get_embedder(args.embedder, args.dim), index_dir=args.index_dir
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Embedded {count} products with '{args.embedder}' in {elapsed:.1f}s → {args.index_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 from pathlib import Path
 from backend.models.graph_models import BrandNode, ProductNode, HasProductEdge
 from common.constants import (
@@ -7,61 +8,68 @@ from common.constants import (
     GRAPH_PRODUCTS_PATH,
     GRAPH_EDGES_PATH,
 )
-from common.utils import save_json, load_json
+from common.utils import JsonlWriter, follow_jsonl, read_jsonl, write_jsonl
 
 
-def clean_graph_data():
-    """Clean and prepare graph data from raw products JSON."""
-    raw_products = load_json(PRODUCTS_PATH)
-
+def clean_graph_data(follow: bool = False):
+    """
+    Clean and prepare graph data from raw products JSONL.
+    Products and edges are streamed to their files as raw products are read,
+    only the (few) brand names are kept in memory. With follow=True raw
+    products are processed while the crawler is still writing them.
+    """
     brands = {}
-    products = []
-    edges = []
-
-    for item in raw_products:
-        brand_name = item.get("brand")
-        if not brand_name:
-            print(f"Skipped product: {item.get('title')}")
-            continue
 
-        # Create brand node if not exists
-        if brand_name not in brands:
-            brands[brand_name] = BrandNode(name=brand_name)
+    # Ensure output dir exists
+    Path(GRAPH_PROCESSED_DIR).mkdir(parents=True, exist_ok=True)
 
-        # Create product node
-        product = ProductNode(
-            name=item.get("title"),
-            brand=brand_name,
-            url=item.get("url"),
-            image=item.get("images", [None])[0] if item.get("images") else None,
-            description=item.get("description"),
-            product_size=item.get("product_size"),
-            product_line=item.get("product_line"),
-            label=item.get("labels", [None])[0] if item.get("labels") else None,
-        )
+    with JsonlWriter(GRAPH_PRODUCTS_PATH) as products, JsonlWriter(
+        GRAPH_EDGES_PATH
+    ) as edges:
+        raw_products = follow_jsonl if follow else read_jsonl
+        for item in raw_products(PRODUCTS_PATH):
+            brand_name = item.get("brand")
+            if not brand_name:
+                print(f"Skipped product: {item.get('title')}")
+                continue
 
-        products.append(product)
+            # Create brand node if not exists
+            if brand_name not in brands:
+                brands[brand_name] = BrandNode(name=brand_name)
 
-        # Create edge Brand -> Product
-        edges.append(HasProductEdge(from_brand=brand_name, to_product=product.name))
+            # Create product node
+            product = ProductNode(
+                name=item.get("title"),
+                brand=brand_name,
+                url=item.get("url"),
+                image=item.get("images", [None])[0] if item.get("images") else None,
+                description=item.get("description"),
+                product_size=item.get("product_size"),
+                product_line=item.get("product_line"),
+                label=item.get("labels", [None])[0] if item.get("labels") else None,
+            )
 
-    # Ensure output dir exists
-    Path(GRAPH_PROCESSED_DIR).mkdir(parents=True, exist_ok=True)
+            products.write(product.model_dump())
 
-    # Save cleaned data
-    brands = [b.model_dump() for b in brands.values()]
-    products = [p.model_dump() for p in products]
-    edges = [e.model_dump() for e in edges]
+            # Create edge Brand -> Product
+            edge = HasProductEdge(from_brand=brand_name, to_product=product.name)
+            edges.write(edge.model_dump())
 
-    save_json(brands, GRAPH_BRANDS_PATH)
-    save_json(products, GRAPH_PRODUCTS_PATH)
-    save_json(edges, GRAPH_EDGES_PATH)
+    write_jsonl((b.model_dump() for b in brands.values()), GRAPH_BRANDS_PATH)
 
     print(
         f"Graph data cleaned and saved: \n"
-        f"Total Brands: {len(brands)}, Total Products: {len(products)}, Total Edges: {len(edges)}"
+        f"Total Brands: {len(brands)}, Total Products: {products.count}, Total Edges: {edges.count}"
     )
 
 
 if __name__ == "__main__":
-    clean_graph_data()
+    parser = argparse.ArgumentParser(description="Clean graph data")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="process products while the crawler is still writing them",
+    )
+    args = parser.parse_args()
+
+    clean_graph_data(follow=args.follow)
@@ -1,72 +1,70 @@
+import argparse
+import time
+from backend.services.graph_bulk import (
+    BRANDS_QUERY,
+    PRODUCTS_QUERY,
+    EDGES_QUERY,
+    BRAND_FIELDS,
+    PRODUCT_FIELDS,
+    EDGE_FIELDS,
+    ensure_schema,
+    to_rows,
+    write_batches,
+)
 from common.constants import GRAPH_BRANDS_PATH, GRAPH_PRODUCTS_PATH, GRAPH_EDGES_PATH
 from common.neo4j_client import get_neo4j_driver, close_driver
-from common.utils import load_json
+from common.utils import read_jsonl
 
 
-def upload_to_neo4j():
+def upload_to_neo4j(batch_size: int = 1000, workers: int = 1):
+    """
+    Bulk loads brands, products and HAS_PRODUCT edges into Neo4j.
+    Rows are sent in batches through `UNWIND $rows AS row MERGE ...`,
+    one write transaction per batch, optionally several batches in parallel.
+    """
     driver = get_neo4j_driver()
     if not driver:
         print("Failed to connect to Neo4j. Please check your connection settings.")
         return
 
-    brands = load_json(GRAPH_BRANDS_PATH)
-    products = load_json(GRAPH_PRODUCTS_PATH)
-    edges = load_json(GRAPH_EDGES_PATH)
+    ensure_schema(driver)
 
-    # product_names = [p["name"] for p in products]
-    # print(len(product_names), len(set(product_names)))
+    # Nodes first, edges need both ends to exist. Records are streamed from the
+    # JSONL files, only their query parameters are kept.
+    steps = [
+        ("brands", BRANDS_QUERY, to_rows(read_jsonl(GRAPH_BRANDS_PATH), BRAND_FIELDS)),
+        (
+            "products",
+            PRODUCTS_QUERY,
+            to_rows(read_jsonl(GRAPH_PRODUCTS_PATH), PRODUCT_FIELDS),
+        ),
+        ("edges", EDGES_QUERY, to_rows(read_jsonl(GRAPH_EDGES_PATH), EDGE_FIELDS)),
+    ]
 
-    with driver.session() as session:
-        # Upload brand nodes
-        for brand in brands:
-            query = (
-                "MERGE (b:Brand {name: $name})\n" "SET b.url = $url, b.image = $image"
-            )
-            session.run(
-                query,
-                name=brand["name"],
-                url=brand.get("url"),
-                image=brand.get("image"),
-            )
-
-        # Upload product nodes
-        for product in products:
-            query = (
-                "MERGE (p:Product {name: $name})\n"
-                "SET p.url = $url,\n"
-                "    p.image = $image,\n"
-                "    p.description = $description,\n"
-                "    p.product_size = $product_size,\n"
-                "    p.product_line = $product_line,\n"
-                "    p.label = $label"
-            )
-            session.run(
-                query,
-                name=product["name"],
-                url=product.get("url"),
-                image=product.get("image"),
-                description=product.get("description"),
-                product_size=product.get("product_size"),
-                product_line=product.get("product_line"),
-                label=product.get("label"),
-            )
-
-        # Upload edges
-        for edge in edges:
-            query = (
-                "MATCH (b:Brand {name: $brand_name})\n"
-                "MATCH (p:Product {name: $product_name})\n"
-                "MERGE (b)-[r:HAS_PRODUCT]->(p)"
-            )
-            session.run(
-                query,
-                brand_name=edge["from_brand"],
-                product_name=edge["to_product"],
-            )
+    total_start = time.perf_counter()
+    total_rows = 0
+    for name, query, rows in steps:
+        start = time.perf_counter()
+        stats = write_batches(driver, query, rows, batch_size, workers)
+        elapsed = time.perf_counter() - start
+        total_rows += len(rows)
+        print(
+            f"Uploaded {len(rows)} {name} in {elapsed:.2f}s "
+            f"({len(rows) / elapsed if elapsed else 0:.0f} rows/s) {stats}"
+        )
 
+    total_elapsed = time.perf_counter() - total_start
     close_driver()
-    print("Graph data uploaded to Neo4j.")
+    print(
+        f"Graph data uploaded to Neo4j: {total_rows} rows in {total_elapsed:.2f}s "
+        f"({total_rows / total_elapsed if total_elapsed else 0:.0f} rows/s)."
+    )
 
 
 if __name__ == "__main__":
-    upload_to_neo4j()
+    parser = argparse.ArgumentParser(description="Bulk load graph data into Neo4j")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1, help="parallel batches")
+    args = parser.parse_args()
+
+    upload_to_neo4j(batch_size=args.batch_size, workers=args.workers)
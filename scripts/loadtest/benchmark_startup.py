@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from scripts.loadtest.run_load_test import STAND_IN_ENV
+
+MODES = ("off", "background", "blocking")
+PHASES = (
+    "import_s",
+    "sdk_clients_s",
+    "startup_s",
+    "ready_s",
+    "first_chat_ms",
+    "second_chat_ms",
+)
+
+
+async def measure_child(question: str) -> Dict[str, float]:
+    """
+    Runs in a fresh interpreter: imports the app, runs its startup with
+    zero-latency stand-ins (so only local work is measured), then times two
+    /chat requests.
+    """
+    start = time.perf_counter()
+    import httpx
+
+    from backend.main import app
+    from scripts.loadtest.stand_ins import (
+        DEFAULT_PROFILES,
+        LatencyProfile,
+        install_stand_ins,
+    )
+
+    imported = time.perf_counter()
+    result = {"import_s": imported - start}
+
+    # SDK imports and client construction (no network), paid by the warm-up or
+    # the first request; the stand-ins below replace these clients
+    import common.azure_clients as azure_clients
+    import common.neo4j_client as neo4j_client
+
+    azure_clients.get_async_search_client()
+    azure_clients.get_async_openai_embedding_client()
+    azure_clients.get_async_openai_chat_client()
+    neo4j_client.get_async_neo4j_driver()
+    result["sdk_clients_s"] = time.perf_counter() - imported
+
+    # Stand-in construction is test setup, kept out of the timings
+    install_stand_ins({stage: LatencyProfile(0, 0) for stage in DEFAULT_PROFILES})
+    setup_done = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        result["startup_s"] = time.perf_counter() - setup_done
+        result["ready_s"] = result["import_s"] + result["startup_s"]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://startup"
+        ) as client:
+            for phase in ("first_chat_ms", "second_chat_ms"):
+                request_start = time.perf_counter()
+                response = await client.post("/chat", json={"question": question})
+                response.raise_for_status()
+                result[phase] = (time.perf_counter() - request_start) * 1000
+    return result
+
+
+def run_child(mode: str, question: str) -> Dict[str, float]:
+    env = {**os.environ, **STAND_IN_ENV, "WARMUP_MODE": mode}
+    env.update(
+        ANSWER_CACHE_ENABLED="false",
+        GRAPH_SNAPSHOT_RECONCILE_SECONDS="0",
+        RATE_LIMIT_PER_MINUTE="0",
+        VECTOR_BACKEND="azure",
+    )
+    output = subprocess.run(
+        [sys.executable, "-m", "scripts.loadtest.benchmark_startup", "--child"]
+        + ["--question", question],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """
+    Cold-start benchmark for Cloud Run: for each WARMUP_MODE, starts the app in
+    fresh interpreters and reports (median over runs) the import time, the
+    SDK import and client construction time (moved out of the import, into the
+    warm-up or the first request), the lifespan startup time, the time until
+    the app is ready to serve, and the latency of the first and second /chat
+    requests. Azure and Neo4j are zero-latency stand-ins, so the numbers are
+    the app's own start-up work.
+    """
+    parser = argparse.ArgumentParser(description="Startup time benchmark")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--question", default="What KitKat flavours are there?")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure_child(args.question))))
+        return
+
+    print(f"{'warm-up mode':<14}" + "".join(f"{p:>16}" for p in PHASES))
+    for mode in args.modes:
+        runs: List[Dict[str, float]] = [
+            run_child(mode, args.question) for _ in range(args.runs)
+        ]
+        medians = [statistics.median(r[p] for r in runs) for p in PHASES]
+        print(f"{mode:<14}" + "".join(f"{m:>16.3f}" for m in medians))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from scripts.loadtest.run_load_test import STAND_IN_ENV, STAGES
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_until_ready(client, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/admission/stats")
+            if response.status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def drive(
+    base_url: str,
+    endpoint: str,
+    questions: List[str],
+    concurrency: int,
+    seconds: float,
+) -> Dict:
+    """
+    Closed loop: `concurrency` clients each send their next request as soon as
+    the previous one is answered, for `seconds` (after a short warm-up).
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=60, limits=limits
+    ) as client:
+        await wait_until_ready(client)
+
+        latencies: List[float] = []
+        errors = 0
+        counter = iter(range(10**9))
+
+        async def worker(until: float, record: bool):
+            nonlocal errors
+            while time.perf_counter() < until:
+                question = questions[next(counter) % len(questions)]
+                start = time.perf_counter()
+                try:
+                    response = await client.post(endpoint, json={"question": question})
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                if record:
+                    if ok:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+
+        warm_until = time.perf_counter() + min(2.0, seconds / 2)
+        await asyncio.gather(*(worker(warm_until, False) for _ in range(concurrency)))
+
+        start = time.perf_counter()
+        until = start + seconds
+        await asyncio.gather(*(worker(until, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    values = np.array(latencies or [0.0]) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+    }
+
+
+def run_server(workers: int, args, state_dir: str) -> subprocess.Popen:
+    metrics_dir = os.path.join(state_dir, "metrics")
+    os.makedirs(metrics_dir, exist_ok=True)
+    latency = ";".join(f"{stage}={args.latency}" for stage in STAGES)
+    env = {
+        **os.environ,
+        **STAND_IN_ENV,
+        "WEB_CONCURRENCY": str(workers),
+        "SHARED_STATE_DIR": state_dir,
+        "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+        "STAND_IN_PROFILES": latency,
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+        "GRAPH_SNAPSHOT_SOURCE": "files",
+        "GRAPH_SNAPSHOT_RECONCILE_SECONDS": "0",
+        "RATE_LIMIT_PER_MINUTE": "0",
+        "VECTOR_BACKEND": "azure",
+        "WARMUP_MODE": "blocking",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.loadtest.stand_in_app:app"]
+        + ["--port", str(args.port), "--workers", str(workers)]
+        + ["--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def main():
+    """
+    Throughput of the chat API for several worker counts. Each run starts
+    uvicorn with N workers (the startup.sh serving mode) and stand-ins for
+    Azure and Neo4j, zero-latency by default so the app's own CPU work is the
+    bottleneck, then drives it with a closed loop of concurrent clients.
+    Throughput should scale with the workers up to the number of CPUs.
+    """
+    from scripts.vector.benchmark_retrieval import build_eval_set
+
+    parser = argparse.ArgumentParser(description="Worker scaling benchmark")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--endpoint", default="/chat")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument(
+        "--latency",
+        default="0,0",
+        help="latency profile of every stand-in: median_ms,p95_ms",
+    )
+    parser.add_argument("--answer-cache", action="store_true", help="keep it enabled")
+    parser.add_argument("--port", type=int, default=free_port())
+    args = parser.parse_args()
+
+    questions = [q["question"] for q in build_eval_set(10_000, seed=0)]
+    print(f"CPUs: {os.cpu_count()}, concurrency: {args.concurrency}")
+    print(
+        f"{'workers':>8}{'requests':>10}{'errors':>8}{'rps':>9}{'speedup':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}"
+    )
+
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as state_dir:
+            server = run_server(workers, args, state_dir)
+            try:
+                result = asyncio.run(
+                    drive(
+                        f"http://127.0.0.1:{args.port}",
+                        args.endpoint,
+                        questions,
+                        args.concurrency,
+                        args.seconds,
+                    )
+                )
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        baseline = baseline or result["throughput_rps"]
+        print(
+            f"{workers:>8}{result['requests']:>10}{result['errors']:>8}"
+            f"{result['throughput_rps']:>9.1f}"
+            f"{result['throughput_rps'] / baseline:>9.2f}"
+            f"{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+# Placeholder settings so the Azure / Neo4j clients can be constructed;
+# every request-path client is replaced with a stand-in before use
+STAND_IN_ENV = {
+    "AZURE_SEARCH_ENDPOINT": "https://stand-in.search.windows.net",
+    "AZURE_SEARCH_API_KEY": "stand-in",
+    "AZURE_SEARCH_INDEX": "stand-in",
+    "AZURE_OPENAI_EMBEDDING_ENDPOINT": "https://stand-in.openai.azure.com/",
+    "AZURE_OPENAI_EMBEDDING_API_KEY": "stand-in",
+    "AZURE_OPENAI_EMBEDDING_MODEL": "stand-in",
+    "AZURE_OPENAI_EMBEDDING_API_VERSION": "2023-05-15",
+    "AZURE_OPENAI_CHAT_ENDPOINT": "https://stand-in.openai.azure.com/",
+    "AZURE_OPENAI_CHAT_API_KEY": "stand-in",
+    "AZURE_OPENAI_CHAT_MODEL": "gpt-35-turbo",
+    "AZURE_OPENAI_CHAT_API_VERSION": "2024-12-01-preview",
+    "NEO4J_URI": "neo4j://stand-in:7687",
+    "NEO4J_USERNAME": "stand-in",
+    "NEO4J_PASSWORD": "stand-in",
+}
+
+STAGES = ("search", "embedding", "neo4j", "chat")
+
+
+def load_corpus(path: str) -> List[str]:
+    """
+    Reads questions from a JSONL file (`question`, `title` or `text` field per
+    line) or a plain text file (one question per line).
+    """
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                row = json.loads(line)
+                line = row.get("question") or row.get("title") or row.get("text")
+            if line:
+                questions.append(line)
+    return questions
+
+
+async def run_endpoint(
+    client, endpoint: str, questions: List[str], rps: float, total: int
+) -> Dict:
+    """
+    Sends `total` requests at a fixed arrival rate (open loop: a slow response
+    does not delay the next request) and collects latency and stage timings.
+    """
+    from scripts.loadtest.stand_ins import new_request_timings
+
+    results = []
+
+    async def one(index: int):
+        timings = new_request_timings()
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                endpoint, json={"question": questions[index % len(questions)]}
+            )
+            status = response.status_code
+        except Exception:
+            status = 0
+        results.append(
+            {
+                "latency": time.perf_counter() - start,
+                "status": status,
+                "stages": {s: (sum(t), len(t)) for s, t in timings.items()},
+            }
+        )
+
+    start = time.perf_counter()
+    tasks = []
+    for index in range(total):
+        delay = start + index / rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(index)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    return summarize(endpoint, results, elapsed)
+
+
+def summarize(endpoint: str, results: List[Dict], elapsed: float) -> Dict:
+    latencies = np.array([r["latency"] for r in results]) * 1000
+    ok = [r for r in results if r["status"] == 200]
+    status_counts = defaultdict(int)
+    for r in results:
+        status_counts[r["status"]] += 1
+
+    stages = {}
+    for stage in STAGES:
+        per_request = [r["stages"].get(stage, (0.0, 0)) for r in results]
+        times = np.array([t for t, _ in per_request]) * 1000
+        stages[stage] = {
+            "calls_per_request": float(np.mean([n for _, n in per_request])),
+            "mean_ms": float(times.mean()),
+            "p95_ms": float(np.percentile(times, 95)),
+        }
+
+    return {
+        "endpoint": endpoint,
+        "requests": len(results),
+        "ok": len(ok),
+        "status_counts": dict(status_counts),
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "stages": stages,
+    }
+
+
+def print_report(summaries: List[Dict]):
+    print(
+        f"\n{'endpoint':<22}{'reqs':>6}{'ok':>6}{'rps':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    )
+    for s in summaries:
+        print(
+            f"{s['endpoint']:<22}{s['requests']:>6}{s['ok']:>6}"
+            f"{s['throughput_rps']:>8.1f}{s['p50_ms']:>9.0f}{s['p95_ms']:>9.0f}"
+            f"{s['p99_ms']:>9.0f}{s['max_ms']:>9.0f}"
+        )
+
+    print(
+        f"\n{'stage breakdown':<22}{'stage':<11}{'calls/req':>10}{'mean ms':>9}{'p95 ms':>9}"
+    )
+    for s in summaries:
+        for stage, values in s["stages"].items():
+            print(
+                f"{s['endpoint']:<22}{stage:<11}{values['calls_per_request']:>10.2f}"
+                f"{values['mean_ms']:>9.0f}{values['p95_ms']:>9.0f}"
+            )
+        errors = {k: v for k, v in s["status_counts"].items() if k != 200}
+        if errors:
+            print(f"{s['endpoint']:<22}non-200 responses: {errors}")
+
+
+async def run(args) -> List[Dict]:
+    import httpx
+
+    from backend.main import app
+    from scripts.loadtest.stand_ins import (
+        DEFAULT_PROFILES,
+        LatencyProfile,
+        install_stand_ins,
+    )
+    from scripts.vector.benchmark_retrieval import build_eval_set
+
+    profiles = dict(DEFAULT_PROFILES)
+    for stage in STAGES:
+        value = getattr(args, stage)
+        if value:
+            profiles[stage] = LatencyProfile.parse(value)
+    install_stand_ins(profiles, seed=args.seed)
+
+    if args.corpus:
+        questions = load_corpus(args.corpus)
+    else:
+        questions = [q["question"] for q in build_eval_set(10_000, seed=args.seed)]
+
+    summaries = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=None
+        ) as client:
+            for endpoint in args.endpoints:
+                summaries.append(
+                    await run_endpoint(
+                        client, endpoint, questions, args.rps, args.requests
+                    )
+                )
+    return summaries
+
+
+def main():
+    """
+    Offline load test of the chat API. The FastAPI app runs in-process with
+    stand-ins for Azure AI Search, Azure OpenAI (chat + embeddings) and Neo4j,
+    each with a lognormal latency profile and failure rate. Questions are
+    replayed at a target rate; the report shows throughput, latency percentiles
+    and where the time went per stage.
+    """
+    parser = argparse.ArgumentParser(description="Offline load test of the chat API")
+    parser.add_argument("--endpoints", nargs="+", default=["/chat", "/vector-chat"])
+    parser.add_argument("--corpus", help="JSONL (question/title/text) or text file")
+    parser.add_argument("--rps", type=float, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    parser.add_argument("--seed", type=int, default=0)
+    for stage in STAGES:
+        parser.add_argument(
+            f"--{stage}",
+            help=f"{stage} latency profile: median_ms,p95_ms[,failure_rate]",
+        )
+    parser.add_argument("--answer-cache", action="store_true", help="keep it enabled")
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="keep the per-client rate limit (all requests share one client)",
+    )
+    parser.add_argument(
+        "--graph-snapshot", action="store_true", help="serve graph lookups in memory"
+    )
+    parser.add_argument("--output", help="write the summaries as JSON")
+    parser.add_argument(
+        "--max-p95-ms", type=float, help="exit with 1 if any endpoint's p95 is higher"
+    )
+    args = parser.parse_args()
+
+    # The backend reads its settings at import time: set them before importing it
+    for key, value in STAND_IN_ENV.items():
+        os.environ[key] = value
+    os.environ["ANSWER_CACHE_ENABLED"] = str(args.answer_cache).lower()
+    os.environ["GRAPH_SNAPSHOT_ENABLED"] = str(args.graph_snapshot).lower()
+    os.environ["GRAPH_SNAPSHOT_RECONCILE_SECONDS"] = "0"
+    os.environ["VECTOR_BACKEND"] = "azure"
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_PER_MINUTE"] = "0"
+
+    summaries = asyncio.run(run(args))
+    print_report(summaries)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+    if args.max_p95_ms and any(s["p95_ms"] > args.max_p95_ms for s in summaries):
+        print(f"\np95 above {args.max_p95_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
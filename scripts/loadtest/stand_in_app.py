@@ -0,0 +1,19 @@
+import os
+
+import backend.main
+from scripts.loadtest.stand_ins import (
+    DEFAULT_PROFILES,
+    LatencyProfile,
+    install_stand_ins,
+)
+
+# The chat app with stand-ins installed in each worker process, for benchmarks
+# that run it under uvicorn: `uvicorn scripts.loadtest.stand_in_app:app`.
+# STAND_IN_PROFILES overrides latency profiles, e.g. "chat=0,0;search=80,250".
+profiles = dict(DEFAULT_PROFILES)
+for item in filter(None, os.environ.get("STAND_IN_PROFILES", "").split(";")):
+    stage, value = item.split("=")
+    profiles[stage] = LatencyProfile.parse(value)
+install_stand_ins(profiles, seed=os.getpid())
+
+app = backend.main.app
@@ -0,0 +1,331 @@
+import asyncio
+import contextvars
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.services.graph_snapshot import PRODUCT_RESULT_FIELDS
+from backend.services.retrievers import HashingEmbedder
+from common.constants import (
+    GRAPH_BRANDS_PATH,
+    GRAPH_EDGES_PATH,
+    GRAPH_PRODUCTS_PATH,
+    PROCESSED_VECTOR_PATHS,
+)
+from common.utils import read_jsonl
+from scripts.vector.chunking import chunk_items
+
+# Per-request stage timings {stage: [seconds, ...]}, shared with child tasks
+stage_timings: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = (
+    contextvars.ContextVar("stage_timings", default=None)
+)
+
+
+class StandInError(ConnectionError):
+    """Injected failure of a stand-in dependency."""
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Latency and failure model of a dependency: lognormal latency with the given
+    median and p95 (milliseconds), and a probability of failing each call.
+    """
+
+    median_ms: float
+    p95_ms: float
+    failure_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyProfile":
+        """Parses "median,p95[,failure_rate]", e.g. "80,250,0.01"."""
+        parts = [float(p) for p in value.split(",")]
+        return cls(*parts)
+
+    def sample(self, rng: random.Random) -> float:
+        """Returns a latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+# Default profiles, roughly what the hosted services show from Cloud Run
+DEFAULT_PROFILES = {
+    "search": LatencyProfile(80, 250),
+    "embedding": LatencyProfile(60, 200),
+    "chat": LatencyProfile(1200, 3000),
+    "neo4j": LatencyProfile(40, 150),
+}
+
+
+class _Dependency:
+    def __init__(self, stage: str, profile: LatencyProfile, seed: int):
+        self.stage = stage
+        self.profile = profile
+        self.rng = random.Random(seed)
+
+    async def call(self, latency: Optional[float] = None):
+        """Waits one sampled latency, records it, maybe raises an injected failure."""
+        if latency is None:
+            latency = self.profile.sample(self.rng)
+        start = time.perf_counter()
+        await asyncio.sleep(latency)
+        record_stage(self.stage, time.perf_counter() - start)
+        if self.rng.random() < self.profile.failure_rate:
+            raise StandInError(f"injected {self.stage} failure")
+
+
+def record_stage(stage: str, seconds: float):
+    timings = stage_timings.get()
+    if timings is not None:
+        timings[stage].append(seconds)
+
+
+def new_request_timings() -> Dict[str, List[float]]:
+    """Starts stage timing collection for the current request (task)."""
+    timings = defaultdict(list)
+    stage_timings.set(timings)
+    return timings
+
+
+# ************* Azure AI Search *************
+
+
+class StandInSearchClient(_Dependency):
+    """
+    Async SearchClient stand-in over the processed documents (chunked like the
+    real index). Keyword and vector queries are both ranked by hashing
+    embedding similarity, so results are plausible and deterministic.
+    """
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        super().__init__("search", profile, seed)
+        documents = []
+        for path in PROCESSED_VECTOR_PATHS:
+            documents.extend(
+                {k: v for k, v in d.items() if k != "embedding"}
+                for d in read_jsonl(path)
+                if (d.get("content") or "").strip()
+            )
+        self.documents = chunk_items(documents)
+        self.embedder = HashingEmbedder(512).fit([d["content"] for d in self.documents])
+        self.matrix = self.embedder.embed([d["content"] for d in self.documents])
+
+    async def search(self, search_text=None, top=5, vector_queries=None, **kwargs):
+        await self.call()
+        if vector_queries:
+            query = np.asarray(vector_queries[0].vector, dtype=np.float32)
+        else:
+            query = self.embedder.embed([search_text or ""])[0]
+        scores = self.matrix @ query
+        top_rows = np.argsort(-scores)[:top]
+        return _AsyncItems(
+            [{**self.documents[i], "@search.score": float(scores[i])} for i in top_rows]
+        )
+
+    async def get_document_count(self) -> int:
+        await self.call()
+        return len(self.documents)
+
+    async def close(self):
+        pass
+
+
+class _AsyncItems:
+    def __init__(self, items: List[dict]):
+        self.items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.items:
+            yield item
+
+
+# ************* Azure OpenAI *************
+
+
+class StandInEmbeddingClient(_Dependency):
+    """AsyncAzureOpenAI stand-in for embeddings (hashing embeddings)."""
+
+    def __init__(self, profile: LatencyProfile, embedder: HashingEmbedder, seed=0):
+        super().__init__("embedding", profile, seed)
+        self.embedder = embedder
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    async def _create(self, input: List[str], model=None, **kwargs):
+        await self.call()
+        vectors = self.embedder.embed(input)
+        data = [SimpleNamespace(embedding=v.tolist()) for v in vectors]
+        return SimpleNamespace(data=data)
+
+    async def close(self):
+        pass
+
+
+class StandInChatClient(_Dependency):
+    """
+    AsyncAzureOpenAI stand-in for chat completions. Latency scales with the
+    prompt size around the profile's median (for a ~2000-token prompt);
+    streaming spends 30% of it before the first token, the rest word by word.
+    """
+
+    ANSWER = "This is a stand-in answer based on the provided context [1]."
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        super().__init__("chat", profile, seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, stream: bool = False, **kwargs):
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        latency = self.profile.sample(self.rng) * (0.5 + prompt_chars / 16000)
+        if not stream:
+            await self.call(latency)
+            message = SimpleNamespace(content=self.ANSWER)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream(latency)
+
+    async def _stream(self, latency: float):
+        words = self.ANSWER.split(" ")
+        # Time to first token, then the remaining chunks
+        await self.call(latency * 0.3)
+        for i, word in enumerate(words):
+            await asyncio.sleep(latency * 0.7 / len(words))
+            delta = SimpleNamespace(content=word if i == 0 else f" {word}")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def close(self):
+        pass
+
+
+# ************* Neo4j *************
+
+
+class StandInNeo4jDriver(_Dependency):
+    """
+    AsyncGraphDatabase driver stand-in answering the graph_query and
+    graph_snapshot read queries from processed_data/graph.
+    """
+
+    def __init__(self, profile: LatencyProfile, seed: int = 0):
+        super().__init__("neo4j", profile, seed)
+        self.brands = {b["name"]: b for b in read_jsonl(GRAPH_BRANDS_PATH)}
+        self.products = {p["name"]: p for p in read_jsonl(GRAPH_PRODUCTS_PATH)}
+        self.brand_products = defaultdict(dict)
+        for edge in read_jsonl(GRAPH_EDGES_PATH):
+            if (
+                edge["from_brand"] in self.brands
+                and edge["to_product"] in self.products
+            ):
+                self.brand_products[edge["from_brand"]][edge["to_product"]] = None
+
+    def session(self, **kwargs):
+        return _StandInSession(self)
+
+    async def verify_connectivity(self):
+        await self.call()
+
+    async def close(self):
+        pass
+
+    def query(self, query: str, params: dict) -> List[dict]:
+        if "brand_names" in params:
+            found = {}
+            for brand in params["brand_names"]:
+                names = list(self.brand_products.get(brand, {}))
+                found.update(dict.fromkeys(names[: params["per_brand"]]))
+            found.update(
+                dict.fromkeys(n for n in params["names"] if n in self.products)
+            )
+            return [
+                {
+                    field: self.products[name].get(field)
+                    for field in PRODUCT_RESULT_FIELDS
+                }
+                for name in found
+            ]
+        if "properties(b)" in query:
+            return [{"brand": b} for b in self.brands.values()]
+        if "properties(p)" in query:
+            return [{"product": p} for p in self.products.values()]
+        if "HAS_PRODUCT" in query:
+            return [
+                {"from_brand": brand, "to_product": name}
+                for brand, names in self.brand_products.items()
+                for name in names
+            ]
+        return []
+
+
+class _StandInSession:
+    def __init__(self, driver: StandInNeo4jDriver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query: str, parameters: Optional[dict] = None, **params):
+        await self.driver.call()
+        return _StandInResult(
+            self.driver.query(query, {**(parameters or {}), **params})
+        )
+
+    async def execute_read(self, work, *args, **kwargs):
+        # The session doubles as the transaction (same run() signature)
+        return await work(self, *args, **kwargs)
+
+
+class _StandInResult:
+    def __init__(self, rows: List[dict]):
+        self.records = [SimpleNamespace(data=lambda row=row: dict(row)) for row in rows]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records:
+            yield record
+
+    async def single(self):
+        return self.records[0] if self.records else None
+
+
+# ************* Wiring *************
+
+
+def install_stand_ins(profiles: Dict[str, LatencyProfile], seed: int = 0):
+    """
+    Replaces the Azure Search, Azure OpenAI and Neo4j async clients used by the
+    request path with stand-ins. Must run before the app handles requests.
+    """
+    import httpx
+
+    import common.azure_clients as azure_clients
+    import common.http_pool as http_pool
+    import common.neo4j_client as neo4j_client
+
+    search = StandInSearchClient(profiles["search"], seed)
+    azure_clients.async_search_client = search
+    # Same embedder as the search stand-in, so vector queries rank meaningfully
+    azure_clients.async_openai_embedding_client = StandInEmbeddingClient(
+        profiles["embedding"], search.embedder, seed + 1
+    )
+    azure_clients.async_openai_chat_client = StandInChatClient(
+        profiles["chat"], seed + 2
+    )
+    neo4j_client.async_driver = StandInNeo4jDriver(profiles["neo4j"], seed + 3)
+    # Warm-up pre-connects to Azure OpenAI through the shared pool, answer locally
+    http_pool.openai_async_http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(404))
+    )
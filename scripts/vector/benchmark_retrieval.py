@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from backend.services.query_embeddings import query_embedding_cache
+from backend.services.retrievers import (
+    SEARCH_MODES,
+    AzureSearchRetriever,
+    BaseRetriever,
+    LocalVectorRetriever,
+)
+from backend.services.vector_rag_service import CHUNK_CANDIDATES_PER_DOC, group_chunks
+from common.constants import LOCAL_INDEX_DIR, PROCESSED_VECTOR_PATHS
+from common.utils import read_jsonl
+
+
+def build_eval_set(sample_size: int, seed: int = 42) -> List[Dict]:
+    """
+    Builds (question, expected document id) pairs from the processed documents.
+    Questions are phrased the way customers ask about each document type.
+    """
+    documents = []
+    for path in PROCESSED_VECTOR_PATHS:
+        documents.extend(d for d in read_jsonl(path) if d.get("title"))
+
+    templates = {
+        "product": "Tell me about {title}",
+        "recipe": "How do I make {title}?",
+        "article": "{title}",
+    }
+    random.Random(seed).shuffle(documents)
+    return [
+        {
+            "question": templates.get(d["type"], "{title}").format(title=d["title"]),
+            "expected_id": d["id"],
+        }
+        for d in documents[:sample_size]
+    ]
+
+
+def evaluate(retriever: BaseRetriever, eval_set: List[Dict], top_k: int) -> Dict:
+    """
+    Runs every question once and reports hit rate, MRR and latency.
+    Retrieved chunks are grouped by parent document, as the RAG service does.
+    """
+    latencies = []
+    hits = 0
+    reciprocal_ranks = []
+
+    for item in eval_set:
+        start = time.perf_counter()
+        chunks = retriever.search(item["question"], top_k * CHUNK_CANDIDATES_PER_DOC)
+        docs = group_chunks(chunks, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ids = [d.get("id") for d in docs]
+        if item["expected_id"] in ids:
+            hits += 1
+            reciprocal_ranks.append(1 / (ids.index(item["expected_id"]) + 1))
+        else:
+            reciprocal_ranks.append(0.0)
+
+    return {
+        f"hit@{top_k}": hits / len(eval_set),
+        "mrr": float(np.mean(reciprocal_ranks)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    """
+    Compares retrieval quality and latency of the Azure keyword/vector/hybrid
+    modes (and the local backend if its index exists). Hybrid and vector modes
+    are run twice to show the effect of the query embedding cache.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark retrieval modes")
+    parser.add_argument("--sample-size", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--skip-azure", action="store_true")
+    args = parser.parse_args()
+
+    eval_set = build_eval_set(args.sample_size)
+    runs = []
+    if not args.skip_azure:
+        for mode in SEARCH_MODES:
+            retriever = AzureSearchRetriever(mode)
+            runs.append((mode, retriever))
+            if mode != "keyword":
+                runs.append((f"{mode} (cached embedding)", retriever))
+    if os.path.exists(LOCAL_INDEX_DIR):
+        runs.append(("local", LocalVectorRetriever()))
+
+    print(f"{len(eval_set)} questions, top_k={args.top_k}\n")
+    print(f"{'mode':<28}{'hit@k':>8}{'mrr':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, retriever in runs:
+        result = evaluate(retriever, eval_set, args.top_k)
+        print(
+            f"{name:<28}{result[f'hit@{args.top_k}']:>8.3f}{result['mrr']:>8.3f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+        )
+    print(f"\nQuery embedding cache: {query_embedding_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import time
+from backend.services.retrievers import build_local_index, get_embedder
+from common.constants import PROCESSED_VECTOR_PATHS, LOCAL_INDEX_DIR
+from common.utils import read_jsonl
+from scripts.vector.chunking import CHUNK_SIZE_TOKENS, CHUNK_OVERLAP_TOKENS, chunk_items
+
+
+def main():
+    """
+    Builds the in-process vector index (VECTOR_BACKEND=local) from the
+    processed product, recipe and article documents.
+    Use `--embedder hashing` to build an index that can be queried fully offline.
+    Documents are indexed as chunks (`--chunk-size 0` indexes whole documents).
+    """
+    parser = argparse.ArgumentParser(description="Build the local vector index")
+    parser.add_argument("--embedder", choices=["azure", "hashing"], default="azure")
+    parser.add_argument("--dim", type=int, default=1024, help="hashing embedder only")
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE_TOKENS)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP_TOKENS)
+    args = parser.parse_args()
+
+    documents = []
+    for path in PROCESSED_VECTOR_PATHS:
+        documents.extend(
+            d for d in read_jsonl(path) if (d.get("content") or "").strip()
+        )
+    documents = chunk_items(documents, args.chunk_size, args.chunk_overlap)
+
+    start = time.perf_counter()
+    count = build_local_index(
+        documents, get_embedder(args.embedder, args.dim), index_dir=args.index_dir
+    )
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Indexed {count} chunks with '{args.embedder}' in {elapsed:.1f}s → {args.index_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
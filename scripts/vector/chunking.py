@@ -0,0 +1,126 @@
+import os
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+from common.tokens import count_tokens
+
+# Target chunk size in tokens (0 indexes whole documents)
+CHUNK_SIZE_TOKENS = int(os.environ.get("CHUNK_SIZE_TOKENS", 256))
+# Tokens repeated from the end of a chunk at the start of the next one
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", 32))
+
+# A piece of text that is never split: (text, starts a paragraph, tokens)
+Unit = Tuple[str, bool, int]
+
+
+def chunk_text(
+    text: str, size: int = CHUNK_SIZE_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS
+) -> List[str]:
+    """
+    Splits text into chunks of at most ~size tokens on paragraph, then sentence,
+    then word boundaries. Consecutive chunks share up to `overlap` tokens of
+    trailing sentences so a passage cut at a boundary stays retrievable.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if size <= 0 or count_tokens(text) <= size:
+        return [text]
+
+    chunks = []
+    current: List[Unit] = []
+    current_tokens = 0
+    for unit in _split_units(text, size):
+        tokens = unit[2]
+        if current and current_tokens + tokens > size:
+            chunks.append(_join(current))
+            # Carry trailing units into the next chunk, up to the overlap
+            carried, carried_tokens = [], 0
+            for prev in reversed(current):
+                if carried_tokens + prev[2] > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_tokens += prev[2]
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append(_join(current))
+    return chunks
+
+
+def chunk_items(
+    items: Iterable[dict],
+    size: int = CHUNK_SIZE_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> List[dict]:
+    """
+    Expands processed items into chunk items: same metadata, `content` set to
+    the chunk, `id` set to "<parent id>__<n>" and `parent_id`/`chunk_index`
+    linking back to the item. Chunks after the first start with the title so
+    they still say what they are about.
+    """
+    return list(iter_chunks(items, size, overlap))
+
+
+def iter_chunks(
+    items: Iterable[dict],
+    size: int = CHUNK_SIZE_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> Iterator[dict]:
+    """Streaming version of chunk_items, yields chunks as items are read."""
+    for item in items:
+        for index, chunk in enumerate(chunk_text(item["content"], size, overlap)):
+            if index > 0 and item.get("title"):
+                chunk = f"{item['title']} (continued)\n{chunk}"
+            yield {
+                **item,
+                "id": f"{item['id']}__{index}",
+                "content": chunk,
+                "parent_id": item["id"],
+                "chunk_index": index,
+            }
+
+
+# Paragraphs, with paragraphs longer than a chunk split into sentences/words
+def _split_units(text: str, size: int) -> List[Unit]:
+    units = []
+    for paragraph in re.split(r"\n+", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens <= size:
+            units.append((paragraph, True, tokens))
+            continue
+
+        pieces = []
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            if count_tokens(sentence) <= size:
+                pieces.append(sentence)
+            else:
+                pieces.extend(_split_words(sentence, size))
+        for i, piece in enumerate(pieces):
+            units.append((piece, i == 0, count_tokens(piece)))
+    return units
+
+
+def _split_words(text: str, size: int) -> List[str]:
+    parts, current = [], []
+    for word in text.split():
+        if current and count_tokens(" ".join(current + [word])) > size:
+            parts.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def _join(units: List[Unit]) -> str:
+    text = ""
+    for piece, new_paragraph, _ in units:
+        if text:
+            text += "\n" if new_paragraph else " "
+        text += piece
+    return text
@@ -1,22 +1,39 @@
+import argparse
 import os
-from common.utils import generate_id, save_json, load_json, safe_strip
+from typing import Iterable, Iterator
+from common.utils import follow_jsonl, generate_id, read_jsonl, safe_strip, write_jsonl
 from scripts.vector.indexed_document import IndexedDocument
 from common.constants import ARTICLES_PATH, PROCESSED_ARTICLES_PATH
 
 
 def main():
     """
-    Processes raw article data from JSON file, extracting relevant fields
+    Processes raw article data from a JSONL file, extracting relevant fields
     and generating a structured IndexedDocument for each article.
-    Saves the processed documents to a new JSON file for later use.
+    Articles are streamed from the raw file to the processed JSONL file.
     """
-    if not os.path.exists(ARTICLES_PATH):
-        raise FileNotFoundError(f"Raw article file not found: {ARTICLES_PATH}")
+    parser = argparse.ArgumentParser(description="Process raw articles")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="process articles while the crawler is still writing them",
+    )
+    args = parser.parse_args()
 
-    # Load articles
-    articles = load_json(ARTICLES_PATH)
+    if args.follow:
+        # Written live too, so the upload script can follow this file
+        processed = process_articles(follow_jsonl(ARTICLES_PATH))
+        count = write_jsonl(processed, PROCESSED_ARTICLES_PATH, live=True)
+    else:
+        if not os.path.exists(ARTICLES_PATH):
+            raise FileNotFoundError(f"Raw article file not found: {ARTICLES_PATH}")
+        processed = process_articles(read_jsonl(ARTICLES_PATH))
+        count = write_jsonl(processed, PROCESSED_ARTICLES_PATH)
+    print(f"Processed {count} articles → {PROCESSED_ARTICLES_PATH}")
 
-    processed = []
+
+def process_articles(articles: Iterable[dict]) -> Iterator[dict]:
+    """Yields the processed document of each raw article, skipping empty ones."""
     for article in articles:
         try:
             if not article.get("content"):
@@ -42,13 +59,11 @@ def main():
                 pruduct_label=None,
                 product_line=None,
             )
-
-            processed.append(doc.model_dump())
         except Exception as e:
             print(f"Failed to process article: {article.get('title')} → {e}")
+            continue
 
-    save_json(processed, PROCESSED_ARTICLES_PATH)
-    print(f"Processed {len(processed)} articles → {PROCESSED_ARTICLES_PATH}")
+        yield doc.model_dump()
 
 
 def build_content(article: dict) -> str:
@@ -1,9 +1,12 @@
+import argparse
 import os
+from typing import Iterable, Iterator
 from common.constants import PRODUCTS_PATH, PROCESSED_PRODUCTS_PATH
 from scripts.vector.indexed_document import IndexedDocument
 from common.utils import (
-    save_json,
-    load_json,
+    follow_jsonl,
+    read_jsonl,
+    write_jsonl,
     generate_id,
     safe_strip,
     safe_dict,
@@ -13,17 +16,32 @@ from common.utils import (
 
 def main():
     """
-    Processes raw product data from JSON file, extracting relevant fields
+    Processes raw product data from a JSONL file, extracting relevant fields
     and generating a structured IndexedDocument for each product.
-    Saves the processed documents to a new JSON file for later use.
+    Products are streamed from the raw file to the processed JSONL file.
     """
-    if not os.path.exists(PRODUCTS_PATH):
-        raise FileNotFoundError(f"Raw product file not found: {PRODUCTS_PATH}")
-
-    # Load products
-    products = load_json(PRODUCTS_PATH)
-
-    processed = []
+    parser = argparse.ArgumentParser(description="Process raw products")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="process products while the crawler is still writing them",
+    )
+    args = parser.parse_args()
+
+    if args.follow:
+        # Written live too, so the upload script can follow this file
+        processed = process_products(follow_jsonl(PRODUCTS_PATH))
+        count = write_jsonl(processed, PROCESSED_PRODUCTS_PATH, live=True)
+    else:
+        if not os.path.exists(PRODUCTS_PATH):
+            raise FileNotFoundError(f"Raw product file not found: {PRODUCTS_PATH}")
+        processed = process_products(read_jsonl(PRODUCTS_PATH))
+        count = write_jsonl(processed, PROCESSED_PRODUCTS_PATH)
+    print(f"Processed {count} products → {PROCESSED_PRODUCTS_PATH}")
+
+
+def process_products(products: Iterable[dict]) -> Iterator[dict]:
+    """Yields the processed document of each raw product, skipping invalid ones."""
     for product in products:
         try:
             _id = generate_id(product["brand"], product["title"])
@@ -46,13 +64,11 @@ def main():
                 product_label=safe_first(product.get("labels")),
                 product_line=product.get("product_line", None),
             )
-
-            processed.append(doc.model_dump())
         except Exception as e:
             print(f"Failed to process product: {product.get('name')} → {e}")
+            continue
 
-    save_json(processed, PROCESSED_PRODUCTS_PATH)
-    print(f"Processed {len(processed)} products → {PROCESSED_PRODUCTS_PATH}")
+        yield doc.model_dump()
 
 
 def build_content(product: dict) -> str:
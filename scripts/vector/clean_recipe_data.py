@@ -1,23 +1,40 @@
+import argparse
 import os
-from typing import List
+from typing import Iterable, Iterator, List
 from common.constants import RECIPES_PATH, PROCESSED_RECIPES_PATH
 from scripts.vector.indexed_document import IndexedDocument
-from common.utils import save_json, generate_id, load_json, safe_strip
+from common.utils import follow_jsonl, generate_id, read_jsonl, safe_strip, write_jsonl
 
 
 def main():
     """
-    Processes raw recipe data from JSON file, extracting relevant fields
+    Processes raw recipe data from a JSONL file, extracting relevant fields
     and generating a structured IndexedDocument for each recipe.
-    Saves the processed documents to a new JSON file for later use.
+    Recipes are streamed from the raw file to the processed JSONL file.
     """
-    if not os.path.exists(RECIPES_PATH):
-        raise FileNotFoundError(f"Raw recipe file not found: {RECIPES_PATH}")
+    parser = argparse.ArgumentParser(description="Process raw recipes")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="process recipes while the crawler is still writing them",
+    )
+    args = parser.parse_args()
 
-    # Load recipes
-    recipes = load_json(RECIPES_PATH)
+    if args.follow:
+        # Written live too, so the upload script can follow this file
+        processed = process_recipes(follow_jsonl(RECIPES_PATH))
+        count = write_jsonl(processed, PROCESSED_RECIPES_PATH, live=True)
+    else:
+        if not os.path.exists(RECIPES_PATH):
+            raise FileNotFoundError(f"Raw recipe file not found: {RECIPES_PATH}")
+        processed = process_recipes(read_jsonl(RECIPES_PATH))
+        count = write_jsonl(processed, PROCESSED_RECIPES_PATH)
 
-    processed = []
+    print(f"Processed {count} recipes → {PROCESSED_RECIPES_PATH}")
+
+
+def process_recipes(recipes: Iterable[dict]) -> Iterator[dict]:
+    """Yields the processed document of each raw recipe, skipping invalid ones."""
     for recipe in recipes:
         try:
             _id = generate_id(recipe["brand"], recipe["title"])
@@ -40,13 +57,11 @@ def main():
                 article_theme=None,
                 published_at=None,
             )
-            processed.append(doc.model_dump())
         except Exception as e:
             print(f"Failed to process recipe: {recipe.get('title')} — {e}")
+            continue
 
-    save_json(processed, PROCESSED_RECIPES_PATH)
-
-    print(f"Processed {len(processed)} recipes → {PROCESSED_RECIPES_PATH}")
+        yield doc.model_dump()
 
 
 def build_content(recipe: dict) -> str:
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from common.azure_clients import (
+    EMBEDDING_MODEL,
+    close_async_clients,
+    get_async_openai_embedding_client,
+)
+from common.resilience import backoff_delay, is_retryable
+from common.tokens import count_tokens
+
+# Batching / concurrency settings for bulk embedding
+EMBEDDING_BATCH_TOKENS = int(os.environ.get("EMBEDDING_BATCH_TOKENS", 8000))
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 16))
+EMBEDDING_CONCURRENCY = int(os.environ.get("EMBEDDING_CONCURRENCY", 4))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("EMBEDDING_MAX_RETRIES", 5))
+
+
+@dataclass
+class EmbeddingResult:
+    """
+    Output of embed_texts.
+    `embeddings[i]` is the vector for `texts[i]`, or None if that item failed;
+    `failed` lists (index, error message) for every failed item.
+    """
+
+    embeddings: List[Optional[List[float]]]
+    failed: List[Tuple[int, str]] = field(default_factory=list)
+
+
+def make_batches(
+    texts: List[str],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_items: int = EMBEDDING_BATCH_SIZE,
+) -> List[List[int]]:
+    """
+    Packs text indices into batches that stay under the token budget and item cap.
+    A text larger than the budget gets a batch of its own.
+    """
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (
+            current_tokens + tokens > max_tokens or len(current) >= max_items
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def embed_texts_async(
+    texts: List[str],
+    concurrency: int = EMBEDDING_CONCURRENCY,
+    max_retries: int = EMBEDDING_MAX_RETRIES,
+) -> EmbeddingResult:
+    """
+    Embeds texts in token-budgeted batches, several batches at a time.
+    Rate-limit and transient errors are retried with jittered exponential
+    backoff (honouring Retry-After); a batch that still fails is retried item
+    by item so only the bad inputs are reported. Output order matches the input.
+    """
+    result = EmbeddingResult(embeddings=[None] * len(texts))
+    semaphore = asyncio.Semaphore(concurrency)
+    # Retries are handled here, so disable the SDK's own retry loop
+    client = get_async_openai_embedding_client().with_options(max_retries=0)
+
+    async def run_batch(indices: List[int]):
+        # Empty texts are rejected by the API, report them instead of sending
+        valid = [i for i in indices if texts[i].strip()]
+        for i in indices:
+            if not texts[i].strip():
+                result.failed.append((i, "empty text"))
+        if not valid:
+            return
+
+        retryable = False
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    response = await client.embeddings.create(
+                        model=EMBEDDING_MODEL, input=[texts[i] for i in valid]
+                    )
+                    for item in response.data:
+                        result.embeddings[valid[item.index]] = item.embedding
+                    return
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if not is_retryable(e):
+                        break
+                    if attempt == max_retries:
+                        retryable = True
+                        break
+                    await asyncio.sleep(backoff_delay(e, attempt))
+
+        if len(valid) > 1 and not retryable:
+            # Re-run items one by one so a single bad input only fails itself
+            await asyncio.gather(*(run_batch([i]) for i in valid))
+        else:
+            result.failed.extend((i, error) for i in valid)
+
+    await asyncio.gather(*(run_batch(b) for b in make_batches(texts)))
+    result.failed.sort()
+    return result
+
+
+def embed_texts(texts: List[str], **kwargs) -> EmbeddingResult:
+    """
+    Sync entry point for scripts. The async clients and their connection pool
+    belong to this call's event loop, so they are closed before it ends.
+    """
+    if not texts:
+        return EmbeddingResult(embeddings=[])
+
+    async def run():
+        try:
+            return await embed_texts_async(texts, **kwargs)
+        finally:
+            await close_async_clients()
+
+    return asyncio.run(run())
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from common.azure_clients import EMBEDDING_MODEL, get_search_client
+from common.constants import INDEX_MANIFEST_PATH
+from common.utils import load_json, save_json
+from scripts.vector.chunking import iter_chunks
+from scripts.vector.embedding_pipeline import embed_texts
+from scripts.vector.indexed_document import IndexedDocument
+
+# Max documents per Azure indexing request (service limit is 1000)
+UPLOAD_BATCH_SIZE = 500
+# Max share of a type's indexed documents one sync may delete without
+# --allow-mass-delete
+MAX_DELETE_RATIO = float(os.environ.get("INDEX_MAX_DELETE_RATIO", 0.5))
+
+# Builds the IndexedDocument for a processed item and its embedding
+DocumentBuilder = Callable[[dict, Optional[List[float]]], IndexedDocument]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_hash(document: IndexedDocument) -> str:
+    """Hash of every indexed field except the embedding."""
+    fields = document.model_dump(exclude={"embedding"})
+    return content_hash(json.dumps(fields, sort_keys=True, ensure_ascii=False))
+
+
+def sync_documents(
+    doc_type: str,
+    items: Iterable[dict],
+    build_document: DocumentBuilder,
+    full: bool = False,
+    reconcile: bool = False,
+    allow_mass_delete: bool = False,
+    manifest_path: str = INDEX_MANIFEST_PATH,
+):
+    """
+    Incrementally syncs processed items of one type to Azure AI Search.
+    The manifest records, per document id, the content hash, the embedding
+    model and a hash of the other fields. Only new documents or documents
+    whose content/model changed are re-embedded and uploaded; documents whose
+    other fields changed are merged without a new embedding; ids of this type
+    that disappeared are deleted from the index. `full=True` re-embeds everything.
+    With `reconcile` (implied by `full`) the index itself is listed too, so
+    documents of this type the manifest does not know about (indexed before the
+    manifest existed, or under the old unchunked ids) are deleted as well.
+    Deletions are skipped when no items were read or when they exceed
+    MAX_DELETE_RATIO of the indexed documents, unless `allow_mass_delete`.
+    Items are indexed as chunks (see chunking.chunk_items), so the manifest and
+    index are keyed by chunk id. Items are streamed: only the ids and the items
+    to embed or update are kept in memory.
+    """
+    manifest: Dict[str, dict] = (
+        load_json(manifest_path) if os.path.exists(manifest_path) else {}
+    )
+
+    to_embed, to_merge = [], []
+    current_ids, total = set(), 0
+    for item in iter_chunks(items):
+        current_ids.add(item["id"])
+        total += 1
+        previous = manifest.get(item["id"])
+        needs_embedding = (
+            full
+            or previous is None
+            or previous.get("content_hash") != content_hash(item["content"])
+            or previous.get("model") != EMBEDDING_MODEL
+        )
+        if needs_embedding:
+            to_embed.append(item)
+        elif previous.get("document_hash") != document_hash(build_document(item, None)):
+            to_merge.append(item)
+
+    indexed_ids = {
+        _id for _id, entry in manifest.items() if entry.get("type") == doc_type
+    }
+    to_delete = [_id for _id in indexed_ids if _id not in current_ids]
+    if full or reconcile:
+        listed_ids = _index_ids(doc_type)
+        stale = listed_ids - current_ids - indexed_ids
+        print(f"[{doc_type}] {len(stale)} documents in the index but not in the source")
+        to_delete.extend(stale)
+        indexed_ids |= listed_ids
+    to_delete.sort()
+
+    # A missing or truncated source (failed crawl, wrong path) must not wipe
+    # the index: refuse to delete everything or most of a type at once
+    if to_delete and not allow_mass_delete:
+        if total == 0 or len(to_delete) > MAX_DELETE_RATIO * len(indexed_ids):
+            print(
+                f"[{doc_type}] Not deleting {len(to_delete)} of {len(indexed_ids)} "
+                f"indexed documents ({total} read from the source). "
+                "Check the source file, or use --allow-mass-delete."
+            )
+            to_delete = []
+
+    print(
+        f"[{doc_type}] {len(to_embed)} to embed, {len(to_merge)} to update, "
+        f"{len(to_delete)} to delete, "
+        f"{total - len(to_embed) - len(to_merge)} unchanged"
+    )
+
+    # New or changed content: embed and upload
+    embedded = embed_texts([item["content"] for item in to_embed])
+    for index, error in embedded.failed:
+        print(f"Error embedding {doc_type} {to_embed[index]['title']}: {error}")
+
+    uploads = {}
+    for item, embedding in zip(to_embed, embedded.embeddings):
+        if embedding is None:
+            continue
+        try:
+            uploads[item["id"]] = (item, build_document(item, embedding))
+        except Exception as e:
+            print(f"Error processing {doc_type} {item['title']}: {e}")
+
+    succeeded = _index(
+        get_search_client().merge_or_upload_documents,
+        [doc.model_dump() for _, doc in uploads.values()],
+    )
+    for _id in succeeded:
+        item, document = uploads[_id]
+        manifest[_id] = _manifest_entry(doc_type, item, document)
+
+    # Metadata-only changes: merge the fields, keep the stored embedding
+    merges = {item["id"]: (item, build_document(item, None)) for item in to_merge}
+    succeeded_merges = _index(
+        get_search_client().merge_documents,
+        [doc.model_dump(exclude={"embedding"}) for _, doc in merges.values()],
+    )
+    for _id in succeeded_merges:
+        item, document = merges[_id]
+        manifest[_id] = _manifest_entry(doc_type, item, document)
+
+    # Removed items
+    deleted = _index(
+        get_search_client().delete_documents, [{"id": _id} for _id in to_delete]
+    )
+    for _id in deleted:
+        manifest.pop(_id, None)
+
+    save_json(manifest, manifest_path)
+    print(
+        f"[{doc_type}] uploaded {len(succeeded)}, updated {len(succeeded_merges)}, "
+        f"deleted {len(deleted)} documents in Azure AI Search"
+    )
+
+
+def _index(action: Callable, documents: List[dict]) -> List[str]:
+    """Runs an indexing action in batches and returns the keys that succeeded."""
+    succeeded = []
+    for start in range(0, len(documents), UPLOAD_BATCH_SIZE):
+        batch = documents[start : start + UPLOAD_BATCH_SIZE]
+        try:
+            results = action(documents=batch)
+        except Exception as e:
+            print(f"Error indexing documents in Azure Search: {e}")
+            continue
+        for result in results:
+            if result.succeeded:
+                succeeded.append(result.key)
+            else:
+                print(f"Failed to index {result.key}: {result.error_message}")
+    return succeeded
+
+
+def _index_ids(doc_type: str) -> Set[str]:
+    """Ids of all documents of one type currently in the index."""
+    try:
+        results = get_search_client().search(
+            search_text="*", filter=f"type eq '{doc_type}'", select=["id"]
+        )
+        return {result["id"] for result in results}
+    except Exception as e:
+        print(f"Error listing {doc_type} documents in Azure Search: {e}")
+        return set()
+
+
+def _manifest_entry(doc_type: str, item: dict, document: IndexedDocument) -> dict:
+    return {
+        "type": doc_type,
+        "content_hash": content_hash(item["content"]),
+        "document_hash": document_hash(document),
+        "model": EMBEDDING_MODEL,
+    }
@@ -15,6 +15,10 @@ class IndexedDocument(BaseModel):
     # sourcename: Optional[str] = None
     embedding: Optional[List[float]] = None  # Embedding vector for search
 
+    # Chunk fields (a chunk's id is "<parent_id>__<chunk_index>")
+    parent_id: Optional[str] = None  # id of the processed item the chunk belongs to
+    chunk_index: Optional[int] = None
+
     # Recipe-specific fields
     recipe_tags: Optional[List[str]] = None
 
@@ -1,47 +1,78 @@
+import argparse
+import os
+from typing import List, Optional
 from scripts.vector.indexed_document import IndexedDocument
+from scripts.vector.index_sync import sync_documents
 from common.constants import PROCESSED_ARTICLES_PATH
-from common.azure_clients import search_client, generate_embeddings
-from common.utils import load_json
-
-
-# Load the articles data from JSON file
-processed_articles = load_json(PROCESSED_ARTICLES_PATH)
-
-# Prepare the documents with embeddings
-documents = []
-for article in processed_articles:
-    try:
-        article_content = article.get("content", "")
-        embedding = generate_embeddings([article_content])[0]
-
-        document = IndexedDocument(
-            id=article["id"],
-            type=article["type"],
-            title=article["title"],
-            brand=None,
-            content=article_content,
-            image=article.get("image", None),
-            created_at=article.get("created_at", None),
-            sourcepage=article.get("sourcepage", None),
-            embedding=embedding,
-            recipe_tags=[],
-            product_category=None,
-            product_label=None,
-            product_line=None,
-            article_theme=article.get("article_theme", None),
-            published_at=article.get("published_at", None),
-        )
-        documents.append(document)
-        # print(f"Processed: {article['title']}")
-    except Exception as e:
-        print(f"Error processing article {article['title']}: {e}")
-
-# Upload documents with embeddings to Azure Cognitive Search
-if documents:
-    try:
-        search_client.upload_documents(documents=documents)
-        print(
-            f"Successfully uploaded {len(documents)} documents to Azure Cognitive Search!"
+from common.utils import follow_jsonl, read_jsonl
+
+
+def build_document(article: dict, embedding: Optional[List[float]]) -> IndexedDocument:
+    return IndexedDocument(
+        id=article["id"],
+        type=article["type"],
+        title=article["title"],
+        brand=None,
+        content=article.get("content", ""),
+        image=article.get("image", None),
+        created_at=article.get("created_at", None),
+        sourcepage=article.get("sourcepage", None),
+        embedding=embedding,
+        parent_id=article.get("parent_id", None),
+        chunk_index=article.get("chunk_index", None),
+        recipe_tags=[],
+        product_category=None,
+        product_label=None,
+        product_line=None,
+        article_theme=article.get("article_theme", None),
+        published_at=article.get("published_at", None),
+    )
+
+
+def main():
+    """
+    Embeds and uploads new or changed articles to Azure AI Search,
+    and removes articles that no longer exist. Use --full to re-embed everything
+    and --reconcile to also delete indexed articles the manifest does not track.
+    """
+    parser = argparse.ArgumentParser(description="Upload articles to Azure AI Search")
+    parser.add_argument("--full", action="store_true", help="re-embed all articles")
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="also delete indexed articles missing from the source (implied by --full)",
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="delete even if most indexed articles are missing from the source",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="read articles while the cleaning script is still writing them",
+    )
+    args = parser.parse_args()
+
+    if not args.follow and not os.path.exists(PROCESSED_ARTICLES_PATH):
+        raise FileNotFoundError(
+            f"Processed article file not found: {PROCESSED_ARTICLES_PATH}"
         )
-    except Exception as e:
-        print(f"Error uploading documents to Azure Search: {e}")
+
+    # Stream the articles data from the JSONL file
+    read = follow_jsonl if args.follow else read_jsonl
+    processed_articles = read(PROCESSED_ARTICLES_PATH)
+    processed_articles = (a for a in processed_articles if a.get("content", "").strip())
+
+    sync_documents(
+        "article",
+        processed_articles,
+        build_document,
+        full=args.full,
+        reconcile=args.reconcile,
+        allow_mass_delete=args.allow_mass_delete,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,86 @@
+import argparse
+import os
+from typing import Iterable, Iterator, List, Optional
 from scripts.vector.indexed_document import IndexedDocument
+from scripts.vector.index_sync import sync_documents
 from common.constants import PROCESSED_PRODUCTS_PATH
-from common.azure_clients import search_client, generate_embeddings
-from common.utils import load_json
+from common.utils import follow_jsonl, read_jsonl
 
 
-# Load the products data from JSON file
-processed_products = load_json(PROCESSED_PRODUCTS_PATH)
+def build_document(product: dict, embedding: Optional[List[float]]) -> IndexedDocument:
+    return IndexedDocument(
+        id=product["id"],
+        type=product["type"],
+        title=product["title"],
+        brand=product["brand"],
+        content=product.get("content", ""),
+        image=product.get("image", None),
+        created_at=product.get("created_at", None),
+        sourcepage=product.get("sourcepage", None),
+        embedding=embedding,
+        parent_id=product.get("parent_id", None),
+        chunk_index=product.get("chunk_index", None),
+        recipe_tags=[],
+        product_category=product.get("product_category", None),
+        product_label=product.get("product_label", None),
+        product_line=product.get("product_line", None),
+        article_theme=None,
+        published_at=None,
+    )
 
-# Prepare the documents with embeddings
-documents = []
-for product in processed_products:
-    try:
-        product_content = product.get("content", "")
-        if not product_content.strip():
-            # Skip products without content
+
+def main():
+    """
+    Embeds and uploads new or changed products to Azure AI Search,
+    and removes products that no longer exist. Use --full to re-embed everything
+    and --reconcile to also delete indexed products the manifest does not track.
+    """
+    parser = argparse.ArgumentParser(description="Upload products to Azure AI Search")
+    parser.add_argument("--full", action="store_true", help="re-embed all products")
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="also delete indexed products missing from the source (implied by --full)",
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="delete even if most indexed products are missing from the source",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="read products while the cleaning script is still writing them",
+    )
+    args = parser.parse_args()
+
+    if not args.follow and not os.path.exists(PROCESSED_PRODUCTS_PATH):
+        raise FileNotFoundError(
+            f"Processed product file not found: {PROCESSED_PRODUCTS_PATH}"
+        )
+
+    # Stream the products data from the JSONL file
+    read = follow_jsonl if args.follow else read_jsonl
+    processed_products = read(PROCESSED_PRODUCTS_PATH)
+
+    sync_documents(
+        "product",
+        with_content(processed_products),
+        build_document,
+        full=args.full,
+        reconcile=args.reconcile,
+        allow_mass_delete=args.allow_mass_delete,
+    )
+
+
+# Skip products without content
+def with_content(products: Iterable[dict]) -> Iterator[dict]:
+    for product in products:
+        if not product.get("content", "").strip():
             print(f"Skipping product {product['title']} due to missing content.")
             continue
-        embedding = generate_embeddings([product_content])[0]
-
-        document = IndexedDocument(
-            id=product["id"],
-            type=product["type"],
-            title=product["title"],
-            brand=product["brand"],
-            content=product_content,
-            image=product.get("image", None),
-            created_at=product.get("created_at", None),
-            sourcepage=product.get("sourcepage", None),
-            embedding=embedding,
-            recipe_tags=[],
-            product_category=product.get("product_category", None),
-            product_label=product.get("product_label", None),
-            product_line=product.get("product_line", None),
-            article_theme=None,
-            published_at=None,
-        )
-        documents.append(document)
-        # print(f"Processed: {product['title']}")
-    except Exception as e:
-        print(f"Error processing product {product['title']}: {e}")
-
-# Upload documents with embeddings to Azure Cognitive Search
-if documents:
-    try:
-        search_client.upload_documents(documents=documents)
-        print(
-            f"Successfully uploaded {len(documents)} documents to Azure Cognitive Search!"
-        )
-    except Exception as e:
-        print(f"Error uploading documents to Azure Search: {e}")
+        yield product
+
+
+if __name__ == "__main__":
+    main()
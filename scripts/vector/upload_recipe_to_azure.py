@@ -1,46 +1,78 @@
+import argparse
+import os
+from typing import List, Optional
 from scripts.vector.indexed_document import IndexedDocument
+from scripts.vector.index_sync import sync_documents
 from common.constants import PROCESSED_RECIPES_PATH
-from common.azure_clients import search_client, generate_embeddings
-from common.utils import load_json
-
-# Load the recipes data from JSON file
-processed_recipes = load_json(PROCESSED_RECIPES_PATH)
-
-# Prepare the documents with embeddings
-documents = []
-for recipe in processed_recipes:
-    try:
-        recipe_content = recipe.get("content", "")
-        embedding = generate_embeddings([recipe_content])[0]
-
-        document = IndexedDocument(
-            id=recipe["id"],
-            type=recipe["type"],
-            title=recipe["title"],
-            brand=recipe["brand"],
-            content=recipe_content,
-            image=recipe.get("image", None),
-            created_at=recipe.get("created_at", None),
-            sourcepage=recipe.get("sourcepage", None),
-            embedding=embedding,
-            recipe_tags=recipe.get("recipe_tags", []),
-            product_category=None,
-            product_label=None,
-            product_line=None,
-            article_theme=None,
-            published_at=None,
-        )
-        documents.append(document)
-        # print(f"Processed: {recipe['title']}")
-    except Exception as e:
-        print(f"Error processing recipe {recipe['title']}: {e}")
-
-# Upload documents with embeddings to Azure Cognitive Search
-if documents:
-    try:
-        search_client.upload_documents(documents=documents)
-        print(
-            f"Successfully uploaded {len(documents)} documents to Azure Cognitive Search!"
+from common.utils import follow_jsonl, read_jsonl
+
+
+def build_document(recipe: dict, embedding: Optional[List[float]]) -> IndexedDocument:
+    return IndexedDocument(
+        id=recipe["id"],
+        type=recipe["type"],
+        title=recipe["title"],
+        brand=recipe["brand"],
+        content=recipe.get("content", ""),
+        image=recipe.get("image", None),
+        created_at=recipe.get("created_at", None),
+        sourcepage=recipe.get("sourcepage", None),
+        embedding=embedding,
+        parent_id=recipe.get("parent_id", None),
+        chunk_index=recipe.get("chunk_index", None),
+        recipe_tags=recipe.get("recipe_tags", []),
+        product_category=None,
+        product_label=None,
+        product_line=None,
+        article_theme=None,
+        published_at=None,
+    )
+
+
+def main():
+    """
+    Embeds and uploads new or changed recipes to Azure AI Search,
+    and removes recipes that no longer exist. Use --full to re-embed everything
+    and --reconcile to also delete indexed recipes the manifest does not track.
+    """
+    parser = argparse.ArgumentParser(description="Upload recipes to Azure AI Search")
+    parser.add_argument("--full", action="store_true", help="re-embed all recipes")
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="also delete indexed recipes missing from the source (implied by --full)",
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="delete even if most indexed recipes are missing from the source",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="read recipes while the cleaning script is still writing them",
+    )
+    args = parser.parse_args()
+
+    if not args.follow and not os.path.exists(PROCESSED_RECIPES_PATH):
+        raise FileNotFoundError(
+            f"Processed recipe file not found: {PROCESSED_RECIPES_PATH}"
         )
-    except Exception as e:
-        print(f"Error uploading documents to Azure Search: {e}")
+
+    # Stream the recipes data from the JSONL file
+    read = follow_jsonl if args.follow else read_jsonl
+    processed_recipes = read(PROCESSED_RECIPES_PATH)
+    processed_recipes = (r for r in processed_recipes if r.get("content", "").strip())
+
+    sync_documents(
+        "recipe",
+        processed_recipes,
+        build_document,
+        full=args.full,
+        reconcile=args.reconcile,
+        allow_mass_delete=args.allow_mass_delete,
+    )
+
+
+if __name__ == "__main__":
+    main()
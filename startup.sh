@@ -1,3 +1,19 @@
 #!/bin/bash
 
-uvicorn backend.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+# Worker processes: WEB_CONCURRENCY, or "auto" for one per CPU (default 1)
+WORKERS=${WEB_CONCURRENCY:-1}
+if [ "$WORKERS" = "auto" ]; then
+    WORKERS=$(nproc)
+fi
+export WEB_CONCURRENCY=$WORKERS
+
+if [ "$WORKERS" -gt 1 ]; then
+    # State shared by the workers (answer cache, graph snapshot) and their
+    # metrics, in memory (tmpfs) and reset on every start
+    export SHARED_STATE_DIR=${SHARED_STATE_DIR:-/dev/shm/rag-chatbot}
+    export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-$SHARED_STATE_DIR/metrics}
+    mkdir -p "$SHARED_STATE_DIR" "$PROMETHEUS_MULTIPROC_DIR"
+    rm -f "$SHARED_STATE_DIR"/state.db* "$PROMETHEUS_MULTIPROC_DIR"/*.db
+fi
+
+exec uvicorn backend.main:app --host 0.0.0.0 --port $PORT --workers $WORKERS
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from backend.services.admission import (
+    AdmissionRejected,
+    LLMAdmission,
+    TokenBucketLimiter,
+    client_id,
+)
+from backend.services.shared_state import SharedState
+from common.resilience import UpstreamThrottled
+
+
+def request(forwarded=None, host="10.0.0.1"):
+    headers = []
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+
+def test_spoofed_forwarded_for_keeps_the_bucket():
+    limiter = TokenBucketLimiter(per_minute=60, burst=2)
+    # Cloud Run appends the real address after whatever the client sent
+    for spoofed in ("1.1.1.1", "2.2.2.2"):
+        limiter.acquire(client_id(request(f"{spoofed}, 203.0.113.7")))
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire(client_id(request("3.3.3.3, 203.0.113.7")))
+    assert rejected.value.status_code == 429
+
+
+@pytest.mark.parametrize(
+    "forwarded, hops, expected",
+    [
+        ("1.1.1.1, 203.0.113.7", 1, "203.0.113.7"),
+        ("1.1.1.1, 203.0.113.7, 10.1.1.1", 2, "203.0.113.7"),
+        ("203.0.113.7", 2, "10.0.0.1"),
+        ("1.1.1.1", 0, "10.0.0.1"),
+        (None, 1, "10.0.0.1"),
+    ],
+)
+def test_client_id(forwarded, hops, expected):
+    assert client_id(request(forwarded), trusted_hops=hops) == expected
+
+
+def test_rate_limit_buckets_are_shared_between_workers(tmp_path):
+    workers = [SharedState(str(tmp_path)) for _ in range(2)]
+    limiters = [TokenBucketLimiter(per_minute=1, burst=3, shared=s) for s in workers]
+    for i in range(3):
+        limiters[i % 2].acquire("203.0.113.7")
+    with pytest.raises(AdmissionRejected):
+        limiters[1].acquire("203.0.113.7")
+
+
+def test_full_queue_is_rejected_right_away():
+    admission = LLMAdmission(max_concurrency=1, max_queue=1, queue_timeout=1)
+
+    async def main():
+        async with admission.slot():
+            waiting = asyncio.ensure_future(admission.slot().__aenter__())
+            await asyncio.sleep(0)
+            try:
+                with pytest.raises(AdmissionRejected) as rejected:
+                    async with admission.slot():
+                        pass
+            finally:
+                waiting.cancel()
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"]
+
+
+def test_slow_queue_times_out():
+    admission = LLMAdmission(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+
+    async def main():
+        async with admission.slot():
+            async with admission.slot():
+                pass
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(main())
+    assert rejected.value.status_code == 503
+
+
+def test_upstream_throttling_is_a_rejection():
+    admission = LLMAdmission()
+
+    async def main():
+        async with admission.slot():
+            raise UpstreamThrottled("chat", "429", retry_after=7)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(main())
+    assert rejected.value.status_code == 503
+    assert rejected.value.retry_after == 7
+    assert admission.stats()["waiting"] == 0
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import backend.services.answer_cache as answer_cache_module
+from backend.services.answer_cache import AnswerCache
+
+EMBEDDINGS = {
+    "is kitkat gluten free": [1.0, 0.0, 0.0],
+    "is aero gluten free": [0.99, 0.1, 0.0],
+    "does kitkat contain gluten": [0.995, 0.05, 0.0],
+}
+BRANDS = ("KitKat", "Aero")
+
+
+class StubEmbeddings:
+    async def embed_async(self, question):
+        return EMBEDDINGS[question.lower()]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(answer_cache_module, "query_embedding_cache", StubEmbeddings())
+    return AnswerCache(
+        shared=None,
+        similarity_threshold=0.95,
+        match_entities=lambda q: frozenset(b for b in BRANDS if b.lower() in q.lower()),
+    )
+
+
+def ask(cache, question):
+    return asyncio.run(cache.lookup("hybrid", question))
+
+
+def store(cache, question, answer):
+    _, embedding = ask(cache, question)
+    cache.store("hybrid", question, {"answer": answer, "sources": []}, embedding)
+
+
+def test_semantic_hit_for_the_same_brand(cache):
+    store(cache, "Is KitKat gluten free", "KitKat answer")
+    result, _ = ask(cache, "Does KitKat contain gluten")
+    assert result["answer"] == "KitKat answer"
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_no_semantic_hit_for_another_brand(cache):
+    store(cache, "Is KitKat gluten free", "KitKat answer")
+    result, _ = ask(cache, "Is Aero gluten free")
+    assert result is None
+    assert cache.stats()["semantic_hits"] == 0
+
+
+def test_invalidate_by_entity(cache):
+    cache.store(
+        "hybrid",
+        "Is KitKat gluten free",
+        {"answer": "KitKat answer", "sources": [], "entities": ["KitKat"]},
+    )
+    assert cache.invalidate(["kitkat"]) == 1
+    assert ask(cache, "Is KitKat gluten free")[0] is None
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import backend.api.chat as chat
+from common.resilience import UpstreamError, UpstreamTimeout
+
+
+class StubService:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+
+    async def answer_question_async(self, question):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(chat.router)
+    return TestClient(app)
+
+
+def stub_services(monkeypatch, service):
+    async def get_rag_services():
+        return {"hybrid": service, "vector": service}
+
+    monkeypatch.setattr(chat, "get_rag_services", get_rag_services)
+
+
+@pytest.mark.parametrize("endpoint", ["/chat", "/vector-chat"])
+def test_empty_answer_is_422(client, monkeypatch, endpoint):
+    stub_services(monkeypatch, StubService(result={"answer": " ", "sources": []}))
+    response = client.post(endpoint, json={"question": "What is KitKat?"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "No answer generated for the given question."
+
+
+@pytest.mark.parametrize("endpoint", ["/chat", "/vector-chat"])
+@pytest.mark.parametrize(
+    "error, status_code",
+    [
+        (UpstreamError("chat", "server error"), 502),
+        (UpstreamTimeout("search", "timed out"), 504),
+    ],
+)
+def test_upstream_errors(client, monkeypatch, endpoint, error, status_code):
+    stub_services(monkeypatch, StubService(error=error))
+    response = client.post(endpoint, json={"question": "What is KitKat?"})
+    assert response.status_code == status_code
+    assert response.json()["detail"].startswith("Upstream failed")
+
+
+def test_services_are_built_once(monkeypatch):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"hybrid": "hybrid", "vector": "vector"}
+
+    monkeypatch.setattr(chat, "_build_rag_services", build)
+    monkeypatch.setattr(chat, "_rag_services_build", None)
+
+    async def first_requests():
+        return await asyncio.gather(*(chat.get_rag_services() for _ in range(5)))
+
+    results = asyncio.run(first_requests())
+    assert len(builds) == 1
+    assert all(services is results[0] for services in results)
@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+import scripts.vector.embedding_pipeline as embedding_pipeline
+
+
+class StubEmbeddings:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def create(self, model, input):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(t))])
+            for i, t in enumerate(input)
+        ]
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    stub = StubEmbeddings([])
+    client = SimpleNamespace(embeddings=stub, with_options=lambda **kwargs: client)
+    monkeypatch.setattr(
+        embedding_pipeline, "get_async_openai_embedding_client", lambda: client
+    )
+    monkeypatch.setattr(embedding_pipeline, "backoff_delay", lambda error, attempt: 0)
+    return stub
+
+
+def embed(texts):
+    return asyncio.run(embedding_pipeline.embed_texts_async(texts))
+
+
+def test_transient_errors_are_retried(embeddings):
+    request = httpx.Request("POST", "https://example.com")
+    embeddings.errors = [APIConnectionError(request=request)]
+    result = embed(["a", "bb"])
+    assert result.embeddings == [[1.0], [2.0]]
+    assert result.failed == []
+    assert embeddings.calls == 2
+
+
+def test_other_errors_fail_only_the_bad_items(embeddings):
+    embeddings.errors = [ValueError("bad input"), ValueError("bad input")]
+    result = embed(["a", "bb", ""])
+    assert result.embeddings == [None, [2.0], None]
+    assert [i for i, _ in result.failed] == [0, 2]
+
+
+def test_batches_stay_under_the_token_budget():
+    batches = embedding_pipeline.make_batches(["word " * 100] * 5, max_tokens=250)
+    assert all(len(batch) <= 2 for batch in batches)
+    assert sorted(i for batch in batches for i in batch) == list(range(5))
@@ -0,0 +1,69 @@
+import asyncio
+
+import backend.services.graph_snapshot as graph_snapshot_module
+from backend.services.graph_snapshot import GraphSnapshot
+
+BRANDS = [{"brand": {"name": "KitKat"}}]
+PRODUCTS = [{"product": {"name": f"KitKat {n}"}} for n in ("Chunky", "Mini", "Duo")]
+EDGES = [{"from_brand": "KitKat", "to_product": p["product"]["name"]} for p in PRODUCTS]
+
+
+class StubResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aiter__(self):
+        for row in self.rows:
+            yield type("Record", (), {"data": lambda self, row=row: row})()
+
+
+class StubSession:
+    def __init__(self, loading: asyncio.Event):
+        self.loading = loading
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query):
+        # Hold the reload so writes land while it is in flight
+        await self.loading.wait()
+        if "RETURN properties(b)" in query:
+            return StubResult(BRANDS)
+        if "RETURN properties(p)" in query:
+            return StubResult(PRODUCTS)
+        return StubResult(EDGES)
+
+
+def snapshot_loading(monkeypatch):
+    loading = asyncio.Event()
+    driver = type("Driver", (), {"session": lambda self: StubSession(loading)})()
+    monkeypatch.setattr(graph_snapshot_module, "get_async_neo4j_driver", lambda: driver)
+    return GraphSnapshot(shared=None), loading
+
+
+def test_lookup_before_loading_falls_back():
+    assert GraphSnapshot(shared=None).lookup(["KitKat"], [], per_brand=2) is None
+
+
+def test_writes_during_a_reload_are_kept(monkeypatch):
+    async def main():
+        snapshot, loading = snapshot_loading(monkeypatch)
+        reload = asyncio.ensure_future(snapshot.load_from_neo4j())
+        await asyncio.sleep(0)
+        # Written after Neo4j was read: the reloaded state must not drop it
+        snapshot.apply_write("product", {"name": "KitKat Gold", "label": "New"})
+        snapshot.apply_write(
+            "edge", {"from_brand": "KitKat", "to_product": "KitKat Gold"}
+        )
+        loading.set()
+        await reload
+        return snapshot
+
+    snapshot = asyncio.run(main())
+    names = [p["name"] for p in snapshot.lookup(["KitKat"], [], per_brand=10)]
+    assert names == ["KitKat Chunky", "KitKat Mini", "KitKat Duo", "KitKat Gold"]
+    assert snapshot.lookup([], ["KitKat Gold"], per_brand=0)[0]["label"] == "New"
+    assert snapshot.lookup(["KitKat"], [], per_brand=2)[1]["name"] == "KitKat Mini"
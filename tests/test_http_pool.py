@@ -0,0 +1,30 @@
+import common.http_pool as http_pool
+
+
+def gauge(pool, state):
+    return http_pool.HTTP_POOL_CONNECTIONS.labels(pool=pool, state=state)._value.get()
+
+
+def test_pool_gauges_are_written_in_multiprocess_mode(monkeypatch):
+    monkeypatch.setattr(http_pool, "PROMETHEUS_MULTIPROC_DIR", "/tmp/metrics")
+    monkeypatch.setattr(http_pool, "_pool_counters", {})
+    counts = {"busy": 2, "idle": 3}
+    http_pool._watch_pool("test", lambda: counts["busy"], lambda: counts["idle"])
+    assert (gauge("test", "busy"), gauge("test", "idle")) == (2, 3)
+
+    counts["busy"] = 0
+    http_pool._update_pool_gauges()
+    assert gauge("test", "busy") == 0
+
+
+def test_a_failing_counter_keeps_the_last_values(monkeypatch):
+    monkeypatch.setattr(http_pool, "_pool_counters", {})
+    http_pool._pool_counters["broken"] = (lambda: 1, lambda: 1)
+    http_pool._update_pool_gauges()
+
+    def changed():
+        raise RuntimeError("dictionary changed size during iteration")
+
+    http_pool._pool_counters["broken"] = (changed, changed)
+    http_pool._update_pool_gauges()
+    assert gauge("broken", "busy") == 1
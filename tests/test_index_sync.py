@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+import scripts.vector.index_sync as index_sync
+from scripts.vector.embedding_pipeline import EmbeddingResult
+
+
+class Result:
+    def __init__(self, key):
+        self.key = key
+        self.succeeded = True
+        self.error_message = None
+
+
+class StubSearchClient:
+    def __init__(self, indexed_ids=()):
+        self.indexed_ids = list(indexed_ids)
+        self.deleted = []
+
+    def search(self, **kwargs):
+        return [{"id": _id} for _id in self.indexed_ids]
+
+    def delete_documents(self, documents):
+        self.deleted += [d["id"] for d in documents]
+        return [Result(d["id"]) for d in documents]
+
+    def merge_or_upload_documents(self, documents):
+        return [Result(d["id"]) for d in documents]
+
+    def merge_documents(self, documents):
+        return [Result(d["id"]) for d in documents]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = StubSearchClient()
+    monkeypatch.setattr(index_sync, "get_search_client", lambda: client)
+    monkeypatch.setattr(
+        index_sync,
+        "embed_texts",
+        lambda texts: EmbeddingResult(embeddings=[[0.0]] * len(texts)),
+    )
+    return client
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    path = tmp_path / "manifest.json"
+    entries = {f"p{i}__0": {"type": "product"} for i in range(5)}
+    path.write_text(json.dumps(entries))
+    return str(path)
+
+
+def build_document(item, embedding):
+    return index_sync.IndexedDocument(
+        id=item["id"],
+        type="product",
+        title=item["title"],
+        content=item["content"],
+        embedding=embedding,
+        parent_id=item.get("parent_id"),
+        chunk_index=item.get("chunk_index"),
+    )
+
+
+def products(*ids):
+    return [{"id": _id, "title": _id, "content": f"About {_id}."} for _id in ids]
+
+
+def test_no_source_items_deletes_nothing(client, manifest_path):
+    index_sync.sync_documents(
+        "product", [], build_document, reconcile=True, manifest_path=manifest_path
+    )
+    assert client.deleted == []
+    assert len(json.load(open(manifest_path))) == 5
+
+
+def test_mass_delete_needs_opt_in(client, manifest_path):
+    index_sync.sync_documents(
+        "product", products("p0"), build_document, manifest_path=manifest_path
+    )
+    assert client.deleted == []
+
+    index_sync.sync_documents(
+        "product",
+        products("p0"),
+        build_document,
+        allow_mass_delete=True,
+        manifest_path=manifest_path,
+    )
+    assert client.deleted == [f"p{i}__0" for i in range(1, 5)]
+
+
+def test_removed_items_and_untracked_documents_are_deleted(client, manifest_path):
+    client.indexed_ids = ["p0__0", "p1__0", "old-unchunked-id"]
+    index_sync.sync_documents(
+        "product",
+        products("p0", "p1", "p2", "p3"),
+        build_document,
+        reconcile=True,
+        manifest_path=manifest_path,
+    )
+    assert client.deleted == ["old-unchunked-id", "p4__0"]
+    assert "p4__0" not in json.load(open(manifest_path))
+
+
+def test_embedding_nothing_opens_no_client(monkeypatch):
+    import scripts.vector.embedding_pipeline as embedding_pipeline
+
+    def no_client():
+        raise AssertionError("client created")
+
+    monkeypatch.setattr(
+        embedding_pipeline, "get_async_openai_embedding_client", no_client
+    )
+    assert embedding_pipeline.embed_texts([]).embeddings == []
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+
+import pytest
+
+from common.utils import JsonlWriter, follow_jsonl, read_jsonl, write_jsonl
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "products.jsonl")
+    write_jsonl([{"title": "previous"}], path)
+    return path
+
+
+def test_failed_run_keeps_previous_file(path):
+    with pytest.raises(RuntimeError):
+        with JsonlWriter(path, flush=True) as writer:
+            writer.write({"title": "new"})
+            raise RuntimeError("crawl failed")
+    assert list(read_jsonl(path)) == [{"title": "previous"}]
+    # What was scraped so far stays in the partial file
+    assert list(read_jsonl(f"{path}.partial")) == [{"title": "new"}]
+
+
+def test_empty_run_keeps_previous_file(path):
+    with JsonlWriter(path):
+        pass
+    assert list(read_jsonl(path)) == [{"title": "previous"}]
+    assert not os.path.exists(f"{path}.partial")
+
+
+def test_finished_run_replaces_file(path):
+    assert write_jsonl([{"title": "a"}, {"title": "b"}], path) == 2
+    assert [r["title"] for r in read_jsonl(path)] == ["a", "b"]
+    assert not os.path.exists(f"{path}.partial")
+
+
+def test_live_run_writes_the_file_itself(path):
+    with JsonlWriter(path, live=True) as writer:
+        writer.write({"title": "new"})
+        assert os.path.exists(f"{path}.writing")
+        assert list(read_jsonl(path)) == [{"title": "new"}]
+    assert not os.path.exists(f"{path}.writing")
+
+
+def test_follow_reads_records_while_they_are_written(path):
+    started = threading.Event()
+
+    def crawl():
+        with JsonlWriter(path, live=True) as writer:
+            started.set()
+            for i in range(3):
+                writer.write({"title": f"product {i}"})
+                time.sleep(0.05)
+
+    crawler = threading.Thread(target=crawl)
+    crawler.start()
+    started.wait()
+    titles = [r["title"] for r in follow_jsonl(path, poll_seconds=0.01)]
+    crawler.join()
+    assert titles == ["product 0", "product 1", "product 2"]
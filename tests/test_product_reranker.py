@@ -0,0 +1,46 @@
+import pytest
+
+from backend.services.product_reranker import (
+    ProductReranker,
+    build_product_embeddings,
+    product_key,
+)
+from backend.services.retrievers import get_embedder
+
+PRODUCTS = [
+    {"name": "KitKat", "description": "chocolate wafer bar"},
+    {"name": "Nescafe", "description": "instant coffee"},
+]
+
+
+@pytest.fixture
+def reranker(tmp_path):
+    build_product_embeddings(
+        PRODUCTS, get_embedder("hashing", 256), index_dir=str(tmp_path)
+    )
+    return ProductReranker(str(tmp_path), max_extra=2)
+
+
+def names(products):
+    return [p["name"] for p in products]
+
+
+def test_edited_product_is_reembedded(reranker):
+    assert names(reranker.rerank("instant coffee", PRODUCTS, 2)) == [
+        "Nescafe",
+        "KitKat",
+    ]
+    edited = [PRODUCTS[0], {"name": "Nescafe", "description": "green tea leaves"}]
+    assert names(reranker.rerank("instant coffee", edited, 2))[0] == "KitKat"
+    assert len(reranker._extra) == 1
+
+
+def test_products_embedded_on_the_fly_are_bounded(reranker):
+    new = [{"name": f"Product {i}", "description": f"flavour {i}"} for i in range(5)]
+    assert len(reranker.rerank("flavour", new, 3)) == 3
+    assert len(reranker._extra) == 2
+    assert list(reranker._extra) == [product_key(p) for p in new[3:]]
+
+    # Least recently used first out
+    reranker.rerank("flavour", [new[3], new[0]], 1)
+    assert list(reranker._extra) == [product_key(new[3]), product_key(new[0])]
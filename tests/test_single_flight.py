@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from backend.services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"answer": "KitKat is a wafer bar"}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("q", answer) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == {"answer": "KitKat is a wafer bar"} for r in results)
+    assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("pipeline failed")
+
+    async def main():
+        return await asyncio.gather(
+            *(flights.do("q", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def answer():
+        await asyncio.sleep(0.05)
+        return {"answer": "done"}
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("q", answer))
+        second = asyncio.ensure_future(flights.do("q", answer))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == {"answer": "done"}
+
+
+def test_late_stream_subscribers_replay_missed_events():
+    flights = SingleFlight()
+
+    async def events():
+        for token in ("Kit", "Kat"):
+            yield {"event": "token", "data": token}
+            await asyncio.sleep(0.01)
+
+    async def collect(stream):
+        return [event["data"] async for event in stream]
+
+    async def main():
+        first = asyncio.ensure_future(collect(flights.stream("q", events)))
+        await asyncio.sleep(0.015)
+        late = asyncio.ensure_future(collect(flights.stream("q", events)))
+        return await first, await late
+
+    assert asyncio.run(main()) == (["Kit", "Kat"], ["Kit", "Kat"])